@@ -1,22 +1,60 @@
 ﻿from __future__ import annotations
 
+import hmac
 import html
 import os
+import time
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import joblib
 import numpy as np
-import pandas as pd
-import plotly.graph_objects as go
-import shap
 import streamlit as st
 from dotenv import load_dotenv
 
-try:
-    import google.generativeai as genai
-except Exception:
-    genai = None
+from artifacts import CANDIDATE_POINTER, LoadedModel, ModelStore
+from audit import AuditWriter
+from binning import ResultCache, ThresholdBinner
+from bootstrap import format_interval
+from calibration import apply_calibration
+from charts import CHART_MODES, gauge_svg, shap_svg
+from counterfactual import Counterfactual, find_counterfactual
+from drift import MIN_SAMPLES, DriftMonitor
+from engines import positive_shap
+import profiling
+import telemetry
+from llm import get_gemini_model
+from quantize import warm_kernel
+from registry import PRIMARY_CONDITION, Condition, load_registry
+from sessions import SessionResults
+from shadow import ShadowJob, ShadowScorer
+from singleflight import SingleFlight
+from warmup import start_warmup, wait_for_warmup
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import plotly.graph_objects as go
+    import shap
+
+HEAVY_MODULES = ("pandas", "joblib", "sklearn.ensemble", "plotly.graph_objects", "shap")
+# (min, max, step) of the sliders in main() for the features a patient can change.
+MODIFIABLE_BOUNDS = {
+    "Glucose": (44, 199, 1),
+    "BMI": (18.0, 67.0, 0.1),
+    "BloodPressure": (24, 122, 1),
+    "Insulin": (14, 846, 1),
+}
+LOW_RISK_THRESHOLD = 40.0
+HIGH_RISK_THRESHOLD = 65.0
+PERFORMANCE_METRICS = (
+    ("accuracy", "Accuracy"),
+    ("precision", "Precision (High Risk)"),
+    ("recall", "Recall (High Risk)"),
+    ("f1", "F1 Score"),
+    ("auc", "AUC-ROC"),
+)
 
 
 st.set_page_config(
@@ -645,13 +683,11 @@ st.markdown(
 
 BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(BASE_DIR / ".env")
-GEMINI_KEY = os.environ.get("GEMINI_API_KEY", "")
-
-if genai and GEMINI_KEY:
-    genai.configure(api_key=GEMINI_KEY)
-    GEMINI_MODEL = genai.GenerativeModel("gemini-2.5-flash")
-else:
-    GEMINI_MODEL = None
+# Header, sidebar and sliders only need the standard library and Streamlit;
+# everything else is imported on a background thread while they paint.
+if os.environ.get("VITALAI_WARMUP", "1") != "0":
+    start_warmup(HEAVY_MODULES, tasks=(get_gemini_model, warm_kernel))
+telemetry.start_metrics_server()
 
 
 def icon(name: str, cls: str = "") -> str:
@@ -666,6 +702,7 @@ def icon(name: str, cls: str = "") -> str:
         "forest": "<path d='M12 3v18'></path><path d='M7 8l5-5 5 5'></path><path d='M8 13h8'></path><path d='M9 18h6'></path>",
         "shap": "<path d='M12 3l1.8 4.2L18 9l-4.2 1.8L12 15l-1.8-4.2L6 9l4.2-1.8z'></path><circle cx='19' cy='5' r='1.7'></circle>",
         "gemini": "<rect x='4' y='4' width='16' height='16' rx='3'></rect><path d='M8 9h8'></path><path d='M8 13h5'></path><path d='M8 17h8'></path>",
+        "drift": "<path d='M3 17l5-5 4 4 8-8'></path><path d='M15 8h5v5'></path>",
         "dashboard": "<rect x='4' y='4' width='7' height='7' rx='1.5'></rect><rect x='13' y='4' width='7' height='7' rx='1.5'></rect><rect x='4' y='13' width='7' height='7' rx='1.5'></rect><rect x='13' y='13' width='7' height='7' rx='1.5'></rect>",
         "performance": "<path d='M4 19h16'></path><path d='M6 15l3-3 3 2 6-7'></path><circle cx='6' cy='15' r='1'></circle><circle cx='9' cy='12' r='1'></circle><circle cx='12' cy='14' r='1'></circle><circle cx='18' cy='7' r='1'></circle>",
         "system": "<rect x='4' y='4' width='16' height='6' rx='1.5'></rect><rect x='4' y='14' width='16' height='6' rx='1.5'></rect>",
@@ -678,40 +715,153 @@ def icon(name: str, cls: str = "") -> str:
 
 
 @st.cache_resource
-def load_model() -> tuple[Any, list[str]]:
-    model = joblib.load(BASE_DIR / "model.pkl")
-    features = joblib.load(BASE_DIR / "features.pkl")
-    return model, list(features)
+def get_registry() -> dict[str, Condition]:
+    return load_registry(BASE_DIR)
 
 
 @st.cache_resource
-def load_explainer(_model: Any) -> shap.TreeExplainer:
-    return shap.TreeExplainer(_model)
+def get_model_stores() -> dict[str, ModelStore]:
+    # One hot-reloading store per registered condition; a condition with no
+    # trained version yet simply has nothing to serve.
+    stores = {}
+    for name, condition in get_registry().items():
+        store = ModelStore(
+            BASE_DIR,
+            poll_seconds=float(os.environ.get("VITALAI_RELOAD_SECONDS", "5")),
+            models_dirname=condition.models_dirname,
+        )
+        store.start()
+        stores[name] = store
+    return stores
+
+
+def get_model_store() -> ModelStore:
+    return get_model_stores()[PRIMARY_CONDITION]
+
+
+@st.cache_resource
+def get_scoring_pool() -> ThreadPoolExecutor:
+    # The forests and TreeSHAP release the GIL in their inner loops, so the
+    # other conditions score on these threads while the primary one scores
+    # on the request thread.
+    workers = int(os.environ.get("VITALAI_SCORING_THREADS", str(max(1, len(get_registry()) - 1))))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vitalai-score")
+
+
+@st.cache_resource
+def get_audit_writer() -> AuditWriter | None:
+    if os.environ.get("VITALAI_AUDIT", "1") == "0":
+        return None
+    return AuditWriter(Path(os.environ.get("VITALAI_AUDIT_DIR", BASE_DIR / "audit")))
+
+
+@st.cache_resource
+def _drift_monitor(_version: str, _reference: dict[str, Any]) -> DriftMonitor:
+    return DriftMonitor(
+        _reference, half_life=float(os.environ.get("VITALAI_DRIFT_HALF_LIFE", "500")), version=_version
+    )
+
+
+def get_drift_monitor(version: str, reference: dict[str, Any]) -> DriftMonitor:
+    # One monitor, and one worker thread, for the process: a hot-swapped
+    # version resets it to that version's reference instead of starting
+    # another thread that would live as long as the process.
+    monitor = _drift_monitor(version, reference)
+    if monitor.version != version:
+        monitor.reset(reference, version)
+    return monitor
+
+
+@st.cache_resource
+def get_shadow_scorer() -> ShadowScorer | None:
+    # Opt-in: scores each analysis again with models/CANDIDATE, off-thread.
+    if os.environ.get("VITALAI_SHADOW", "0") == "0":
+        return None
+    store = ModelStore(
+        BASE_DIR, pointer=CANDIDATE_POINTER, poll_seconds=float(os.environ.get("VITALAI_RELOAD_SECONDS", "5"))
+    )
+    store.start()
+    flight = get_analysis_flight()
+    return ShadowScorer(
+        store,
+        BASE_DIR / "shadow_log.jsonl",
+        max_queue=int(os.environ.get("VITALAI_SHADOW_QUEUE", "64")),
+        busy=lambda: flight.in_flight() > 0,
+    )
+
+
+def load_model_meta() -> dict[str, Any]:
+    return get_model_store().meta()
+
+
+def load_active_model() -> LoadedModel:
+    return get_model_store().active()
+
+
+def load_condition_models(patient_inputs: dict[str, float]) -> dict[str, LoadedModel]:
+    # Secondary conditions whose feature schema the patient inputs cover.
+    loaded = {}
+    for name, store in get_model_stores().items():
+        if name == PRIMARY_CONDITION:
+            continue
+        try:
+            active = store.active()
+        except FileNotFoundError:
+            continue
+        if all(col in patient_inputs for col in active.feature_names):
+            loaded[name] = active
+    return loaded
+
+
+def get_shap_matrix(explainer: shap.TreeExplainer, input_df: pd.DataFrame) -> np.ndarray:
+    return positive_shap(explainer, input_df)
 
 
 def get_shap_values(explainer: shap.TreeExplainer, input_df: pd.DataFrame) -> np.ndarray:
-    shap_vals = explainer.shap_values(input_df)
-    if isinstance(shap_vals, list):
-        return np.asarray(shap_vals[1][0], dtype=float)
-    arr = np.asarray(shap_vals)
-    if arr.ndim == 3 and arr.shape[-1] == 2:
-        return np.asarray(arr[0, :, 1], dtype=float)
-    if arr.ndim == 3 and arr.shape[0] == 2:
-        return np.asarray(arr[1, 0, :], dtype=float)
-    if arr.ndim == 2:
-        return np.asarray(arr[0], dtype=float)
-    return np.asarray(arr.ravel(), dtype=float)
-
-
-def risk_meta(confidence: float) -> dict[str, str]:
-    if confidence > 65:
+    return get_shap_matrix(explainer, input_df)[0]
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    # Keys carry the model version, so entries from a replaced model just age out.
+    return ResultCache(maxsize=int(os.environ.get("VITALAI_RESULT_CACHE_SIZE", "4096")))
+
+
+@st.cache_resource
+def get_session_results() -> SessionResults:
+    # Each session keeps only a key in st.session_state; the result itself is
+    # held here, compacted, capped and dropped once the session goes idle.
+    return SessionResults(
+        max_sessions=int(os.environ.get("VITALAI_SESSION_RESULTS_MAX", "500")),
+        idle_seconds=float(os.environ.get("VITALAI_SESSION_IDLE_SECONDS", "1800")),
+    )
+
+
+def session_key() -> str:
+    if "results_key" not in st.session_state:
+        st.session_state["results_key"] = uuid.uuid4().hex
+    return st.session_state["results_key"]
+
+
+@st.cache_resource
+def get_analysis_flight() -> SingleFlight:
+    return SingleFlight()
+
+
+def risk_thresholds(meta: dict[str, Any]) -> tuple[float, float]:
+    thresholds = meta.get("risk_thresholds") or {}
+    return float(thresholds.get("high", HIGH_RISK_THRESHOLD)), float(thresholds.get("low", LOW_RISK_THRESHOLD))
+
+
+def risk_meta(confidence: float, high: float = HIGH_RISK_THRESHOLD, low: float = LOW_RISK_THRESHOLD) -> dict[str, str]:
+    if confidence > high:
         return {
             "level": "high",
             "hero_label": "HIGH RISK DETECTED",
             "status": "DETECTED",
             "color": "#FF3B30",
         }
-    if confidence >= 40:
+    if confidence >= low:
         return {
             "level": "warn",
             "hero_label": "BORDERLINE RISK",
@@ -726,7 +876,19 @@ def risk_meta(confidence: float) -> dict[str, str]:
     }
 
 
-def fallback_explanation(confidence: float, top_factors_text: str, prediction: int) -> str:
+def counterfactual_text(counterfactual: Counterfactual | None, threshold: float = LOW_RISK_THRESHOLD) -> str:
+    if counterfactual is None:
+        return (
+            "No combination of glucose, BMI, blood pressure and insulin within the supported ranges brings the "
+            f"estimate below {threshold:.0f}%, so the remaining factors weigh heavily here."
+        )
+    return (
+        f"A what-if search found that {counterfactual.describe()} would bring the estimated probability to "
+        f"{counterfactual.probability * 100:.1f}%, below the {threshold:.0f}% low-risk threshold."
+    )
+
+
+def fallback_explanation(confidence: float, top_factors_text: str, prediction: int, what_if: str = "") -> str:
     profile = "higher-than-expected metabolic stress" if prediction == 1 else "a relatively stable metabolic pattern"
     para1 = (
         f"Your current profile shows a {confidence:.1f}% estimated probability for diabetes risk. "
@@ -740,7 +902,8 @@ def fallback_explanation(confidence: float, top_factors_text: str, prediction: i
         "can collectively shift long-term risk."
     )
     para3 = (
-        "Use this result as a prompt for action by tracking nutrition, activity, and repeat lab work over time. "
+        (f"{what_if} " if what_if else "")
+        + "Use this result as a prompt for action by tracking nutrition, activity, and repeat lab work over time. "
         "If any values remain elevated, discuss preventive options and confirmatory testing with a clinician. "
         "Please review this result with a qualified physician."
     )
@@ -748,18 +911,236 @@ def fallback_explanation(confidence: float, top_factors_text: str, prediction: i
 
 
 def generate_explanation(prompt: str, fallback_text: str) -> str:
-    if GEMINI_MODEL is None:
+    gemini_model = get_gemini_model()
+    if gemini_model is None:
+        telemetry.count(telemetry.LLM_FALLBACKS, reason="no_client")
         return fallback_text
     try:
-        response = GEMINI_MODEL.generate_content(prompt)
+        response = gemini_model.generate_content(prompt)
         text = getattr(response, "text", None)
         if text and text.strip():
             return text.strip()
+        telemetry.count(telemetry.LLM_FALLBACKS, reason="empty")
         return fallback_text
     except Exception:
+        telemetry.count(telemetry.LLM_FALLBACKS, reason="error")
         return fallback_text
 
 
+def score_patient(
+    model: Any,
+    explainer: shap.TreeExplainer,
+    feature_names: list[str],
+    meta: dict[str, Any],
+    patient_inputs: dict[str, float],
+    binner: ThresholdBinner | None = None,
+    cache: ResultCache | None = None,
+) -> dict[str, Any]:
+    wait_for_warmup()
+    import pandas as pd
+
+    with telemetry.timed("assemble_input"):
+        input_df = pd.DataFrame([patient_inputs]).reindex(columns=feature_names)
+
+    # Inputs in the same threshold interval for every feature score
+    # identically, so the interval indices are an exact cache key.
+    key = cached = None
+    if binner is not None and cache is not None:
+        key = (meta.get("condition"), meta.get("version"), binner.key(input_df.to_numpy()))
+        cached = cache.get(key)
+        telemetry.count(telemetry.CACHE_HITS if cached else telemetry.CACHE_MISSES, cache="threshold_bins")
+
+    start = time.perf_counter()
+    with telemetry.timed("predict"):
+        raw_probability = cached[0] if cached else float(model.predict_proba(input_df)[0][1])
+        probability = float(apply_calibration(raw_probability, meta["calibration"]))
+    predict_ms = (time.perf_counter() - start) * 1000
+    with telemetry.timed("shap"):
+        shap_values = cached[1] if cached else get_shap_values(explainer, input_df)
+    if key is not None and not cached:
+        cache.put(key, (raw_probability, shap_values))
+
+    shap_df = pd.DataFrame({"feature": feature_names, "value": shap_values})
+    shap_sorted = shap_df.iloc[shap_df["value"].abs().sort_values(ascending=False).index]
+    top_factors_text = "\n".join(
+        [
+            f"- {row.feature}: SHAP {row.value:+.4f}"
+            for row in shap_sorted.head(3).itertuples(index=False)
+        ]
+    )
+    return {
+        "prediction": int(probability > 0.5),
+        "confidence": probability * 100.0,
+        "top_feature": str(shap_sorted.iloc[0]["feature"]),
+        "top_factors_text": top_factors_text,
+        "shap_records": shap_df.to_dict("records"),
+        "predict_ms": predict_ms,
+        "predict_cached": bool(cached),
+    }
+
+
+def condition_card(name: str, meta: dict[str, Any], scored: dict[str, Any]) -> dict[str, Any]:
+    risk = risk_meta(scored["confidence"], *risk_thresholds(meta))
+    return {
+        "condition": name,
+        "label": meta.get("condition_label", name.replace("_", " ").title()),
+        "version": meta.get("version"),
+        "confidence": scored["confidence"],
+        "hero_label": risk["hero_label"],
+        "risk_level": risk["level"],
+        "risk_color": risk["color"],
+        "top_feature": scored["top_feature"],
+        "predict_ms": round(scored["predict_ms"], 3),
+    }
+
+
+def score_condition(loaded: LoadedModel, patient_inputs: dict[str, float], cache: ResultCache | None) -> dict[str, Any]:
+    with telemetry.timed("score_condition"):
+        return score_patient(
+            loaded.scorer, loaded.explainer, loaded.feature_names, loaded.meta, patient_inputs, loaded.binner, cache
+        )
+
+
+def run_analysis(
+    model: Any,
+    explainer: shap.TreeExplainer,
+    feature_names: list[str],
+    meta: dict[str, Any],
+    patient_inputs: dict[str, float],
+    binner: ThresholdBinner | None = None,
+    cache: ResultCache | None = None,
+    others: dict[str, LoadedModel] | None = None,
+    pool: Executor | None = None,
+    forest: Any = None,
+) -> dict[str, Any]:
+    # Runs without Streamlit calls so any session's thread can lead it.
+    start = time.perf_counter()
+    # Every other applicable condition scores on the pool while the primary
+    # one scores here, so scoring takes as long as the slowest model.
+    pending = {}
+    if others and pool is not None:
+        pending = {name: pool.submit(score_condition, loaded, patient_inputs, cache) for name, loaded in others.items()}
+    scored = score_patient(model, explainer, feature_names, meta, patient_inputs, binner, cache)
+    conditions = [condition_card(meta.get("condition", PRIMARY_CONDITION), meta, scored)]
+    conditions += [condition_card(name, others[name].meta, future.result()) for name, future in pending.items()]
+    conditions_at = time.perf_counter()
+
+    high, low = risk_thresholds(meta)
+    risk = risk_meta(scored["confidence"], high, low)
+    counterfactual, what_if = None, ""
+    if scored["confidence"] >= low:
+        with telemetry.timed("counterfactual"):
+            counterfactual = find_counterfactual(
+                model, feature_names, patient_inputs, MODIFIABLE_BOUNDS, meta["calibration"], low / 100, forest=forest
+            )
+        what_if = counterfactual_text(counterfactual, low)
+    fallback_text = fallback_explanation(
+        scored["confidence"], scored["top_factors_text"], scored["prediction"], what_if
+    )
+    prompt = build_prompt(patient_inputs, meta, scored, what_if)
+    scored_at = time.perf_counter()
+    with telemetry.timed("explain"):
+        explanation = generate_explanation(prompt, fallback_text)
+    explained_at = time.perf_counter()
+    return {
+        "prediction": scored["prediction"],
+        "confidence": scored["confidence"],
+        "hero_label": risk["hero_label"],
+        "status": risk["status"],
+        "risk_level": risk["level"],
+        "risk_color": risk["color"],
+        "top_feature": scored["top_feature"],
+        "shap_units": meta["shap_units"],
+        "shap_records": scored["shap_records"],
+        "explanation": explanation,
+        "predict_ms": scored["predict_ms"],
+        "predict_cached": scored["predict_cached"],
+        "risk_thresholds": {"high": high, "low": low},
+        "conditions": conditions,
+        "counterfactual": None
+        if counterfactual is None
+        else {"changes": counterfactual.changes, "probability": round(counterfactual.probability, 6)},
+        "timings_ms": {
+            "predict": round(scored["predict_ms"], 3),
+            "conditions": round((conditions_at - start) * 1000, 3),
+            "score": round((scored_at - start) * 1000, 3),
+            "explain": round((explained_at - scored_at) * 1000, 3),
+        },
+    }
+
+
+def audit_entry(
+    version: str, patient_inputs: dict[str, float], results: dict[str, Any], shared: bool, total_ms: float
+) -> dict[str, Any]:
+    top = sorted(results["shap_records"], key=lambda r: abs(r["value"]), reverse=True)[:3]
+    return {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "model_version": version,
+        "inputs": patient_inputs,
+        "probability": round(results["confidence"] / 100.0, 6),
+        "prediction": results["prediction"],
+        "risk_level": results["risk_level"],
+        "top_factors": [{"feature": r["feature"], "shap": round(float(r["value"]), 6)} for r in top],
+        "counterfactual": results["counterfactual"],
+        "conditions": [
+            {
+                "condition": card["condition"],
+                "model_version": card["version"],
+                "probability": round(card["confidence"] / 100.0, 6),
+                "risk_level": card["risk_level"],
+            }
+            for card in results["conditions"][1:]
+        ],
+        "timings_ms": {**results["timings_ms"], "total": round(total_ms, 3)},
+        "deduplicated": shared,
+    }
+
+
+def build_prompt(
+    patient_inputs: dict[str, float], meta: dict[str, Any], scored: dict[str, Any], what_if: str = ""
+) -> str:
+    what_if_section = (
+        f"""
+What-if analysis (re-scored by the same model):
+{what_if}
+Mention this concrete, model-verified change in paragraph 3.
+"""
+        if what_if
+        else ""
+    )
+    return f"""
+You are VitalAI, a medical AI assistant built for early disease risk detection.
+
+Patient clinical values:
+- Pregnancies: {patient_inputs['Pregnancies']}
+- Glucose: {patient_inputs['Glucose']} mg/dL
+- Blood Pressure: {patient_inputs['BloodPressure']} mmHg
+- Skin Thickness: {patient_inputs['SkinThickness']} mm
+- Insulin: {patient_inputs['Insulin']} uU/mL
+- BMI: {patient_inputs['BMI']}
+- Diabetes Pedigree Function: {patient_inputs['DiabetesPedigreeFunction']}
+- Age: {patient_inputs['Age']}
+
+Our {meta['algorithm']} model predicted {'HIGH RISK' if scored['prediction'] == 1 else 'LOW RISK'}
+for diabetes with {scored['confidence']:.1f}% confidence.
+
+Top contributing risk factors (from SHAP analysis):
+{scored['top_factors_text']}
+{what_if_section}
+Write EXACTLY 3 paragraphs - no headers, no bullet points, flowing prose only:
+
+Paragraph 1: What this result means clinically. What pattern the AI detected.
+Paragraph 2: Which specific values are most concerning (or reassuring) and the
+             medical reason why.
+Paragraph 3: Clear, actionable next steps. Always end with recommending
+             a qualified physician.
+
+Tone: Warm, clear, empowering. Not alarming. Not robotic.
+Never use jargon without immediately explaining it.
+Keep each paragraph 3-4 sentences. Total response under 200 words.
+"""
+
+
 def fmt_value(value: float) -> str:
     if isinstance(value, float) and value.is_integer():
         return f"{int(value)}"
@@ -797,7 +1178,10 @@ def render_slider(
     )
 
 
-def render_sidebar() -> None:
+def render_sidebar(meta: dict[str, Any]) -> None:
+    high, low = risk_thresholds(meta)
+    metrics = meta.get("metrics")
+    accuracy = format_interval(metrics["accuracy"]) if metrics else "Not recorded"
     with st.sidebar:
         st.markdown(
             f"""
@@ -812,9 +1196,10 @@ def render_sidebar() -> None:
             f"""
 <div class='sidebar-section'>
   <div class='section-title'>{icon('model')}<span>Model Info</span></div>
-  <div class='kv-row'><span class='k'>Algorithm</span><span class='v'>Random Forest</span></div>
-  <div class='kv-row'><span class='k'>Trees</span><span class='v'>200</span></div>
-  <div class='kv-row'><span class='k'>Accuracy</span><span class='v'>78.4%</span></div>
+  <div class='kv-row'><span class='k'>Algorithm</span><span class='v'>{html.escape(meta['algorithm'])}</span></div>
+  <div class='kv-row'><span class='k'>Version</span><span class='v'>{html.escape(str(meta.get('version', 'legacy')))}</span></div>
+  <div class='kv-row'><span class='k'>{html.escape(meta['size_label'])}</span><span class='v'>{meta['size']}</span></div>
+  <div class='kv-row'><span class='k'>Accuracy</span><span class='v'>{accuracy}</span></div>
   <div class='kv-row'><span class='k'>Dataset</span><span class='v'>Pima Indians (768)</span></div>
   <div class='kv-row'><span class='k'>Features</span><span class='v'>8 clinical inputs</span></div>
 </div>
@@ -827,9 +1212,9 @@ def render_sidebar() -> None:
 <div class='sidebar-section'>
   <div class='section-title'>{icon('threshold')}<span>Detection Thresholds</span></div>
   <div class='badge-stack'>
-    <span class='pill safe'>LOW RISK: &lt; 40% confidence</span>
-    <span class='pill warn'>BORDERLINE: 40-65%</span>
-    <span class='pill high'>HIGH RISK: &gt; 65%</span>
+    <span class='pill safe'>LOW RISK: &lt; {low:g}% confidence</span>
+    <span class='pill warn'>BORDERLINE: {low:g}-{high:g}%</span>
+    <span class='pill high'>HIGH RISK: &gt; {high:g}%</span>
   </div>
   <div class='sidebar-note'>Requires all 8 fields to be filled</div>
   <div class='sidebar-note'>Min age: 18 | Max insulin: 900</div>
@@ -838,13 +1223,15 @@ def render_sidebar() -> None:
             unsafe_allow_html=True,
         )
 
+        render_drift_section(meta)
+
         st.markdown(
             f"""
 <div class='sidebar-section'>
   <div class='section-title'>{icon('pipeline')}<span>System Pipeline</span></div>
   <div class='pipeline-item'><span class='pipeline-step'>1.</span>{icon('patient')}<span>Patient Input</span></div>
   <div class='pipeline-item'><span class='pipeline-step'>2.</span>{icon('preprocess')}<span>Data Preprocessor</span></div>
-  <div class='pipeline-item'><span class='pipeline-step'>3.</span>{icon('forest')}<span>Random Forest Model</span></div>
+  <div class='pipeline-item'><span class='pipeline-step'>3.</span>{icon('forest')}<span>{html.escape(meta['algorithm'])} Model</span></div>
   <div class='pipeline-item'><span class='pipeline-step'>4.</span>{icon('shap')}<span>SHAP Explainer</span></div>
   <div class='pipeline-item'><span class='pipeline-step'>5.</span>{icon('gemini')}<span>Gemini LLM Agent</span></div>
   <div class='pipeline-item'><span class='pipeline-step'>6.</span>{icon('dashboard')}<span>Output Dashboard</span></div>
@@ -854,15 +1241,46 @@ def render_sidebar() -> None:
         )
 
 
-def render_header() -> None:
+def render_drift_section(meta: dict[str, Any]) -> None:
+    reference = meta.get("drift_reference")
+    if not reference:
+        body = "<div class='sidebar-note'>No training reference in this model; retrain to enable.</div>"
+    else:
+        monitor = get_drift_monitor(meta["version"], reference)
+        rows = monitor.report()
+        flagged = sorted((r for r in rows if r.status in ("warn", "alert")), key=lambda r: -r.psi)
+        if monitor.observed < MIN_SAMPLES:
+            body = f"<span class='pill primary'>COLLECTING: {monitor.observed}/{MIN_SAMPLES} requests</span>"
+        elif not flagged:
+            body = "<span class='pill safe'>STABLE: inputs match training data</span>"
+        else:
+            pills = "".join(
+                f"<span class='pill {'high' if r.status == 'alert' else 'warn'}'>"
+                f"{html.escape(r.feature)}: PSI {r.psi:.2f} | KS {r.ks:.2f}</span>"
+                for r in flagged[:4]
+            )
+            body = f"<div class='badge-stack'>{pills}</div>"
+        body += f"<div class='sidebar-note'>Recent requests vs {reference['n_rows']} training rows</div>"
     st.markdown(
-        """
+        f"""
+<div class='sidebar-section'>
+  <div class='section-title'>{icon('drift')}<span>Input Drift</span></div>
+  {body}
+</div>
+""",
+        unsafe_allow_html=True,
+    )
+
+
+def render_header(meta: dict[str, Any]) -> None:
+    st.markdown(
+        f"""
 <div class='hero-banner'>
   <div class='hero-left'>
     <h1>Early Disease Risk Detection</h1>
     <p>Enter your clinical lab values. Our AI agent analyzes patterns invisible to the human eye.</p>
     <div class='hero-badges'>
-      <span class='hero-badge violet'>RANDOM FOREST</span>
+      <span class='hero-badge violet'>{html.escape(meta['algorithm'].upper())}</span>
       <span class='hero-badge coral'>GEMINI AI</span>
     </div>
   </div>
@@ -884,50 +1302,11 @@ def render_header() -> None:
     )
 
 
-def render_output_panel(results: dict[str, Any]) -> None:
-    st.markdown(
-        f"""
-<div class='result-hero {results['risk_level']}'>
-  <div class='result-title'>{icon('risk')} {results['hero_label']}</div>
-  <div class='result-sub'>Diabetes risk confidence: {results['confidence']:.1f}%</div>
-  <span class='after-pill {results['risk_level']}'>AFTER STATE</span>
-</div>
-""",
-        unsafe_allow_html=True,
-    )
-
-    m1, m2, m3 = st.columns(3)
-    with m1:
-        st.markdown(
-            f"""
-<div class='metric-card'>
-  <div class='metric-label'>Risk Score</div>
-  <div class='metric-value' style='color:{results['risk_color']}'>{results['confidence']:.1f}%</div>
-</div>
-""",
-            unsafe_allow_html=True,
-        )
-    with m2:
-        st.markdown(
-            f"""
-<div class='metric-card'>
-  <div class='metric-label'>Top Factor</div>
-  <div class='metric-sub'>{html.escape(results['top_feature'])}</div>
-</div>
-""",
-            unsafe_allow_html=True,
-        )
-    with m3:
-        st.markdown(
-            f"""
-<div class='metric-card'>
-  <div class='metric-label'>Status</div>
-  <div class='metric-sub'><span class='status-dot {results['risk_level']}'></span>{results['status']}</div>
-</div>
-""",
-            unsafe_allow_html=True,
-        )
+def build_gauge_figure(results: dict[str, Any]) -> go.Figure:
+    import plotly.graph_objects as go
 
+    thresholds = results.get("risk_thresholds") or {}
+    high, low = thresholds.get("high", HIGH_RISK_THRESHOLD), thresholds.get("low", LOW_RISK_THRESHOLD)
     gauge = go.Figure(
         go.Indicator(
             mode="gauge+number",
@@ -940,9 +1319,9 @@ def render_output_panel(results: dict[str, Any]) -> None:
                 "bgcolor": "#F4F6FB",
                 "borderwidth": 0,
                 "steps": [
-                    {"range": [0, 40],  "color": "rgba(47,158,68,0.15)"},
-                    {"range": [40, 65], "color": "rgba(245,159,0,0.15)"},
-                    {"range": [65, 100],"color": "rgba(240,62,62,0.15)"},
+                    {"range": [0, low],    "color": "rgba(47,158,68,0.15)"},
+                    {"range": [low, high], "color": "rgba(245,159,0,0.15)"},
+                    {"range": [high, 100], "color": "rgba(240,62,62,0.15)"},
                 ],
             },
         )
@@ -954,7 +1333,12 @@ def render_output_panel(results: dict[str, Any]) -> None:
         plot_bgcolor="#FFFFFF",
         font={"color": "#3D4257", "family": "Inter"},
     )
-    st.plotly_chart(gauge, use_container_width=True)
+    return gauge
+
+
+def build_shap_figure(results: dict[str, Any]) -> go.Figure:
+    import pandas as pd
+    import plotly.graph_objects as go
 
     shap_df = pd.DataFrame(results["shap_records"])
     shap_df["abs"] = shap_df["value"].abs()
@@ -972,7 +1356,7 @@ def render_output_panel(results: dict[str, Any]) -> None:
     )
     shap_fig.update_layout(
         title={"text": "What Drove This Prediction", "font": {"size": 14, "color": "#1A1D2E", "family": "Plus Jakarta Sans"}, "x": 0},
-        xaxis_title="SHAP Impact Value",
+        xaxis_title=f"SHAP Impact Value ({results.get('shap_units', 'probability')})",
         yaxis_title="",
         height=360,
         margin={"t": 50, "b": 35, "l": 10, "r": 20},
@@ -982,7 +1366,108 @@ def render_output_panel(results: dict[str, Any]) -> None:
         xaxis={"gridcolor": "#E8EAF2", "zerolinecolor": "#D0D4E8"},
         yaxis={"gridcolor": "#E8EAF2"},
     )
-    st.plotly_chart(shap_fig, use_container_width=True)
+    return shap_fig
+
+
+def chart_mode() -> str:
+    # ?charts=svg lets a low-bandwidth terminal opt out of the Plotly bundle
+    # without changing the deployment default.
+    mode = st.query_params.get("charts") or os.environ.get("VITALAI_CHARTS", "plotly")
+    return mode if mode in CHART_MODES else "plotly"
+
+
+def build_chart_svgs(results: dict[str, Any]) -> tuple[str, str]:
+    thresholds = results.get("risk_thresholds") or {}
+    high, low = thresholds.get("high", HIGH_RISK_THRESHOLD), thresholds.get("low", LOW_RISK_THRESHOLD)
+    records = results["shap_records"]
+    return (
+        gauge_svg(results["confidence"], results["risk_color"], high, low),
+        shap_svg(
+            tuple(r["feature"] for r in records),
+            tuple(float(r["value"]) for r in records),
+            results.get("shap_units", "probability"),
+        ),
+    )
+
+
+def render_charts(results: dict[str, Any]) -> None:
+    with telemetry.timed("charts"):
+        if chart_mode() == "svg":
+            gauge, shap_bars = build_chart_svgs(results)
+            st.markdown(gauge, unsafe_allow_html=True)
+            st.markdown(shap_bars, unsafe_allow_html=True)
+        else:
+            st.plotly_chart(build_gauge_figure(results), use_container_width=True)
+            st.plotly_chart(build_shap_figure(results), use_container_width=True)
+
+
+def render_condition_cards(conditions: list[dict[str, Any]]) -> None:
+    # The hero above already covers the primary condition on its own.
+    if len(conditions) < 2:
+        return
+    for column, card in zip(st.columns(len(conditions)), conditions):
+        with column:
+            st.markdown(
+                f"""
+<div class='metric-card'>
+  <div class='metric-label'>{html.escape(card['label'])}</div>
+  <div class='metric-value' style='color:{card['risk_color']}'>{card['confidence']:.1f}%</div>
+  <div class='metric-sub'><span class='status-dot {card['risk_level']}'></span>{html.escape(card['hero_label'])}</div>
+  <div class='metric-sub'>Top factor: {html.escape(card['top_feature'])}</div>
+</div>
+""",
+                unsafe_allow_html=True,
+            )
+
+
+def render_output_panel(results: dict[str, Any]) -> None:
+    wait_for_warmup()
+    st.markdown(
+        f"""
+<div class='result-hero {results['risk_level']}'>
+  <div class='result-title'>{icon('risk')} {results['hero_label']}</div>
+  <div class='result-sub'>Diabetes risk confidence: {results['confidence']:.1f}%</div>
+  <span class='after-pill {results['risk_level']}'>AFTER STATE</span>
+</div>
+""",
+        unsafe_allow_html=True,
+    )
+
+    m1, m2, m3 = st.columns(3)
+    with m1:
+        st.markdown(
+            f"""
+<div class='metric-card'>
+  <div class='metric-label'>Risk Score</div>
+  <div class='metric-value' style='color:{results['risk_color']}'>{results['confidence']:.1f}%</div>
+</div>
+""",
+            unsafe_allow_html=True,
+        )
+    with m2:
+        st.markdown(
+            f"""
+<div class='metric-card'>
+  <div class='metric-label'>Top Factor</div>
+  <div class='metric-sub'>{html.escape(results['top_feature'])}</div>
+</div>
+""",
+            unsafe_allow_html=True,
+        )
+    with m3:
+        st.markdown(
+            f"""
+<div class='metric-card'>
+  <div class='metric-label'>Status</div>
+  <div class='metric-sub'><span class='status-dot {results['risk_level']}'></span>{results['status']}</div>
+</div>
+""",
+            unsafe_allow_html=True,
+        )
+
+    render_condition_cards(results.get("conditions", []))
+
+    render_charts(results)
 
     rows_html = ""
     row_data = [
@@ -1034,25 +1519,57 @@ def render_output_panel(results: dict[str, Any]) -> None:
     )
 
 
-def render_bottom_tabs() -> None:
+def system_diagram(meta: dict[str, Any]) -> str:
+    # The model box names the active engine and its size, as the sidebar does,
+    # and the right-hand column widens to fit it.
+    model = [meta["algorithm"].upper(), f"({meta['size']} {meta['size_label'].lower()},", " predict proba)"]
+    explainer = ["SHAP EXPLAINER", "(feature", " attribution)"]
+    width = max(17, *(len(line) + 4 for line in model[:2]))
+    m, e = ([f"  {line}".ljust(width) for line in box] for box in (model, explainer))
+    rule = "+" + "-" * width + "+"
+    arrow = "+" + "-" * (width // 2) + "+" + "-" * (width - width // 2 - 1) + "+"
+    return f"""
++-------------+    +--------------+    {rule}
+|  USER INPUT | -> | PREPROCESSOR | -> |{m[0]}|
+|  (8 fields) |    | (normalize + |    |{m[1]}|
++-------------+    |  validate)   |    |{m[2]}|
+                   +--------------+    {arrow}
+{" " * (40 + width // 2)}v
++-------------+    +--------------+    {rule}
+|  DASHBOARD  | <- |  GEMINI LLM  | <- |{e[0]}|
+|  (charts +  |    |  (plain lang |    |{e[1]}|
+|   report)   |    |   report)    |    |{e[2]}|
++-------------+    +--------------+    {rule}
+""".strip("\n")
+
+
+def render_bottom_tabs(meta: dict[str, Any]) -> None:
+    wait_for_warmup()
+    import pandas as pd
+
     st.markdown("<div class='analysis-heading'>Accuracy & Model Analysis</div>", unsafe_allow_html=True)
-    tab1, tab2, tab3 = st.tabs(["Model Performance", "System Design", "Detection Criteria"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Model Performance", "System Design", "Detection Criteria", "Runtime Metrics"])
 
     with tab1:
         cm_path = BASE_DIR / "confusion_matrix.png"
         if cm_path.exists():
             st.image(str(cm_path), caption="Confusion Matrix", use_container_width=True)
 
-        perf_df = pd.DataFrame(
-            [
-                {"Metric": "Accuracy", "Value": "78.4%"},
-                {"Metric": "Precision (High Risk)", "Value": "74.2%"},
-                {"Metric": "Recall (High Risk)", "Value": "71.8%"},
-                {"Metric": "F1 Score", "Value": "73.0%"},
-                {"Metric": "AUC-ROC", "Value": "0.834"},
-            ]
-        )
-        st.table(perf_df.set_index("Metric"))
+        metrics = meta.get("metrics")
+        if metrics:
+            perf_df = pd.DataFrame(
+                [
+                    {"Metric": label, "Value": format_interval(metrics[key], percent=key != "auc")}
+                    for key, label in PERFORMANCE_METRICS
+                ]
+            )
+            st.table(perf_df.set_index("Metric"))
+            st.markdown(
+                f"Held-out test split of {metrics['n']} rows; ranges are {metrics['confidence']:.0%} "
+                f"bootstrap intervals over {metrics['replicates']} replicates."
+            )
+        else:
+            st.markdown("No evaluation metrics are recorded for this model version; retrain with `python train.py`.")
         st.markdown(
             "How to improve accuracy: (1) Increase training data size, (2) Use XGBoost or deep learning, "
             "(3) Add more clinical features like HbA1c, (4) Apply SMOTE for class imbalance, "
@@ -1060,23 +1577,11 @@ def render_bottom_tabs() -> None:
         )
 
     with tab2:
-        diagram = """
-+-------------+    +--------------+    +-----------------+
-|  USER INPUT | -> | PREPROCESSOR | -> |  RANDOM FOREST  |
-|  (8 fields) |    | (normalize + |    |  (200 trees,    |
-+-------------+    |  validate)   |    |   predict proba)|
-                   +--------------+    +--------+--------+
-                                                v
-+-------------+    +--------------+    +-----------------+
-|  DASHBOARD  | <- |  GEMINI LLM  | <- |  SHAP EXPLAINER |
-|  (charts +  |    |  (plain lang |    |  (feature       |
-|   report)   |    |   report)    |    |   attribution)  |
-+-------------+    +--------------+    +-----------------+
-""".strip("\n")
+        diagram = system_diagram(meta)
         st.code(diagram, language="text")
         st.markdown(
             "User Input collects eight clinical variables. The Preprocessor validates ranges and shapes the model input. "
-            "Random Forest outputs class probability. SHAP explains feature contribution per prediction. "
+            f"{meta['algorithm']} outputs class probability. SHAP explains feature contribution per prediction. "
             "Gemini converts technical outputs into patient-friendly guidance. Dashboard aggregates charts, tables, and final interpretation."
         )
 
@@ -1107,18 +1612,54 @@ def render_bottom_tabs() -> None:
         )
         st.table(criteria_df)
 
+    with tab4:
+        if not telemetry.ENABLED:
+            st.markdown("Pipeline instrumentation is switched off (VITALAI_METRICS=0).")
+        else:
+            stages = telemetry.stage_summary()
+            if stages:
+                stage_df = pd.DataFrame(stages).set_index("stage")
+                st.dataframe(stage_df.style.format({"mean_ms": "{:.1f}", "p50_ms": "{:.1f}", "p95_ms": "{:.1f}"}))
+            counters = telemetry.counter_summary()
+            if counters:
+                st.table(pd.DataFrame(counters).set_index("metric"))
+            sessions = get_session_results()
+            memory = sessions.stats()
+            st.markdown(
+                f"Session results: {memory['sessions']} held, {memory['total_bytes'] / 1024:.1f} KiB total, "
+                f"{memory['mean_bytes'] / 1024:.1f} KiB mean, {memory['max_bytes'] / 1024:.1f} KiB max; "
+                f"this session {sessions.nbytes(session_key()) / 1024:.1f} KiB."
+            )
+            st.markdown(
+                f"Prometheus metrics: `http://{telemetry.METRICS_HOST}:{telemetry.METRICS_PORT}/metrics` "
+                "(percentiles are interpolated from histogram buckets)."
+            )
 
-def main() -> None:
-    render_sidebar()
 
+def profile_requested() -> bool:
+    # VITALAI_PROFILE=1 profiles every run; otherwise an admin can profile a
+    # single click with ?profile=<VITALAI_PROFILE_TOKEN>. Without a token
+    # configured the query parameter is ignored.
+    if profiling.ALWAYS:
+        return True
+    if not profiling.TOKEN:
+        return False
+    return hmac.compare_digest(st.query_params.get("profile", ""), profiling.TOKEN)
+
+
+def profile_dir() -> Path:
+    return Path(os.environ.get("VITALAI_PROFILE_DIR", BASE_DIR / "profiles"))
+
+
+def main() -> None:
     try:
-        model, feature_names = load_model()
+        meta = load_model_meta()
     except FileNotFoundError:
         st.error("Model not found. Please run: python train.py")
         st.stop()
 
-    explainer = load_explainer(model)
-    render_header()
+    render_sidebar(meta)
+    render_header(meta)
 
     left_col, right_col = st.columns([1, 1.6], gap="large")
 
@@ -1162,108 +1703,99 @@ def main() -> None:
         run_clicked = st.button("Run AI Agent ->")
 
         if run_clicked:
-            patient_inputs = {
-                "Pregnancies": pregnancies,
-                "Glucose": glucose,
-                "BloodPressure": blood_pressure,
-                "SkinThickness": skin_thickness,
-                "Insulin": insulin,
-                "BMI": bmi,
-                "DiabetesPedigreeFunction": dpf,
-                "Age": age,
-            }
-
-            with st.spinner("Agent analyzing patient data..."):
-                missing = [col for col in feature_names if col not in patient_inputs]
-                if missing:
-                    st.error(f"Missing required features for model input: {', '.join(missing)}")
-                    st.stop()
-
-                input_df = pd.DataFrame([patient_inputs]).reindex(columns=feature_names)
-                prediction = int(model.predict(input_df)[0])
-                probability = float(model.predict_proba(input_df)[0][1])
-                confidence = probability * 100.0
-                shap_values = get_shap_values(explainer, input_df)
-
-                shap_df = pd.DataFrame({"feature": feature_names, "value": shap_values})
-                shap_sorted = shap_df.iloc[shap_df["value"].abs().sort_values(ascending=False).index]
-                top_feature = str(shap_sorted.iloc[0]["feature"])
-                top_factors_text = "\n".join(
-                    [
-                        f"- {row.feature}: SHAP {row.value:+.4f}"
-                        for row in shap_sorted.head(3).itertuples(index=False)
-                    ]
-                )
-
-                risk = risk_meta(confidence)
-                fallback_text = fallback_explanation(confidence, top_factors_text, prediction)
-
-                prompt = f"""
-You are VitalAI, a medical AI assistant built for early disease risk detection.
-
-Patient clinical values:
-- Pregnancies: {pregnancies}
-- Glucose: {glucose} mg/dL
-- Blood Pressure: {blood_pressure} mmHg
-- Skin Thickness: {skin_thickness} mm
-- Insulin: {insulin} uU/mL
-- BMI: {bmi}
-- Diabetes Pedigree Function: {dpf}
-- Age: {age}
-
-Our Random Forest model predicted {'HIGH RISK' if prediction == 1 else 'LOW RISK'}
-for diabetes with {confidence:.1f}% confidence.
-
-Top contributing risk factors (from SHAP analysis):
-{top_factors_text}
-
-Write EXACTLY 3 paragraphs - no headers, no bullet points, flowing prose only:
-
-Paragraph 1: What this result means clinically. What pattern the AI detected.
-Paragraph 2: Which specific values are most concerning (or reassuring) and the
-             medical reason why.
-Paragraph 3: Clear, actionable next steps. Always end with recommending
-             a qualified physician.
-
-Tone: Warm, clear, empowering. Not alarming. Not robotic.
-Never use jargon without immediately explaining it.
-Keep each paragraph 3-4 sentences. Total response under 200 words.
-"""
-
-            with st.spinner("Generating clinical explanation..."):
-                explanation = generate_explanation(prompt, fallback_text)
-
-            st.session_state["results"] = {
-                "prediction": prediction,
-                "confidence": confidence,
-                "hero_label": risk["hero_label"],
-                "status": risk["status"],
-                "risk_level": risk["level"],
-                "risk_color": risk["color"],
-                "top_feature": top_feature,
-                "shap_records": shap_df.to_dict("records"),
-                "explanation": explanation,
-            }
-
-            if risk["level"] == "safe":
-                st.balloons()
-
+            with profiling.capture(profile_dir(), "analysis", profile_requested()) as profile:
+                clicked_at = time.perf_counter()
+                patient_inputs = {
+                    "Pregnancies": pregnancies,
+                    "Glucose": glucose,
+                    "BloodPressure": blood_pressure,
+                    "SkinThickness": skin_thickness,
+                    "Insulin": insulin,
+                    "BMI": bmi,
+                    "DiabetesPedigreeFunction": dpf,
+                    "Age": age,
+                }
+
+                with st.spinner("Agent analyzing patient data..."):
+                    # One snapshot per request: a background swap to a newer
+                    # version does not affect an analysis already under way.
+                    with telemetry.cache_lookup("model"):
+                        active = load_active_model()
+                        others = load_condition_models(patient_inputs)
+                    feature_names = active.feature_names
+
+                    missing = [col for col in feature_names if col not in patient_inputs]
+                    if missing:
+                        st.error(f"Missing required features for model input: {', '.join(missing)}")
+                        st.stop()
+
+                    # Sessions submitting the same profile while one is already
+                    # being analysed wait for that result instead of recomputing.
+                    versions = (active.version, *sorted((name, m.version) for name, m in others.items()))
+                    key = (versions, tuple(float(patient_inputs[col]) for col in feature_names))
+                    results, shared = get_analysis_flight().do(
+                        key,
+                        lambda: run_analysis(
+                            active.scorer,
+                            active.explainer,
+                            feature_names,
+                            active.meta,
+                            patient_inputs,
+                            active.binner,
+                            get_result_cache(),
+                            others,
+                            get_scoring_pool() if others else None,
+                            active.model,
+                        ),
+                    )
+                if shared:
+                    telemetry.count(telemetry.DEDUPLICATED)
+                elif (shadow := get_shadow_scorer()) is not None:
+                    shadow.submit(
+                        ShadowJob(
+                            primary_version=active.version,
+                            patient_inputs=patient_inputs,
+                            primary_confidence=results["confidence"],
+                            primary_prediction=results["prediction"],
+                            primary_ms=results["predict_ms"],
+                            primary_cached=results["predict_cached"],
+                        )
+                    )
+                telemetry.count(telemetry.ANALYSES)
+                if active.meta.get("drift_reference"):
+                    get_drift_monitor(active.version, active.meta["drift_reference"]).observe(patient_inputs)
+                if (audit := get_audit_writer()) is not None:
+                    total_ms = (time.perf_counter() - clicked_at) * 1000
+                    audit.record(audit_entry(active.version, patient_inputs, results, shared, total_ms))
+
+                get_session_results().put(session_key(), results)
+                st.session_state["ran_analysis"] = True
+
+                if results["risk_level"] == "safe":
+                    st.balloons()
+            if profile is not None and profile.paths:
+                st.caption(f"Profile saved: {', '.join(p.name for p in profile.paths)}")
+
+    stored = get_session_results().get(session_key()) if st.session_state.get("ran_analysis") else None
     with right_col:
-        if "results" in st.session_state:
-            render_output_panel(st.session_state["results"])
+        if stored is not None:
+            with telemetry.timed("render"):
+                render_output_panel(stored)
         else:
+            ran = st.session_state.get("ran_analysis", False)
+            prompt = "Previous analysis expired; run the agent again" if ran else "Run the agent to see analysis"
             st.markdown(
                 f"""
 <div class='placeholder-card'>
   <div class='placeholder-illustration'>{icon('logo')}</div>
-  <div style='font-weight:300; font-size:1.05rem;'>Run the agent to see analysis</div>
+  <div style='font-weight:300; font-size:1.05rem;'>{prompt}</div>
 </div>
 """,
                 unsafe_allow_html=True,
             )
 
-    if "results" in st.session_state:
-        render_bottom_tabs()
+    if stored is not None:
+        render_bottom_tabs(meta)
 
 
 if __name__ == "__main__":
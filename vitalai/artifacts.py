@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import telemetry
+from binning import ThresholdBinner
+from calibration import calibration_arrays
+from engines import describe_model, engine_for_model, get_engine
+from quantize import QUANTIZED_FILENAME, QuantizedForest
+from warmup import wait_for_warmup
+
+MODELS_DIRNAME = "models"
+POINTER = "CURRENT"
+CANDIDATE_POINTER = "CANDIDATE"
+LEGACY_VERSION = "legacy"
+
+
+def new_version() -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    return f"v{stamp}-{uuid.uuid4().hex[:6]}"
+
+
+def write_pointer(models_dir: Path, version: str, name: str = POINTER) -> None:
+    tmp = models_dir / f".{name}.{os.getpid()}.tmp"
+    tmp.write_text(version + "\n")
+    os.replace(tmp, models_dir / name)
+
+
+def read_pointer(models_dir: Path, name: str = POINTER) -> str | None:
+    try:
+        version = (models_dir / name).read_text().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def write_version(
+    models_dir: Path,
+    model: Any,
+    feature_names: list[str],
+    meta: dict[str, Any],
+    version: str | None = None,
+    pointer: str | None = POINTER,
+    quantized: QuantizedForest | None = None,
+    extra_files: dict[str, Callable[[Path], None]] | None = None,
+) -> str:
+    import joblib
+
+    version = version or new_version()
+    models_dir.mkdir(parents=True, exist_ok=True)
+    # Everything is written into a hidden staging directory and renamed into
+    # place, so readers never see a version with only some files present.
+    staging = models_dir / f".staging-{version}"
+    staging.mkdir()
+    try:
+        joblib.dump(model, staging / "model.pkl")
+        joblib.dump(list(feature_names), staging / "features.pkl")
+        if quantized is not None:
+            quantized.save(staging / QUANTIZED_FILENAME)
+        for name, write in (extra_files or {}).items():
+            write(staging / name)
+        meta = {**meta, "version": version, "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+        (staging / "model_meta.json").write_text(json.dumps(meta, indent=2))
+        os.replace(staging, models_dir / version)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if pointer:
+        write_pointer(models_dir, version, pointer)
+    return version
+
+
+def list_versions(models_dir: Path) -> list[str]:
+    if not models_dir.is_dir():
+        return []
+    # Only directories holding a model count, so per-condition directories
+    # nested under models/ are never listed or pruned as versions.
+    return sorted(
+        p.name for p in models_dir.iterdir() if p.is_dir() and not p.name.startswith(".") and (p / "model.pkl").exists()
+    )
+
+
+def prune_versions(models_dir: Path, keep: int) -> list[str]:
+    # Versions named by any pointer file (CURRENT, CANDIDATE, ...) are kept.
+    pinned = {read_pointer(models_dir, p.name) for p in models_dir.iterdir() if p.is_file() and p.name.isupper()}
+    removed = []
+    for version in list_versions(models_dir)[:-keep] if keep > 0 else []:
+        if version not in pinned:
+            shutil.rmtree(models_dir / version, ignore_errors=True)
+            removed.append(version)
+    return removed
+
+
+def resolve(base_dir: Path, pointer: str = POINTER, models_dirname: str = MODELS_DIRNAME) -> tuple[str, Path] | None:
+    models_dir = base_dir / models_dirname
+    version = read_pointer(models_dir, pointer)
+    if version is not None and (models_dir / version / "model.pkl").exists():
+        return version, models_dir / version
+    # Flat model.pkl next to app.py, as written before versioning existed.
+    if pointer == POINTER and models_dirname == MODELS_DIRNAME and (base_dir / "model.pkl").exists():
+        return LEGACY_VERSION, base_dir
+    return None
+
+
+def read_meta(version: str, path: Path) -> dict[str, Any] | None:
+    meta_path = path / "model_meta.json"
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text())
+    meta.setdefault("version", version)
+    return meta
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    version: str
+    model: Any
+    feature_names: list[str]
+    meta: dict[str, Any]
+    explainer: Any
+    binner: ThresholdBinner | None
+    quantized: QuantizedForest | None = None
+
+    @property
+    def scorer(self) -> Any:
+        # Probabilities come from the quantized export when the version has
+        # one; TreeSHAP and the binner still work from the float model.
+        return self.model if self.quantized is None else self.quantized
+
+
+def load_version(version: str, path: Path, warm: bool = True) -> LoadedModel:
+    wait_for_warmup()
+    import joblib
+    import pandas as pd
+
+    model = joblib.load(path / "model.pkl")
+    feature_names = list(joblib.load(path / "features.pkl"))
+    meta = read_meta(version, path) or {**describe_model(model, engine_for_model(model)), "version": version}
+    meta["calibration"] = calibration_arrays(meta.get("calibration"))
+    explainer = get_engine(meta["engine"]).explainer(model)
+    binner = ThresholdBinner.from_model(model, len(feature_names))
+    quantized_path = path / QUANTIZED_FILENAME
+    quantized = QuantizedForest.load(quantized_path) if quantized_path.exists() else None
+    if warm:
+        # The first predict_proba / shap_values call pays one-off setup costs;
+        # paying them here keeps them off the first request after a swap.
+        row = pd.DataFrame([[0.0] * len(feature_names)], columns=feature_names)
+        model.predict_proba(row)
+        explainer.shap_values(row)
+        if quantized is not None:
+            quantized.predict_proba(row)
+    return LoadedModel(version, model, feature_names, meta, explainer, binner, quantized)
+
+
+class ModelStore:
+    # Holds the serving model and swaps it when the pointer file moves.
+    # Readers take a LoadedModel reference once per request, so requests in
+    # flight during a swap finish on the version they started with.
+    def __init__(
+        self, base_dir: Path, pointer: str = POINTER, poll_seconds: float = 5.0, models_dirname: str = MODELS_DIRNAME
+    ) -> None:
+        self.base_dir = base_dir
+        self.pointer = pointer
+        self.models_dirname = models_dirname
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._active: LoadedModel | None = None
+        self._meta_cache: tuple[str, dict[str, Any]] | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def resolve(self) -> tuple[str, Path]:
+        found = resolve(self.base_dir, self.pointer, self.models_dirname)
+        if found is None:
+            raise FileNotFoundError(self.base_dir / self.models_dirname / self.pointer)
+        return found
+
+    def meta(self) -> dict[str, Any]:
+        # Cheap metadata for the first paint, without unpickling the model.
+        active = self._active
+        if active is not None:
+            return active.meta
+        version, path = self.resolve()
+        cached = self._meta_cache
+        if cached is None or cached[0] != version:
+            meta = read_meta(version, path)
+            if meta is None:
+                return self.active().meta
+            meta["calibration"] = calibration_arrays(meta.get("calibration"))
+            cached = self._meta_cache = (version, meta)
+        return cached[1]
+
+    def active(self) -> LoadedModel:
+        active = self._active
+        if active is not None:
+            return active
+        with self._lock:
+            if self._active is None:
+                telemetry.mark_cache_miss()
+                self._active = load_version(*self.resolve(), warm=False)
+            return self._active
+
+    def check(self) -> str | None:
+        # Only reloads once something has been served; before that the next
+        # active() call simply loads whatever the pointer names.
+        current = self._active
+        if current is None:
+            return None
+        found = resolve(self.base_dir, self.pointer, self.models_dirname)
+        if found is None or found[0] == current.version:
+            return None
+        loaded = load_version(*found)
+        with self._lock:
+            self._active = loaded
+        return loaded.version
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            name = f"vitalai-reload-{Path(self.models_dirname).name}-{self.pointer.lower()}"
+            self._thread = threading.Thread(target=self._poll, name=name, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                with telemetry.timed("reload"):
+                    version = self.check()
+            except Exception:
+                telemetry.count(telemetry.MODEL_RELOADS, pointer=self.pointer, result="error")
+                continue
+            if version is not None:
+                telemetry.count(telemetry.MODEL_RELOADS, pointer=self.pointer, result="ok")
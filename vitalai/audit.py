@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+import telemetry
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+_STOP = object()
+
+
+class AuditWriter:
+    # Append-only prediction log. record() only enqueues; one daemon thread
+    # batches records and appends each batch to the day's segment as its own
+    # gzip member, so a crash can at worst lose the member being written.
+    def __init__(
+        self,
+        root: Path,
+        max_queue: int = 4096,
+        batch_size: int = 256,
+        flush_seconds: float = 2.0,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.root = root
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_segment_bytes = max_segment_bytes
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_queue)
+        self._segment: Path | None = None
+        self._segment_day: str | None = None
+        self._thread = threading.Thread(target=self._run, name="vitalai-audit", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, entry: dict[str, Any]) -> bool:
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            telemetry.count(telemetry.AUDIT_RECORDS, result="dropped")
+            return False
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        batch: list[dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_seconds
+
+    def _segment_path(self, day: str) -> Path:
+        segment = self._segment
+        if segment is None or self._segment_day != day or segment.stat().st_size >= self.max_segment_bytes:
+            directory = self.root / day
+            directory.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime("%H%M%S%f")
+            segment = self._segment = directory / f"audit-{stamp}-{os.getpid()}{SEGMENT_SUFFIX}"
+            self._segment_day = day
+        return segment
+
+    def _flush(self, batch: list[dict[str, Any]]) -> None:
+        by_day: dict[str, list[dict[str, Any]]] = {}
+        for entry in batch:
+            by_day.setdefault(entry["ts"][:10], []).append(entry)
+        for day, entries in by_day.items():
+            try:
+                payload = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries).encode()
+                with self._segment_path(day).open("ab") as fh:
+                    fh.write(gzip.compress(payload, compresslevel=6))
+                telemetry.count(telemetry.AUDIT_RECORDS, len(entries), result="written")
+            except Exception:
+                telemetry.count(telemetry.AUDIT_RECORDS, len(entries), result="error")
+
+
+def segments(root: Path, start: date | None = None, end: date | None = None) -> list[Path]:
+    # Day directories are ISO dates, so range pruning never opens a file.
+    if not root.is_dir():
+        return []
+    lo = start.isoformat() if start else ""
+    hi = end.isoformat() if end else "9999-12-31"
+    paths = []
+    for day_dir in sorted(root.iterdir()):
+        if day_dir.is_dir() and lo <= day_dir.name <= hi:
+            paths.extend(sorted(day_dir.glob(f"*{SEGMENT_SUFFIX}")))
+    return paths
+
+
+def read_segment(path: Path) -> list[dict[str, Any]]:
+    # Members are decompressed one at a time so a truncated final member,
+    # left by a crash mid-write, costs only that batch.
+    data = path.read_bytes()
+    records = []
+    while data:
+        decomp = zlib.decompressobj(wbits=31)
+        try:
+            chunk = decomp.decompress(data)
+        except zlib.error:
+            break
+        if not decomp.eof:
+            break
+        records.extend(json.loads(line) for line in chunk.splitlines() if line)
+        data = decomp.unused_data
+    return records
+
+
+def scan(root: Path, start: date | None = None, end: date | None = None) -> Iterator[dict[str, Any]]:
+    for path in segments(root, start, end):
+        yield from read_segment(path)
+
+
+def _segment_frame(path: Path) -> Any:
+    import pandas as pd
+
+    return pd.json_normalize(read_segment(path))
+
+
+def load_frame(root: Path, start: date | None = None, end: date | None = None, jobs: int | None = None) -> Any:
+    # Segments decompress and parse independently, so months of logs are
+    # spread over worker processes and concatenated once.
+    import pandas as pd
+
+    paths = segments(root, start, end)
+    if not paths:
+        return pd.DataFrame()
+    if len(paths) == 1 or jobs == 1:
+        frames = [_segment_frame(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            frames = list(pool.map(_segment_frame, paths, chunksize=max(1, len(paths) // 64)))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import shutil
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from artifacts import LEGACY_VERSION, MODELS_DIRNAME, POINTER, LoadedModel, load_version, resolve
+from calibration import apply_calibration
+from engines import positive_shap
+from registry import PRIMARY_CONDITION, REGISTRY_FILENAME, Condition, load_registry
+
+BASE_DIR = Path(__file__).resolve().parent
+PLAN_FILENAME = "plan.json"
+# Large enough that per-shard overhead (parse, lock, rename) is noise, small
+# enough that a crash loses little work and the pool stays evenly loaded.
+SHARD_BYTES = 1024 * 1024
+# A lock this old is assumed to belong to a worker that died without
+# cleaning up, e.g. on another machine sharing the work directory.
+LOCK_TIMEOUT = 3600.0
+
+
+@dataclass(frozen=True)
+class Shard:
+    index: int
+    start: int
+    end: int
+
+
+@dataclass
+class BatchSummary:
+    version: str
+    shards: int
+    scored: int
+    skipped: int
+    locked: int
+    rows: int
+    seconds: float
+    merged: bool
+
+
+def plan_shards(input_path: Path, shard_bytes: int = SHARD_BYTES) -> tuple[bytes, list[Shard]]:
+    # Byte ranges that start and end on line boundaries, so every worker (on
+    # this machine or another) reads its shard with one seek and no pre-pass
+    # over the file. Assumes no quoted newlines, as in numeric extracts.
+    size = input_path.stat().st_size
+    with input_path.open("rb") as fh:
+        header = fh.readline()
+        shards, start = [], fh.tell()
+        while start < size:
+            fh.seek(min(start + shard_bytes, size))
+            if fh.tell() < size:
+                fh.readline()
+            end = fh.tell()
+            shards.append(Shard(len(shards), start, end))
+            start = end
+    if not shards:
+        raise ValueError(f"No rows to score in {input_path.name}")
+    return header, shards
+
+
+def _shard_path(work_dir: Path, shard: Shard, suffix: str) -> Path:
+    return work_dir / f"shard-{shard.index:05d}{suffix}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _acquire(lock: Path, timeout: float) -> bool:
+    owner = {"host": socket.gethostname(), "pid": os.getpid()}
+    for _ in range(2):
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                held = json.loads(lock.read_text() or "{}")
+                age = time.time() - lock.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                held, age = {}, 0.0
+            # A holder on this host can be checked directly; elsewhere only
+            # the lock's age tells a dead worker from a slow one. Two workers
+            # breaking the same stale lock at once at worst score the shard
+            # twice; both write the same bytes through a rename.
+            dead = held.get("host") == owner["host"] and not _pid_alive(int(held.get("pid", 0)))
+            if not (dead or age > timeout):
+                return False
+            lock.unlink(missing_ok=True)
+            continue
+        with os.fdopen(fd, "w") as fh:
+            json.dump(owner, fh)
+        return True
+    return False
+
+
+_loaded: LoadedModel | None = None
+_explain = True
+
+
+def _init_worker(version: str, path: str, explain: bool) -> None:
+    # Each worker process loads the pinned version once and reuses it for
+    # every shard it is handed.
+    global _loaded, _explain
+    _loaded = load_version(version, Path(path), warm=False)
+    _explain = explain
+
+
+def score_frame(loaded: LoadedModel, df: pd.DataFrame, explain: bool = True) -> pd.DataFrame:
+    # Same scoring as the app: raw inputs, the version's scorer, then its
+    # calibration map and risk thresholds.
+    missing = [c for c in loaded.feature_names if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing expected feature column: {missing[0]}")
+    X = df[loaded.feature_names]
+    raw = loaded.scorer.predict_proba(X)[:, 1]
+    probability = np.asarray(apply_calibration(raw, loaded.meta.get("calibration")), dtype=float)
+    thresholds = loaded.meta.get("risk_thresholds") or {}
+    confidence = probability * 100.0
+    high, low = float(thresholds.get("high", Condition.high_risk)), float(thresholds.get("low", Condition.low_risk))
+    out = df.copy()
+    out["probability"] = probability
+    out["prediction"] = (probability > 0.5).astype(int)
+    out["risk_level"] = np.where(confidence > high, "high", np.where(confidence >= low, "warn", "safe"))
+    if explain:
+        values = positive_shap(loaded.explainer, X)
+        out["top_feature"] = np.asarray(loaded.feature_names)[np.abs(values).argmax(axis=1)]
+        for j, name in enumerate(loaded.feature_names):
+            out[f"shap_{name}"] = values[:, j]
+    return out
+
+
+def _score_shard(input_path: str, header: bytes, shard: Shard, work_dir: str, lock_timeout: float) -> dict[str, Any]:
+    work = Path(work_dir)
+    done = _shard_path(work, shard, ".done")
+    lock = _shard_path(work, shard, ".lock")
+    if done.exists():
+        return {"shard": shard.index, "status": "skipped"}
+    if not _acquire(lock, lock_timeout):
+        return {"shard": shard.index, "status": "locked"}
+    try:
+        # Another worker may have finished it between the check and the lock.
+        if done.exists():
+            return {"shard": shard.index, "status": "skipped"}
+        start = time.perf_counter()
+        with open(input_path, "rb") as fh:
+            fh.seek(shard.start)
+            body = fh.read(shard.end - shard.start)
+        df = pd.read_csv(io.BytesIO(header + body))
+        scored = score_frame(_loaded, df, _explain)
+        output = _shard_path(work, shard, ".csv")
+        tmp = output.with_suffix(f".{os.getpid()}.tmp")
+        scored.to_csv(tmp, index=False)
+        os.replace(tmp, output)
+        seconds = time.perf_counter() - start
+        # The marker is written last: a shard without one is rescored.
+        marker = {"rows": len(scored), "seconds": seconds, "host": socket.gethostname(), "pid": os.getpid()}
+        tmp = done.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(marker))
+        os.replace(tmp, done)
+        return {"shard": shard.index, "status": "scored", **marker}
+    finally:
+        lock.unlink(missing_ok=True)
+
+
+def _load_plan(work_dir: Path, plan: dict[str, Any]) -> dict[str, Any]:
+    # Every process joining the job must agree on the shard boundaries and
+    # model version; the first one to arrive writes them down.
+    path = work_dir / PLAN_FILENAME
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(plan, indent=2))
+    try:
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    finally:
+        tmp.unlink()
+    existing = json.loads(path.read_text())
+    keys = ("input", "input_bytes", "input_mtime", "shard_bytes", "explain", "models")
+    if any(existing[k] != plan[k] for k in keys):
+        raise ValueError(f"{work_dir} holds a different batch job; remove it or choose another --work-dir")
+    return existing
+
+
+def merge_shards(work_dir: Path, shards: list[Shard], output_path: Path) -> int:
+    # Shard files are concatenated as bytes in input order, keeping only the
+    # first header, so the merged file lines up row for row with the input.
+    tmp = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    rows = 0
+    with tmp.open("wb") as out:
+        for shard in shards:
+            rows += json.loads(_shard_path(work_dir, shard, ".done").read_text())["rows"]
+            with _shard_path(work_dir, shard, ".csv").open("rb") as fh:
+                header = fh.readline()
+                if shard.index == 0:
+                    out.write(header)
+                shutil.copyfileobj(fh, out, 1024 * 1024)
+    os.replace(tmp, output_path)
+    return rows
+
+
+def run_batch(
+    input_path: Path,
+    output_path: Path,
+    base_dir: Path = BASE_DIR,
+    condition: Condition | None = None,
+    work_dir: Path | None = None,
+    workers: int | None = None,
+    shard_bytes: int = SHARD_BYTES,
+    explain: bool = True,
+    lock_timeout: float = LOCK_TIMEOUT,
+    keep_shards: bool = False,
+) -> BatchSummary:
+    input_path, output_path = input_path.resolve(), output_path.resolve()
+    work_dir = work_dir or output_path.with_name(f"{output_path.name}.shards")
+    work_dir.mkdir(parents=True, exist_ok=True)
+    models_dirname = condition.models_dirname if condition is not None else MODELS_DIRNAME
+    resolved = resolve(base_dir, POINTER, models_dirname)
+    if resolved is None:
+        raise FileNotFoundError(f"No model under {base_dir / models_dirname}; run train.py first")
+
+    stat = input_path.stat()
+    header, shards = plan_shards(input_path, shard_bytes)
+    plan = _load_plan(
+        work_dir,
+        {
+            # Names rather than paths, so hosts mounting the shared
+            # directory elsewhere still join the same job.
+            "input": input_path.name,
+            "input_bytes": stat.st_size,
+            "input_mtime": stat.st_mtime_ns,
+            "shard_bytes": shard_bytes,
+            "explain": explain,
+            "models": models_dirname,
+            # Pinned here: a rerun or a second machine scores with the same
+            # version even if CURRENT moves while the job is under way.
+            "version": resolved[0],
+            "shards": len(shards),
+        },
+    )
+    version = plan["version"]
+    version_path = base_dir if version == LEGACY_VERSION else base_dir / models_dirname / version
+
+    start = time.perf_counter()
+    statuses: dict[str, int] = {"scored": 0, "skipped": 0, "locked": 0}
+    pending = [s for s in shards if not _shard_path(work_dir, s, ".done").exists()]
+    statuses["skipped"] = len(shards) - len(pending)
+    if pending:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(version, str(version_path), explain)
+        ) as pool:
+            futures = [
+                pool.submit(_score_shard, str(input_path), header, s, str(work_dir), lock_timeout) for s in pending
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                statuses[result["status"]] += 1
+                if result["status"] == "scored":
+                    print(f"Shard {result['shard']:>5}: {result['rows']} rows in {result['seconds']:.2f}s")
+
+    merged = all(_shard_path(work_dir, s, ".done").exists() for s in shards)
+    rows = merge_shards(work_dir, shards, output_path) if merged else 0
+    if merged and not keep_shards:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return BatchSummary(
+        version=version,
+        shards=len(shards),
+        scored=statuses["scored"],
+        skipped=statuses["skipped"],
+        locked=statuses["locked"],
+        rows=rows,
+        seconds=time.perf_counter() - start,
+        merged=merged,
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Score a CSV with the current model in resumable shards across worker processes."
+    )
+    parser.add_argument("input", type=Path, help="CSV with the model's feature columns.")
+    parser.add_argument("--output", type=Path, required=True, help="Merged scores CSV, one row per input row.")
+    parser.add_argument(
+        "--condition",
+        default=PRIMARY_CONDITION,
+        help="Condition from registry.json (in --model-dir if present) whose CURRENT model scores the file.",
+    )
+    parser.add_argument("--model-dir", type=Path, default=BASE_DIR, help="Directory holding models/ (train.py --output-dir).")
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=None,
+        help="Shard outputs, markers and locks (default: <output>.shards). Share it to spread a job across machines.",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument("--shard-mb", type=float, default=SHARD_BYTES / (1024 * 1024), help="Input bytes per shard.")
+    parser.add_argument("--no-shap", action="store_true", help="Skip the per-feature SHAP columns and top_feature.")
+    parser.add_argument(
+        "--lock-timeout",
+        type=float,
+        default=LOCK_TIMEOUT,
+        help="Seconds after which another host's shard lock is treated as abandoned.",
+    )
+    parser.add_argument(
+        "--keep-shards",
+        action="store_true",
+        help="Keep the work directory after merging; use it when other machines may still be joining the job.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    registry_dir = args.model_dir if (args.model_dir / REGISTRY_FILENAME).exists() else BASE_DIR
+    registry = load_registry(registry_dir)
+    if args.condition not in registry:
+        raise SystemExit(f"Unknown condition '{args.condition}'; registered: {', '.join(sorted(registry))}")
+    summary = run_batch(
+        args.input,
+        args.output,
+        base_dir=args.model_dir,
+        condition=registry[args.condition],
+        work_dir=args.work_dir,
+        workers=args.workers,
+        shard_bytes=int(args.shard_mb * 1024 * 1024),
+        explain=not args.no_shap,
+        lock_timeout=args.lock_timeout,
+        keep_shards=args.keep_shards,
+    )
+    print(json.dumps(asdict(summary), indent=2))
+    if summary.merged:
+        print(f"✅ Scored {summary.rows} rows with {summary.version} into {args.output}")
+    else:
+        print(f"{summary.locked} shard(s) are held by other workers; rerun to merge once they finish")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import argparse
+import random
+import shutil
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from common import SCRATCH_DIR, write_results
+import audit
+import telemetry
+
+FEATURES = [
+    "Pregnancies",
+    "Glucose",
+    "BloodPressure",
+    "SkinThickness",
+    "Insulin",
+    "BMI",
+    "DiabetesPedigreeFunction",
+    "Age",
+]
+
+
+def fake_entry(rng: random.Random, ts: datetime) -> dict:
+    probability = rng.random()
+    return {
+        "ts": ts.isoformat(timespec="milliseconds"),
+        "model_version": "v20260101-000000-abcdef",
+        "inputs": {name: round(rng.uniform(0, 200), 2) for name in FEATURES},
+        "probability": round(probability, 6),
+        "prediction": int(probability > 0.5),
+        "risk_level": "safe" if probability < 0.4 else "warn" if probability < 0.65 else "danger",
+        "top_factors": [{"feature": name, "shap": round(rng.gauss(0, 0.1), 6)} for name in rng.sample(FEATURES, 3)],
+        "timings_ms": {"predict": 12.1, "score": 30.4, "explain": 900.2, "total": 940.0},
+        "deduplicated": False,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Audit log enqueue overhead and multi-month scan throughput.")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--per-day", type=int, default=2_000)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    telemetry.ENABLED = True
+    root = SCRATCH_DIR / "audit"
+    shutil.rmtree(root, ignore_errors=True)
+    rng = random.Random(0)
+    first_day = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    entries = [
+        fake_entry(rng, first_day + timedelta(days=d, seconds=i * 86_400 / args.per_day))
+        for d in range(args.days)
+        for i in range(args.per_day)
+    ]
+
+    writer = audit.AuditWriter(root, max_queue=len(entries) + 1)
+    start = time.perf_counter_ns()
+    for entry in entries:
+        writer.record(entry)
+    enqueue_ns = (time.perf_counter_ns() - start) / len(entries)
+    start = time.perf_counter()
+    writer.close(timeout=600)
+    drain_seconds = time.perf_counter() - start
+
+    segments = audit.segments(root)
+    disk_bytes = sum(p.stat().st_size for p in segments)
+
+    start = time.perf_counter()
+    scanned = sum(1 for _ in audit.scan(root))
+    scan_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frame = audit.load_frame(root, jobs=args.jobs)
+    frame_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    month = sum(1 for _ in audit.scan(root, date(2026, 2, 1), date(2026, 2, 28)))
+    month_seconds = time.perf_counter() - start
+
+    write_results(
+        "audit",
+        {
+            "config": vars(args),
+            "records": len(entries),
+            "record_enqueue_ns": enqueue_ns,
+            "drain_seconds": drain_seconds,
+            "written": telemetry.AUDIT_RECORDS.value(result="written"),
+            "segments": len(segments),
+            "disk_bytes": disk_bytes,
+            "bytes_per_record": disk_bytes / len(entries),
+            "scan": {"records": scanned, "seconds": scan_seconds, "records_per_second": scanned / scan_seconds},
+            "load_frame": {"rows": len(frame), "seconds": frame_seconds, "rows_per_second": len(frame) / frame_seconds},
+            "one_month_scan": {"records": month, "seconds": month_seconds},
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import socket
+
+import pandas as pd
+
+from common import DATA_PATH, SCRATCH_DIR, enlarge_csv, import_app, write_results
+from batch import SHARD_BYTES, run_batch
+
+
+def shard_seconds(work_dir) -> float:
+    return sum(json.loads(p.read_text())["seconds"] for p in work_dir.glob("shard-*.done"))
+
+
+def check_app_parity(app, output) -> int:
+    # The merged file carries the same probability and top feature the app
+    # shows for each row.
+    scored = pd.read_csv(output)
+    active = app.load_active_model()
+    rows = scored.sample(25, random_state=0)
+    for _, row in rows.iterrows():
+        patient = {c: float(row[c]) for c in active.feature_names}
+        result = app.score_patient(active.scorer, active.explainer, active.feature_names, active.meta, patient)
+        if abs(result["confidence"] / 100 - row["probability"]) > 1e-9 or result["top_feature"] != row["top_feature"]:
+            raise SystemExit(f"row {row.name} differs from the app: {result['confidence']} vs {row['probability']}")
+    return len(rows)
+
+
+def check_resume(source, output, shard_bytes: int, explain: bool) -> dict[str, object]:
+    # Simulates a crash: three shards lose their markers, one of them is left
+    # locked by a dead process on this host. Only those three are rescored
+    # and the merged file is byte-identical.
+    work = SCRATCH_DIR / "batch-resume.shards"
+    shutil.rmtree(work, ignore_errors=True)
+    first = run_batch(source, output, work_dir=work, workers=1, shard_bytes=shard_bytes, explain=explain, keep_shards=True)
+    expected = output.read_bytes()
+    output.unlink()
+    markers = sorted(work.glob("shard-*.done"))
+    lost = [markers[0], markers[len(markers) // 2], markers[-1]]
+    for marker in lost:
+        marker.unlink()
+    dead_pid = 2**22 + 1
+    lost[1].with_suffix(".lock").write_text(json.dumps({"host": socket.gethostname(), "pid": dead_pid}))
+    second = run_batch(source, output, work_dir=work, workers=1, shard_bytes=shard_bytes, explain=explain)
+    if second.scored != len(lost) or second.skipped != first.shards - len(lost) or not second.merged:
+        raise SystemExit(f"resume rescored the wrong shards: {second}")
+    if output.read_bytes() != expected:
+        raise SystemExit("resumed output differs from the uninterrupted run")
+    return {"shards": first.shards, "rescored": second.scored, "skipped": second.skipped, "identical": True}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sharded batch scoring throughput by worker count, and resume.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--shard-mb", type=float, default=SHARD_BYTES / (1024 * 1024))
+    parser.add_argument("--shap", action="store_true", help="Include SHAP columns in the throughput runs.")
+    args = parser.parse_args()
+
+    app = import_app()
+    SCRATCH_DIR.mkdir(parents=True, exist_ok=True)
+    source = enlarge_csv(SCRATCH_DIR / f"batch-{args.rows}.csv", rows=args.rows, seed=5)
+    output = SCRATCH_DIR / "batch-scores.csv"
+    shard_bytes = int(args.shard_mb * 1024 * 1024)
+
+    # App parity on the real rows, with SHAP.
+    parity_out = SCRATCH_DIR / "batch-parity.csv"
+    run_batch(DATA_PATH, parity_out, workers=min(2, os.cpu_count() or 1), shard_bytes=16 * 1024)
+    parity = check_app_parity(app, parity_out)
+
+    runs = {}
+    for workers in args.workers:
+        work = SCRATCH_DIR / f"batch-{workers}.shards"
+        shutil.rmtree(work, ignore_errors=True)
+        summary = run_batch(
+            source, output, work_dir=work, workers=workers, shard_bytes=shard_bytes, explain=args.shap, keep_shards=True
+        )
+        busy = shard_seconds(work)
+        shutil.rmtree(work, ignore_errors=True)
+        runs[workers] = {
+            "wall_seconds": summary.seconds,
+            "rows_per_second": summary.rows / summary.seconds,
+            "shards": summary.shards,
+            "shard_seconds": busy,
+        }
+    base = runs[args.workers[0]]
+    # Fraction of the single-worker wall time spent inside shard scoring;
+    # the rest (pool start-up, model load, merge) does not parallelise.
+    parallel = base["shard_seconds"] / base["wall_seconds"]
+    for workers, run in runs.items():
+        run["speedup"] = base["wall_seconds"] / run["wall_seconds"]
+        run["amdahl_bound"] = 1 / ((1 - parallel) + parallel / workers)
+        print(
+            f"workers={workers}: {run['rows_per_second']:,.0f} rows/s, {run['shards']} shards, "
+            f"speedup {run['speedup']:.2f}x (Amdahl bound {run['amdahl_bound']:.2f}x)"
+        )
+    print(f"cores available: {os.cpu_count()}, parallel fraction {parallel:.3f}")
+
+    resume = check_resume(source, output, shard_bytes, explain=False)
+    print(f"resume: {resume}; app parity on {parity} rows")
+    write_results(
+        "batch",
+        {
+            "rows": args.rows,
+            "shard_bytes": shard_bytes,
+            "shap": args.shap,
+            "cpu_count": os.cpu_count(),
+            "parallel_fraction": parallel,
+            "runs": runs,
+            "resume": resume,
+            "app_parity_rows": parity,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics import brier_score_loss
+from sklearn.model_selection import train_test_split
+
+from common import DATA_PATH, write_results
+import train
+from calibration import METHODS, apply_calibration, calibration_arrays
+from engines import ENGINES
+
+
+def reliability(y_true: np.ndarray, prob: np.ndarray, bins: int) -> dict[str, list[float]]:
+    ids = np.clip((prob * bins).astype(int), 0, bins - 1)
+    counts = np.bincount(ids, minlength=bins)
+    filled = counts > 0
+    mean_pred = np.bincount(ids, weights=prob, minlength=bins)[filled] / counts[filled]
+    frac_pos = np.bincount(ids, weights=y_true, minlength=bins)[filled] / counts[filled]
+    return {
+        "mean_predicted": mean_pred.round(4).tolist(),
+        "fraction_positive": frac_pos.round(4).tolist(),
+        "count": counts[filled].tolist(),
+        "ece": float(np.sum(np.abs(frac_pos - mean_pred) * counts[filled]) / counts.sum()),
+        "brier": float(brier_score_loss(y_true, prob)),
+    }
+
+
+def per_row_ns(fn, repeats: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter_ns() - start) / repeats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibration reliability and serving overhead.")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="random_forest")
+    parser.add_argument("--method", choices=METHODS, default="isotonic")
+    parser.add_argument("--bins", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20_000)
+    args = parser.parse_args()
+
+    df = train.load_dataset(DATA_PATH)
+    df = train.impute_zero_as_missing(df, train.compute_medians(df))
+    X = df.drop(columns=[train.TARGET])
+    y = df[train.TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    model = ENGINES[args.engine].build(42).fit(X_train, y_train)
+    table = train.calibrate(model, X_train, y_train, args.method)
+    knots = calibration_arrays(table)
+    raw = model.predict_proba(X_test)[:, 1]
+    calibrated = apply_calibration(raw, knots)
+
+    row = X_test.iloc[[0]]
+    predict_ns = per_row_ns(lambda: model.predict_proba(row), 200)
+    single_ns = per_row_ns(lambda: apply_calibration(0.42, knots), args.repeats)
+    batch = np.random.default_rng(0).random(1_000_000)
+    start = time.perf_counter_ns()
+    apply_calibration(batch, knots)
+    batch_ns = (time.perf_counter_ns() - start) / batch.size
+
+    write_results(
+        "calibration",
+        {
+            "engine": args.engine,
+            "method": args.method,
+            "knots": len(table["x"]),
+            "reliability": {
+                "raw": reliability(y_test.to_numpy(), raw, args.bins),
+                "calibrated": reliability(y_test.to_numpy(), calibrated, args.bins),
+            },
+            "overhead": {
+                "single_row_ns": single_ns,
+                "batch_ns_per_row": batch_ns,
+                "predict_proba_single_row_ns": predict_ns,
+                "fraction_of_predict": single_ns / predict_ns,
+            },
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from common import APP_DIR, DATA_PATH, import_app, latency_stats, write_results
+from charts import gauge_svg, shap_svg
+
+
+def plotly_bundle() -> tuple[int, int]:
+    # Streamlit loads its Plotly chunk the first time a page shows a Plotly
+    # chart; the SVG mode never requests it.
+    import streamlit
+
+    chunks = sorted((Path(streamlit.__file__).parent / "static").rglob("PlotlyChart*.js"))
+    raw = b"".join(p.read_bytes() for p in chunks)
+    return len(raw), len(gzip.compress(raw, 6))
+
+
+def chart_payloads(at, mode: str) -> list[bytes]:
+    # The serialized delta messages the server sends for the two charts.
+    if mode == "plotly":
+        return [el.proto.SerializeToString() for el in at.get("plotly_chart")]
+    return [el.proto.SerializeToString() for el in at.markdown if "class='svg-chart'" in el.value]
+
+
+def run_mode(mode: str, runs: int, timeout: float) -> dict[str, object]:
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["VITALAI_CHARTS"] = mode
+    timings, payloads = [], []
+    for _ in range(runs):
+        at = AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=timeout).run()
+        start = time.perf_counter()
+        at.button[0].click().run()
+        timings.append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise SystemExit(f"{mode}: {at.exception[0].value}")
+        payloads = chart_payloads(at, mode)
+        # A rerun after the analysis redraws the stored result, as every
+        # widget change does in the browser.
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    if len(payloads) != 2:
+        raise SystemExit(f"{mode}: expected 2 chart elements, found {len(payloads)}")
+    body = b"".join(payloads)
+    timings.sort()
+    return {
+        "charts": len(payloads),
+        "payload_bytes": len(body),
+        "payload_gzip_bytes": len(gzip.compress(body, 6)),
+        "script_run_p50_ms": timings[len(timings) // 2],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chart payload bytes and build time, Plotly vs server-side SVG.")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=5, help="AppTest analyses per mode.")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    app = import_app()
+    active = app.load_active_model()
+    patient = {c: float(v) for c, v in pd.read_csv(DATA_PATH).drop(columns=["Outcome"]).iloc[0].items()}
+    results = app.run_analysis(active.model, active.explainer, active.feature_names, active.meta, patient)
+
+    def build_plotly() -> None:
+        app.build_gauge_figure(results).to_json()
+        app.build_shap_figure(results).to_json()
+
+    def build_svg_cold() -> None:
+        gauge_svg.cache_clear()
+        shap_svg.cache_clear()
+        app.build_chart_svgs(results)
+
+    build = {
+        "plotly_build_json": latency_stats(build_plotly, args.repeats),
+        "svg_build_cold": latency_stats(build_svg_cold, args.repeats),
+        "svg_build_cached": latency_stats(lambda: app.build_chart_svgs(results), args.repeats),
+    }
+    modes = {mode: run_mode(mode, args.runs, args.timeout) for mode in ("plotly", "svg")}
+    bundle_raw, bundle_gzip = plotly_bundle()
+    modes["plotly"]["first_load_extra_bytes"] = bundle_raw
+    modes["plotly"]["first_load_extra_gzip_bytes"] = bundle_gzip
+    modes["svg"]["first_load_extra_bytes"] = modes["svg"]["first_load_extra_gzip_bytes"] = 0
+
+    plotly, svg = modes["plotly"], modes["svg"]
+    print(
+        f"per result: plotly {plotly['payload_bytes']} B ({plotly['payload_gzip_bytes']} gz) vs "
+        f"svg {svg['payload_bytes']} B ({svg['payload_gzip_bytes']} gz), "
+        f"{plotly['payload_bytes'] / svg['payload_bytes']:.1f}x smaller"
+    )
+    print(f"first load: plotly chunk {bundle_raw} B ({bundle_gzip} gz) vs none")
+    print(
+        f"build p50: plotly+json {build['plotly_build_json']['p50_ms']:.2f} ms, "
+        f"svg cold {build['svg_build_cold']['p50_ms']:.3f} ms, cached {build['svg_build_cached']['p50_ms']:.4f} ms"
+    )
+    print(f"script run p50: plotly {plotly['script_run_p50_ms']:.1f} ms, svg {svg['script_run_p50_ms']:.1f} ms")
+    write_results("charts", {"build": build, "modes": modes})
+
+
+if __name__ == "__main__":
+    main()
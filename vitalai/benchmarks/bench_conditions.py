@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from common import APP_DIR, DATA_PATH, SCRATCH_DIR, import_app, latency_stats, write_results
+from artifacts import ModelStore
+from registry import DIABETES, PRIMARY_CONDITION, load_registry
+
+# Synthetic secondary conditions derived from diabetes.csv: each label comes
+# from a column the model is not given, so scoring does real work.
+SYNTHETIC = {
+    "hypertension": ("BloodPressure", 85),
+    "hyperglycemia": ("Glucose", 140),
+}
+
+
+def build_registry(base_dir) -> None:
+    df = pd.read_csv(DATA_PATH)
+    conditions = {
+        PRIMARY_CONDITION: {
+            "label": DIABETES.label,
+            "data": str(DATA_PATH),
+            "target": DIABETES.target,
+            "features": list(DIABETES.features),
+            "zero_as_missing": list(DIABETES.zero_as_missing),
+            "models_dir": DIABETES.models_dir,
+        }
+    }
+    for name, (column, cutoff) in SYNTHETIC.items():
+        features = [c for c in DIABETES.features if c != column]
+        frame = df[features].copy()
+        frame["Label"] = (df[column] >= cutoff).astype(int)
+        frame.to_csv(base_dir / f"{name}.csv", index=False)
+        conditions[name] = {
+            "data": f"{name}.csv",
+            "target": "Label",
+            "features": features,
+            "zero_as_missing": [c for c in DIABETES.zero_as_missing if c in features],
+            "high_risk": 60.0,
+            "low_risk": 30.0,
+        }
+    (base_dir / "registry.json").write_text(json.dumps({"conditions": conditions}, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-patient scoring latency across registered conditions.")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--engine", default="random_forest")
+    args = parser.parse_args()
+
+    base_dir = SCRATCH_DIR / "conditions"
+    shutil.rmtree(base_dir, ignore_errors=True)
+    base_dir.mkdir(parents=True)
+    build_registry(base_dir)
+    for name in load_registry(base_dir):
+        subprocess.run(
+            [sys.executable, str(APP_DIR / "train.py"), "--condition", name, "--output-dir", str(base_dir),
+             "--engine", args.engine, "--calibration", "none"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    app = import_app()
+    loaded = {
+        name: ModelStore(base_dir, models_dirname=condition.models_dirname).active()
+        for name, condition in load_registry(base_dir).items()
+    }
+    primary = loaded.pop(PRIMARY_CONDITION)
+    patient = {col: float(v) for col, v in pd.read_csv(DATA_PATH).iloc[0].items() if col != DIABETES.target}
+    pool = ThreadPoolExecutor(max_workers=len(loaded))
+
+    def serial() -> None:
+        app.score_condition(primary, patient, None)
+        for other in loaded.values():
+            app.score_condition(other, patient, None)
+
+    def parallel() -> None:
+        futures = [pool.submit(app.score_condition, other, patient, None) for other in loaded.values()]
+        app.score_condition(primary, patient, None)
+        for future in futures:
+            future.result()
+
+    per_model = {
+        name: latency_stats(lambda m=model: app.score_condition(m, patient, None), args.repeats)
+        for name, model in {PRIMARY_CONDITION: primary, **loaded}.items()
+    }
+    modes = {"serial": latency_stats(serial, args.repeats), "parallel": latency_stats(parallel, args.repeats)}
+
+    results = app.run_analysis(
+        primary.model, primary.explainer, primary.feature_names, primary.meta, patient, others=loaded, pool=pool
+    )
+    pool.shutdown()
+    slowest = max(stats["p50_ms"] for stats in per_model.values())
+    total = sum(stats["p50_ms"] for stats in per_model.values())
+    print("per-model p50:", ", ".join(f"{name}={stats['p50_ms']:.1f}ms" for name, stats in per_model.items()))
+    print(f"serial p50={modes['serial']['p50_ms']:.1f}ms parallel p50={modes['parallel']['p50_ms']:.1f}ms "
+          f"(slowest model {slowest:.1f}ms, sum {total:.1f}ms)")
+    print("cards:", [(c["condition"], round(c["confidence"], 1), c["risk_level"]) for c in results["conditions"]])
+    write_results(
+        "conditions",
+        {
+            "engine": args.engine,
+            "conditions": [PRIMARY_CONDITION, *loaded],
+            "per_model": per_model,
+            "modes": modes,
+            "slowest_model_p50_ms": slowest,
+            "sum_of_models_p50_ms": total,
+            "cards": results["conditions"],
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
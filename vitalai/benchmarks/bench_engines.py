@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import argparse
+import pickle
+import statistics
+import time
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from common import DATA_PATH, write_results
+import train
+from engines import ENGINES
+
+
+def single_row_latency_ms(model, row, repeats: int) -> dict[str, float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p95": timings[int(0.95 * (len(timings) - 1))],
+    }
+
+
+def batch_throughput(model, X, batch_rows: int) -> float:
+    reps = int(np.ceil(batch_rows / len(X)))
+    batch = X.iloc[np.tile(np.arange(len(X)), reps)[:batch_rows]]
+    start = time.perf_counter()
+    model.predict_proba(batch)
+    return batch_rows / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare model engines on diabetes.csv.")
+    parser.add_argument("--engines", nargs="+", default=sorted(ENGINES), choices=sorted(ENGINES))
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--batch-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = train.load_dataset(DATA_PATH)
+    df = train.impute_zero_as_missing(df, train.compute_medians(df))
+    X = df.drop(columns=[train.TARGET])
+    y = df[train.TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    results = {}
+    for name in args.engines:
+        engine = ENGINES[name]
+        model = engine.build(42)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        results[name] = {
+            "fit_seconds": fit_seconds,
+            "single_row_ms": single_row_latency_ms(model, X_test.iloc[[0]], args.repeats),
+            "batch_rows_per_second": batch_throughput(model, X_test, args.batch_rows),
+            "model_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+            "auc": roc_auc_score(y_test, model.predict_proba(X_test)[:, 1]),
+            "size": engine.size(model),
+        }
+
+    write_results("engines", {"engines": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import time
+
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from common import DATA_PATH, SCRATCH_DIR, enlarge_csv, write_results
+import train
+from engines import ENGINES
+from incremental import UPDATE_MODES, UpdateState, apply_update
+from registry import DIABETES
+
+FEATURES = list(DIABETES.features)
+
+
+def auc(model, test: pd.DataFrame) -> float:
+    return float(roc_auc_score(test[DIABETES.target], model.predict_proba(test[FEATURES])[:, 1]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental forest updates vs full retrains as the data grows.")
+    parser.add_argument("--batches", type=int, default=5)
+    parser.add_argument("--batch-rows", type=int, default=2000)
+    parser.add_argument("--trees", type=int, default=20, help="Trees fitted per incremental update.")
+    args = parser.parse_args()
+
+    # A fixed test split of the real rows; new outcomes are jittered copies
+    # of the training rows only, so no test patient leaks into any batch.
+    raw = pd.read_csv(DATA_PATH)
+    base, test = train_test_split(raw, test_size=0.2, random_state=7, stratify=raw[DIABETES.target])
+    base = base.reset_index(drop=True)
+    source = SCRATCH_DIR / "incremental-base.csv"
+    source.parent.mkdir(parents=True, exist_ok=True)
+    base.to_csv(source, index=False)
+    stream = pd.read_csv(enlarge_csv(SCRATCH_DIR / "incremental-stream.csv", rows=args.batches * args.batch_rows,
+                                     seed=11, source=source))
+    test = train.impute_zero_as_missing(test, train.compute_medians(base))
+
+    # Step 0: the usual training run on the base rows.
+    model = ENGINES["random_forest"].build(42)
+    imputed = train.impute_zero_as_missing(base, train.compute_medians(base))
+    model.fit(imputed[FEATURES], imputed[DIABETES.target])
+    train_index, test_index = train_test_split(base.index, test_size=0.2, random_state=42, stratify=base[DIABETES.target])
+    initial = UpdateState.initial(base, DIABETES, train_index, test_index, len(model.estimators_))
+    models = {mode: copy.deepcopy(model) for mode in UPDATE_MODES}
+    states = {mode: copy.deepcopy(initial) for mode in UPDATE_MODES}
+
+    steps = [{"rows": len(base), "full": {"seconds": None, "auc": auc(model, test)}}]
+    seen = base
+    for b in range(args.batches):
+        batch = stream.iloc[b * args.batch_rows : (b + 1) * args.batch_rows].reset_index(drop=True)
+        seen = pd.concat([seen, batch], ignore_index=True)
+        step = {"rows": len(seen)}
+
+        start = time.perf_counter()
+        full = ENGINES["random_forest"].build(42)
+        imputed = train.impute_zero_as_missing(seen, train.compute_medians(seen))
+        full.fit(imputed[FEATURES], imputed[DIABETES.target])
+        step["full"] = {"seconds": time.perf_counter() - start, "auc": auc(full, test), "trees": 200}
+
+        for mode in UPDATE_MODES:
+            start = time.perf_counter()
+            result = apply_update(models[mode], states[mode], batch, mode=mode, n_trees=args.trees)
+            elapsed = time.perf_counter() - start
+            step[mode] = {"seconds": elapsed, "auc": auc(result.model, test), "trees": len(result.model.estimators_)}
+        steps.append(step)
+        print(
+            f"rows={step['rows']:>6} full {step['full']['seconds']:6.2f}s auc={step['full']['auc']:.4f} | "
+            + " | ".join(
+                f"{mode} {step[mode]['seconds']:5.2f}s auc={step[mode]['auc']:.4f} trees={step[mode]['trees']}"
+                for mode in UPDATE_MODES
+            )
+        )
+
+    write_results(
+        "incremental",
+        {
+            "batches": args.batches,
+            "batch_rows": args.batch_rows,
+            "trees_per_update": args.trees,
+            "test_rows": len(test),
+            "steps": steps,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
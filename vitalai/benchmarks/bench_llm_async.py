@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+
+from common import write_results
+from stub_gemini_server import StubGeminiServer
+import telemetry
+from llm_async import GeminiClient, explain_many_async
+
+
+def label_total(counter: telemetry.Counter, reason: str | None = None) -> int:
+    return int(sum(v for key, v in counter.samples().items() if reason is None or ("reason", reason) in key))
+
+
+async def run_level(args: argparse.Namespace, concurrency: int) -> dict[str, object]:
+    server = StubGeminiServer(
+        latency_s=args.latency,
+        jitter_s=args.latency / 3,
+        error_rate=args.error_rate,
+        quota_rps=args.quota_rps,
+        seed=concurrency,
+    )
+    base_url = await server.start()
+    client = GeminiClient("stub-key", base_url=base_url, pool_size=concurrency)
+    jobs = [(f"Explain the screening result for patient {i}.", f"fallback {i}") for i in range(args.rows)]
+    retries, fallbacks = label_total(telemetry.LLM_RETRIES), label_total(telemetry.LLM_FALLBACKS)
+
+    start = time.perf_counter()
+    results = await explain_many_async(
+        jobs,
+        client,
+        concurrency=concurrency,
+        rate=args.rate,
+        max_attempts=args.max_attempts,
+        base_delay=args.base_delay,
+    )
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    await server.stop()
+
+    served = sum(not text.startswith("fallback") for text in results)
+    return {
+        "concurrency": concurrency,
+        "rows": args.rows,
+        "elapsed_s": elapsed,
+        "rows_per_s": args.rows / elapsed,
+        "served_by_llm": served,
+        "fallbacks": label_total(telemetry.LLM_FALLBACKS) - fallbacks,
+        "retries": label_total(telemetry.LLM_RETRIES) - retries,
+        "server_requests": server.requests,
+        "server_429": server.rejected,
+        "connections_opened": client.connections_opened,
+        "sequential_estimate_s": args.rows * args.latency,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk explanation throughput against a local stub Gemini server.")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--rate", type=float, default=180.0, help="Client token-bucket rate (requests/s).")
+    parser.add_argument("--quota-rps", type=float, default=200.0, help="Server-side quota before 429s.")
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of requests answered 429 anyway.")
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--base-delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    levels = [asyncio.run(run_level(args, c)) for c in args.concurrency]
+    for level in levels:
+        print(
+            f"concurrency={level['concurrency']:>3}: {level['rows_per_s']:.1f} rows/s, "
+            f"{level['served_by_llm']}/{level['rows']} from LLM, retries={level['retries']}, "
+            f"429s={level['server_429']}, connections={level['connections_opened']}"
+        )
+    write_results("llm_async", {"config": vars(args), "levels": levels})
+    # Every row must get text, and with retries almost none should fall back.
+    if any(level["fallbacks"] > level["rows"] * 0.01 for level in levels):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
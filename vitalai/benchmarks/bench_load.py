@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import argparse
+import random
+import resource
+import statistics
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from common import APP_DIR, import_app, write_results
+import llm
+
+# (key, low, high, step) for every slider rendered by app.main().
+SLIDERS = [
+    ("pregnancies", 0, 17, 1),
+    ("glucose", 44, 199, 1),
+    ("blood_pressure", 24, 122, 1),
+    ("skin_thickness", 7, 99, 1),
+    ("insulin", 14, 846, 1),
+    ("bmi", 18.0, 67.0, 0.1),
+    ("dpf", 0.08, 2.42, 0.01),
+    ("age", 21, 81, 1),
+]
+
+
+class StubResponse:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class StubGemini:
+    # Sleeping releases the GIL the same way a blocking HTTPS call would.
+    def __init__(self, latency_ms: float, jitter_ms: float, seed: int) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def generate_content(self, prompt: str) -> StubResponse:
+        with self.lock:
+            self.calls += 1
+            delay = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms))
+        time.sleep(delay / 1000)
+        return StubResponse(f"Stub explanation for a {len(prompt)}-character prompt.")
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def random_value(rng: random.Random, low: float, high: float, step: float) -> float:
+    steps = int(round((high - low) / step))
+    value = low + rng.randint(0, steps) * step
+    return int(value) if isinstance(step, int) else round(value, 2)
+
+
+@dataclass
+class SessionStats:
+    analyses: list[float] = field(default_factory=list)
+    reruns: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+def run_session(
+    session_id: int, deadline: float, slider_moves: int, think_ms: float, timeout: float, stats: SessionStats
+) -> None:
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(session_id)
+    at = AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=timeout)
+    at.run()
+    while time.perf_counter() < deadline:
+        try:
+            # Each slider change is a full script rerun, as in the browser.
+            for key, low, high, step in rng.sample(SLIDERS, slider_moves):
+                start = time.perf_counter()
+                at.slider(key=key).set_value(random_value(rng, low, high, step)).run()
+                stats.reruns.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            at.button[0].click().run()
+            elapsed = (time.perf_counter() - start) * 1000
+            if at.exception or "ran_analysis" not in at.session_state:
+                stats.errors += 1
+            else:
+                stats.analyses.append(elapsed)
+        except Exception:
+            stats.errors += 1
+        if think_ms:
+            time.sleep(rng.uniform(0, 2 * think_ms) / 1000)
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pct(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": ordered[-1],
+    }
+
+
+def run_level(concurrency: int, args: argparse.Namespace, stub: StubGemini) -> dict[str, Any]:
+    calls_before = stub.calls
+    sessions = [SessionStats() for _ in range(concurrency)]
+    rss_samples: list[float] = []
+    stop = threading.Event()
+
+    def sample_rss() -> None:
+        while not stop.wait(0.25):
+            rss_samples.append(current_rss_mb())
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(
+            target=run_session,
+            args=(concurrency * 1000 + i, deadline, args.slider_moves, args.think_ms, args.timeout, sessions[i]),
+            name=f"load-session-{i}",
+        )
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+
+    analyses = [ms for s in sessions for ms in s.analyses]
+    return {
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "analyses_per_second": len(analyses) / wall,
+        # Below the analysis count when identical in-flight profiles coalesce.
+        "llm_calls": stub.calls - calls_before,
+        "errors": sum(s.errors for s in sessions),
+        "analysis_latency": percentiles(analyses),
+        "slider_rerun_latency": percentiles([ms for s in sessions for ms in s.reruns]),
+        "rss_mb": {
+            "mean": statistics.fmean(rss_samples) if rss_samples else current_rss_mb(),
+            "max": max(rss_samples, default=current_rss_mb()),
+            "process_peak": peak_rss_mb(),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Drive app.py with concurrent simulated sessions (Streamlit AppTest, stubbed Gemini)."
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level.")
+    parser.add_argument(
+        "--slider-moves",
+        type=int,
+        default=2,
+        help="Slider reruns before each analysis; 0 submits the default profile every time.",
+    )
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between analyses per session.")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--p95-budget-ms", type=float, default=None, help="Report the largest level within budget.")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    import_app()
+    from streamlit import config
+
+    # AppTest recompiles app.py on every run, and the magic pass goes through
+    # ast.parse, which is not thread-safe on CPython 3.11. app.py relies on no
+    # magic output, so turning it off keeps rendering identical.
+    config.set_option("runner.magicEnabled", False)
+    stub = StubGemini(args.llm_latency_ms, args.llm_jitter_ms, seed=0)
+    # app.py resolves the client through llm.get_gemini_model() on every
+    # analysis, so pre-resolving it swaps Gemini out for every session.
+    llm._client, llm._resolved = stub, True
+
+    # One untimed analysis loads the model and explainer into the shared
+    # st.cache_resource so level 1 does not absorb the cold start.
+    from streamlit.testing.v1 import AppTest
+
+    AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=args.timeout).run().button[0].click().run()
+    stub.calls = 0
+
+    baseline_rss = current_rss_mb()
+    levels = []
+    for concurrency in args.concurrency:
+        level = run_level(concurrency, args, stub)
+        levels.append(level)
+        print(
+            f"concurrency={concurrency:>3} analyses/s={level['analyses_per_second']:.2f} "
+            f"p50={level['analysis_latency'].get('p50_ms', float('nan')):.0f}ms "
+            f"p95={level['analysis_latency'].get('p95_ms', float('nan')):.0f}ms "
+            f"llm_calls={level['llm_calls']} rss={level['rss_mb']['max']:.0f}MB errors={level['errors']}",
+            flush=True,
+        )
+
+    payload: dict[str, Any] = {
+        "config": vars(args),
+        "baseline_rss_mb": baseline_rss,
+        "llm_calls": stub.calls,
+        "levels": levels,
+    }
+    if args.p95_budget_ms is not None:
+        within = [
+            lvl["concurrency"]
+            for lvl in levels
+            if lvl["errors"] == 0 and lvl["analysis_latency"].get("p95_ms", float("inf")) <= args.p95_budget_ms
+        ]
+        payload["max_sessions_within_budget"] = max(within, default=0)
+    write_results("load", payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from common import APP_DIR, DATA_PATH, SCRATCH_DIR, import_app, latency_stats, write_results
+
+
+def check_app(directory, timeout: float) -> dict[str, object]:
+    # One click through the real app with VITALAI_PROFILE=1: both files are
+    # written and the flame graph reaches into the model code.
+    from streamlit.testing.v1 import AppTest
+
+    import profiling
+
+    # VITALAI_PROFILE is read when profiling is first imported, which in
+    # this process was already done by import_app().
+    profiling.ALWAYS = True
+    os.environ["VITALAI_PROFILE_DIR"] = str(directory)
+    try:
+        at = AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=timeout).run()
+        at.button[0].click().run()
+    finally:
+        profiling.ALWAYS = False
+        del os.environ["VITALAI_PROFILE_DIR"]
+    if at.exception:
+        raise SystemExit(at.exception[0].value)
+    folded = sorted(directory.glob("*.folded"))
+    allocations = sorted(directory.glob("*.alloc.txt"))
+    if len(folded) != 1 or len(allocations) != 1:
+        raise SystemExit(f"expected one profile, found {[p.name for p in directory.iterdir()]}")
+    stacks = folded[0].read_text()
+    if "run_analysis (vitalai/app.py" not in stacks:
+        raise SystemExit("run_analysis missing from the collapsed stacks")
+    return {
+        "folded_bytes": folded[0].stat().st_size,
+        "folded_stacks": stacks.count("\n"),
+        "alloc_report_bytes": allocations[0].stat().st_size,
+        "caption": any("Profile saved" in el.value for el in at.caption),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cost of the profiling hook, disabled and enabled.")
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    app = import_app()
+    import profiling
+
+    directory = SCRATCH_DIR / "profiles"
+    shutil.rmtree(directory, ignore_errors=True)
+
+    # Disabled: what the click path pays with profiling off.
+    loops = 1_000_000
+    start = time.perf_counter()
+    for _ in range(loops):
+        with profiling.capture(directory, "analysis", False):
+            pass
+    disabled_ns = (time.perf_counter() - start) / loops * 1e9
+    start = time.perf_counter()
+    for _ in range(loops):
+        pass
+    disabled_ns -= (time.perf_counter() - start) / loops * 1e9
+
+    active = app.load_active_model()
+    patients = pd.read_csv(DATA_PATH).drop(columns=["Outcome"]).astype(float)
+    rows = iter(patients.sample(frac=1.0, random_state=0).to_dict("records") * 10)
+
+    def analyse() -> None:
+        app.run_analysis(
+            active.scorer, active.explainer, active.feature_names, active.meta, next(rows), forest=active.model
+        )
+
+    def profiled() -> None:
+        with profiling.capture(directory / "enabled", "analysis", True):
+            analyse()
+
+    analyse()
+    plain = latency_stats(analyse, args.repeats)
+    enabled = latency_stats(profiled, args.repeats)
+    frames = profiling.TRACE_FRAMES
+    profiling.TRACE_FRAMES = 0
+    sampled_only = latency_stats(profiled, args.repeats)
+    profiling.TRACE_FRAMES = frames
+    shutil.rmtree(directory / "enabled", ignore_errors=True)
+    app_check = check_app(directory / "app", args.timeout)
+
+    print(f"disabled: {disabled_ns:.0f} ns per click over a bare loop")
+    print(
+        f"analysis p50: plain {plain['p50_ms']:.1f} ms, profiled {enabled['p50_ms']:.1f} ms "
+        f"(+{enabled['p50_ms'] - plain['p50_ms']:.1f} ms incl. writing the files), "
+        f"stacks only {sampled_only['p50_ms']:.1f} ms"
+    )
+    print(f"app click: {app_check}")
+    write_results(
+        "profiling",
+        {"disabled_overhead_ns": disabled_ns, "analysis": plain, "analysis_profiled": enabled,
+         "analysis_stacks_only": sampled_only, "trace_frames": frames, "app": app_check},
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import argparse
+import pickle
+import sys
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from common import SCRATCH_DIR, enlarge_csv, latency_stats, write_results
+import train
+from calibration import calibration_arrays
+from counterfactual import find_counterfactual
+from engines import ENGINES
+import quantize
+from quantize import QuantizedForest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Size and scoring speed of the quantized forest export.")
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows in the batch scoring set.")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    df = train.load_dataset(train.BASE_DIR / train.DIABETES.data)
+    df = train.impute_zero_as_missing(df, train.compute_medians(df))
+    X = df.drop(columns=[train.TARGET])
+    model = ENGINES["random_forest"].build(42).fit(X, df[train.TARGET])
+    quantized = QuantizedForest.from_model(model)
+
+    export = SCRATCH_DIR / quantize.QUANTIZED_FILENAME
+    export.parent.mkdir(parents=True, exist_ok=True)
+    quantized.save(export)
+    assert np.array_equal(QuantizedForest.load(export).left, quantized.left)
+    sizes = {
+        "model_pickle_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        "quantized_bytes": quantized.nbytes,
+        "quantized_npz_bytes": export.stat().st_size,
+        "nodes": len(quantized.feature),
+        "bin_dtype": np.dtype(quantized.bin_dtype).name,
+        "feature_dtype": quantized.feature.dtype.name,
+    }
+
+    # Distinct jittered rows, so the batch is not just repeats of the CSV.
+    batch_path = enlarge_csv(SCRATCH_DIR / f"quantize-{args.rows}.csv", rows=args.rows)
+    batch = pd.read_csv(batch_path)
+    batch = train.impute_zero_as_missing(batch, train.compute_medians(batch))[list(X.columns)]
+    expected = model.predict_proba(batch)
+    actual = quantized.predict_proba(batch)
+    label_mismatches = int(np.sum(expected.argmax(axis=1) != actual.argmax(axis=1)))
+    max_abs_diff = float(np.abs(expected - actual).max())
+
+    row = X.iloc[[0]]
+    single = {
+        "float": latency_stats(lambda: model.predict_proba(row), args.repeats),
+        "quantized": latency_stats(lambda: quantized.predict_proba(row), args.repeats),
+    }
+    repeats = max(3, args.repeats // 40)
+    batched = {
+        "float": latency_stats(lambda: model.predict_proba(batch), repeats),
+        "quantized": latency_stats(lambda: quantized.predict_proba(batch), repeats),
+    }
+    with mock.patch.object(quantize, "_kernel", lambda: None):
+        batched["quantized_numpy"] = latency_stats(lambda: quantized.predict_proba(batch.head(2000)), repeats)
+        batched["quantized_numpy"]["rows"] = 2000
+
+    # The counterfactual search is the app's batch caller.
+    patient = {col: float(v) for col, v in X.iloc[int(np.argmax(expected[: len(X), 1]))].items()}
+    bounds = {"Glucose": (44, 199, 1), "BMI": (18.0, 67.0, 0.1), "BloodPressure": (24, 122, 1)}
+    calibration = calibration_arrays(None)
+    search = {
+        name: latency_stats(
+            lambda s=scorer: find_counterfactual(s, list(X.columns), patient, bounds, calibration, 0.4, forest=model),
+            10,
+            warmup=1,
+        )
+        for name, scorer in (("float", model), ("quantized", quantized))
+    }
+
+    speedup = lambda stats: stats["float"]["p50_ms"] / stats["quantized"]["p50_ms"]
+    print(
+        f"size: pickle {sizes['model_pickle_bytes']} B -> arrays {sizes['quantized_bytes']} B "
+        f"({sizes['model_pickle_bytes'] / sizes['quantized_bytes']:.1f}x), npz {sizes['quantized_npz_bytes']} B"
+    )
+    print(f"single row p50: {single['float']['p50_ms']:.3f} -> {single['quantized']['p50_ms']:.3f} ms "
+          f"({speedup(single):.0f}x)")
+    print(f"batch of {len(batch)} p50: {batched['float']['p50_ms']:.1f} -> {batched['quantized']['p50_ms']:.1f} ms "
+          f"({speedup(batched):.2f}x)")
+    print(f"counterfactual p50: {search['float']['p50_ms']:.1f} -> {search['quantized']['p50_ms']:.1f} ms "
+          f"({speedup(search):.1f}x)")
+    print(f"label mismatches {label_mismatches}/{len(batch)}, max |dp| {max_abs_diff:.2e}")
+    write_results(
+        "quantize",
+        {
+            **sizes,
+            "batch_rows": len(batch),
+            "label_mismatches": label_mismatches,
+            "max_abs_diff": max_abs_diff,
+            "single_row": single,
+            "batch": batched,
+            "counterfactual": search,
+        },
+    )
+    if label_mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
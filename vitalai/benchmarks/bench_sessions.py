@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import gc
+import tracemalloc
+
+import pandas as pd
+
+from common import DATA_PATH, import_app, write_results
+from sessions import CompactResult, SessionResults
+
+
+def held_bytes(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, held
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory held per session result, raw dict vs compact store.")
+    parser.add_argument("--sessions", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = import_app()
+    active = app.load_active_model()
+    rows = pd.read_csv(DATA_PATH).drop(columns=["Outcome"]).head(50)
+    samples = [
+        app.run_analysis(active.model, active.explainer, active.feature_names, active.meta, row.to_dict())
+        for _, row in rows.iterrows()
+    ]
+
+    # Each session holds its own copy, as st.session_state did.
+    raw, _ = held_bytes(lambda: [copy.deepcopy(samples[i % len(samples)]) for i in range(args.sessions)])
+
+    def fill() -> SessionResults:
+        store = SessionResults(max_sessions=args.sessions)
+        for i in range(args.sessions):
+            store.put(f"session-{i}", samples[i % len(samples)])
+        return store
+
+    compact, store = held_bytes(fill)
+    stats = store.stats()
+    expanded = store.get("session-0")
+    assert [r["feature"] for r in expanded["shap_records"]] == [r["feature"] for r in samples[0]["shap_records"]]
+    assert expanded["explanation"] == samples[0]["explanation"]
+
+    print(
+        f"{args.sessions} sessions: raw dicts {raw / args.sessions:.0f} B/session, "
+        f"compact {compact / args.sessions:.0f} B/session ({raw / compact:.1f}x smaller); "
+        f"store estimate {stats['mean_bytes']:.0f} B/session"
+    )
+    write_results(
+        "sessions",
+        {
+            "sessions": args.sessions,
+            "raw_bytes_per_session": raw / args.sessions,
+            "compact_bytes_per_session": compact / args.sessions,
+            "reduction": raw / compact,
+            "store_stats": stats,
+            "compact_fields": list(CompactResult.__slots__),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from common import APP_DIR, write_results
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = (time.perf_counter() - start) * 1000
+loaded = [name for name in app.HEAVY_MODULES if name in sys.modules]
+print(json.dumps({"import_ms": elapsed, "loaded_heavy_modules": loaded}))
+"""
+
+STREAMLIT_PROBE = """
+import json, sys
+import streamlit
+print(json.dumps({"modules": sorted(sys.modules)}))
+"""
+
+FIRST_RUN_PROBE = """
+import json, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+start = time.perf_counter()
+at.run()
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"first_run_ms": elapsed, "sliders": len(at.slider), "exception": bool(at.exception)}}))
+"""
+
+
+def run_probe(code: str, env: dict[str, str], importtime: bool = False) -> tuple[dict, str]:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(cmd, cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def top_imports(stderr: str, limit: int) -> list[dict[str, float]]:
+    # Top-level entries of -X importtime have exactly two spaces of nesting
+    # under the probed module; their cumulative column is what `import app`
+    # pays synchronously for each dependency.
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("   ") and not name.startswith("    "):
+            rows.append({"module": name.strip(), "cumulative_ms": int(cumulative) / 1000})
+    return sorted(rows, key=lambda r: -r["cumulative_ms"])[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start budget for app.py.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Median `import app` wall time budget.")
+    parser.add_argument("--first-run-budget-ms", type=float, default=4000.0, help="Median first script run budget.")
+    args = parser.parse_args()
+
+    env = {**os.environ, "GEMINI_API_KEY": ""}
+    sync_env = {**env, "VITALAI_WARMUP": "0"}
+
+    imports = [run_probe(IMPORT_PROBE, env)[0] for _ in range(args.runs)]
+    _, importtime_log = run_probe(IMPORT_PROBE, sync_env, importtime=True)
+    # Modules Streamlit itself pulls in are not something app.py can defer.
+    streamlit_modules = set(run_probe(STREAMLIT_PROBE, sync_env)[0]["modules"])
+    loaded = run_probe(IMPORT_PROBE, sync_env)[0]["loaded_heavy_modules"]
+    eager = [name for name in loaded if name not in streamlit_modules]
+    first_runs = [
+        run_probe(FIRST_RUN_PROBE.format(app=str(APP_DIR / "app.py")), env)[0] for _ in range(args.runs)
+    ]
+
+    import_ms = statistics.median(r["import_ms"] for r in imports)
+    first_run_ms = statistics.median(r["first_run_ms"] for r in first_runs)
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import app took {import_ms:.0f}ms (budget {args.budget_ms:.0f}ms)")
+    if first_run_ms > args.first_run_budget_ms:
+        failures.append(f"first run took {first_run_ms:.0f}ms (budget {args.first_run_budget_ms:.0f}ms)")
+    if eager:
+        failures.append(f"heavy modules imported eagerly: {', '.join(eager)}")
+    if any(r["exception"] for r in first_runs):
+        failures.append("first run raised an exception")
+
+    write_results(
+        "startup",
+        {
+            "runs": args.runs,
+            "import_ms": {"median": import_ms, "samples": [r["import_ms"] for r in imports]},
+            "first_run_ms": {"median": first_run_ms, "samples": [r["first_run_ms"] for r in first_runs]},
+            "budgets_ms": {"import": args.budget_ms, "first_run": args.first_run_budget_ms},
+            "eager_heavy_modules": eager,
+            "top_sync_imports": top_imports(importtime_log, 10),
+            "failures": failures,
+        },
+    )
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from common import APP_DIR, DATA_PATH, SCRATCH_DIR, enlarge_csv, write_results
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(mode: str, data: Path, memory_cap_mb: float, output_dir: Path) -> None:
+    import train
+
+    start = time.perf_counter()
+    if mode == "stream":
+        train.train_streaming(data, output_dir, None, memory_cap_mb)
+    else:
+        train.train_in_memory(data, output_dir)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"peak_rss_mb": peak_rss_mb(), "seconds": elapsed}))
+
+
+def run_worker(mode: str, data: Path, memory_cap_mb: float, output_dir: Path) -> dict[str, float]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", mode, "--data", str(data), "--memory-cap-mb", str(memory_cap_mb),
+         "--output-dir", str(output_dir)],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Out-of-core training benchmark.")
+    parser.add_argument("--memory-cap-mb", type=float, default=32.0)
+    parser.add_argument("--scale", type=float, default=2.0, help="CSV size as a multiple of the memory cap.")
+    parser.add_argument("--compare-in-memory", action="store_true")
+    parser.add_argument("--worker", choices=["stream", "memory"], help=argparse.SUPPRESS)
+    parser.add_argument("--data", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", type=Path, default=SCRATCH_DIR / "streaming")
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.data, args.memory_cap_mb, args.output_dir)
+        return
+
+    data = SCRATCH_DIR / f"diabetes_x{args.scale:g}_cap{args.memory_cap_mb:g}mb.csv"
+    target_bytes = int(args.scale * args.memory_cap_mb * 1024 * 1024)
+    if not data.exists() or data.stat().st_size < target_bytes:
+        enlarge_csv(data, target_bytes=target_bytes)
+    n_rows = sum(1 for _ in data.open()) - 1
+
+    results = {
+        "memory_cap_mb": args.memory_cap_mb,
+        "csv_mb": data.stat().st_size / 1024 / 1024,
+        "rows": n_rows,
+        # float64 columns as a DataFrame, before any preprocessing copies.
+        "in_memory_frame_mb": n_rows * 9 * 8 / 1024 / 1024,
+    }
+    modes = ["stream", "memory"] if args.compare_in_memory else ["stream"]
+    for mode in modes:
+        # Interpreter, parser and plotting overhead is measured on the original
+        # 768-row file and subtracted, leaving the data-dependent working set.
+        fixed = run_worker(mode, DATA_PATH, args.memory_cap_mb, args.output_dir / f"{mode}-fixed")
+        stats = run_worker(mode, data, args.memory_cap_mb, args.output_dir / mode)
+        stats["fixed_rss_mb"] = fixed["peak_rss_mb"]
+        stats["working_set_mb"] = stats["peak_rss_mb"] - fixed["peak_rss_mb"]
+        stats["within_cap"] = stats["working_set_mb"] <= args.memory_cap_mb
+        results[mode] = stats
+
+    write_results("streaming", results)
+    if not results["stream"]["within_cap"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+from common import write_results
+import telemetry
+
+
+def ns_per_block(repeats: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(repeats):
+        with telemetry.timed("bench"):
+            pass
+    return (time.perf_counter_ns() - start) / repeats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-stage instrumentation overhead.")
+    parser.add_argument("--repeats", type=int, default=200_000)
+    args = parser.parse_args()
+
+    telemetry.ENABLED = False
+    disabled = ns_per_block(args.repeats)
+    telemetry.ENABLED = True
+    enabled = ns_per_block(args.repeats)
+
+    start = time.perf_counter_ns()
+    for _ in range(1_000):
+        telemetry.REGISTRY.render()
+    render_us = (time.perf_counter_ns() - start) / 1_000 / 1_000
+
+    write_results(
+        "telemetry",
+        {
+            "timed_block_ns": {"enabled": enabled, "disabled": disabled},
+            "stages_per_analysis": 5,
+            "overhead_per_analysis_us": enabled * 5 / 1_000,
+            "render_metrics_us": render_us,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent
+DATA_PATH = APP_DIR / "diabetes.csv"
+RESULTS_DIR = BENCH_DIR / "results"
+SCRATCH_DIR = BENCH_DIR / "scratch"
+
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+PACKAGES = ["numpy", "pandas", "scikit-learn", "shap", "plotly", "streamlit", "joblib"]
+
+CONTINUOUS_COLUMNS = ["Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI", "DiabetesPedigreeFunction"]
+
+
+def enlarge_csv(
+    dst: Path, target_bytes: int | None = None, rows: int | None = None, seed: int = 0, source: Path = DATA_PATH
+) -> Path:
+    if (target_bytes is None) == (rows is None):
+        raise ValueError("Pass exactly one of target_bytes or rows")
+
+    base = pd.read_csv(source)
+    rng = np.random.default_rng(seed)
+    stds = base[CONTINUOUS_COLUMNS].std().to_numpy() * 0.05
+    dst.parent.mkdir(parents=True, exist_ok=True)
+
+    written_rows = 0
+    block = 50_000
+    with dst.open("w", newline="") as fh:
+        fh.write(",".join(base.columns) + "\n")
+        while True:
+            if rows is not None and written_rows >= rows:
+                break
+            if target_bytes is not None and fh.tell() >= target_bytes:
+                break
+            n = block if rows is None else min(block, rows - written_rows)
+            sample = base.iloc[rng.integers(0, len(base), size=n)].reset_index(drop=True)
+            values = sample[CONTINUOUS_COLUMNS].to_numpy(dtype=float)
+            # Jitter keeps rows distinct but leaves zero-as-missing entries at zero.
+            jittered = np.where(values == 0, 0.0, np.abs(values + rng.normal(0.0, 1.0, values.shape) * stds))
+            sample[CONTINUOUS_COLUMNS] = np.round(jittered, 3)
+            sample.to_csv(fh, header=False, index=False)
+            written_rows += n
+    return dst
+
+
+def _package_version(name: str) -> str | None:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _git_commit() -> str | None:
+    try:
+        proc = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return proc.stdout.strip() or None
+
+
+def environment() -> dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+        "packages": {name: _package_version(name) for name in PACKAGES},
+    }
+
+
+def latency_stats(fn: Callable[[], object], repeats: int, warmup: int = 3) -> dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    def pct(q: float) -> float:
+        return timings[min(len(timings) - 1, int(round(q * (len(timings) - 1))))]
+
+    return {
+        "repeats": repeats,
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "min_ms": timings[0],
+    }
+
+
+def import_app() -> Any:
+    # Bare-mode import: no warm-up thread, no metrics port, no Gemini client.
+    os.environ["VITALAI_WARMUP"] = "0"
+    os.environ["VITALAI_METRICS"] = "0"
+    os.environ["GEMINI_API_KEY"] = ""
+    import streamlit  # noqa: F401
+
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    import app
+
+    return app
+
+
+def write_results(name: str, payload: dict[str, Any], output: Path | None = None) -> Path:
+    output = output or RESULTS_DIR / f"{name}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    document = {"benchmark": name, "environment": environment(), **payload}
+    output.write_text(json.dumps(document, indent=2, default=float))
+    print(json.dumps(document, indent=2, default=float))
+    return output
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from common import DATA_PATH, RESULTS_DIR, SCRATCH_DIR, enlarge_csv, import_app, latency_stats, write_results
+import train
+from engines import ENGINES
+
+
+def prepared_frame(path: Path) -> tuple[pd.DataFrame, pd.Series]:
+    df = train.load_dataset(path)
+    df = train.impute_zero_as_missing(df, train.compute_medians(df))
+    return df.drop(columns=[train.TARGET]), df[train.TARGET]
+
+
+def scaled_dataset(scale: int) -> Path:
+    if scale == 1:
+        return DATA_PATH
+    path = SCRATCH_DIR / f"diabetes_rows_x{scale}.csv"
+    if not path.exists():
+        enlarge_csv(path, rows=768 * scale)
+    return path
+
+
+def tile_rows(X: pd.DataFrame, n: int) -> pd.DataFrame:
+    reps = int(np.ceil(n / len(X)))
+    return X.iloc[np.tile(np.arange(len(X)), reps)[:n]].reset_index(drop=True)
+
+
+def bench_train(engine_name: str, scales: list[int], repeats: int) -> dict[str, Any]:
+    results = {}
+    for scale in scales:
+        X, y = prepared_frame(scaled_dataset(scale))
+        X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        timings = []
+        for _ in range(repeats if scale == 1 else 1):
+            model = ENGINES[engine_name].build(42)
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            timings.append(time.perf_counter() - start)
+        results[f"x{scale}"] = {"rows": len(X_train), "fit_seconds": min(timings), "samples": timings}
+    return results
+
+
+def bench_predict(model: Any, X: pd.DataFrame, repeats: int, batch_sizes: list[int]) -> dict[str, Any]:
+    row = X.iloc[[0]]
+    results: dict[str, Any] = {"single_row": latency_stats(lambda: model.predict_proba(row), repeats)}
+    for size in batch_sizes:
+        batch = tile_rows(X, size)
+        stats = latency_stats(lambda: model.predict_proba(batch), max(3, repeats // 50), warmup=1)
+        stats["rows_per_second"] = size / (stats["p50_ms"] / 1000)
+        results[f"batch_{size}"] = stats
+    return results
+
+
+def bench_shap(app: Any, explainer: Any, X: pd.DataFrame, sizes: list[int], repeats: int) -> dict[str, Any]:
+    results = {}
+    for size in sizes:
+        batch = tile_rows(X, size)
+        n = repeats if size == 1 else max(1, repeats // (10 * size) + 1)
+        stats = latency_stats(lambda: app.get_shap_matrix(explainer, batch), n, warmup=1 if size > 100 else 3)
+        stats["rows_per_second"] = size / (stats["p50_ms"] / 1000)
+        results[f"batch_{size}"] = stats
+    return results
+
+
+def sample_results(app: Any, model: Any, explainer: Any, feature_names: list[str], X: pd.DataFrame) -> dict[str, Any]:
+    meta = {"calibration": None, "shap_units": "probability", "algorithm": "Random Forest"}
+    patient = X.iloc[0].to_dict()
+    scored = app.score_patient(model, explainer, feature_names, meta, patient)
+    risk = app.risk_meta(scored["confidence"])
+    return {
+        **scored,
+        "hero_label": risk["hero_label"],
+        "status": risk["status"],
+        "risk_level": risk["level"],
+        "risk_color": risk["color"],
+        "shap_units": "probability",
+        "explanation": app.fallback_explanation(scored["confidence"], scored["top_factors_text"], scored["prediction"]),
+    }
+
+
+def bench_explanation(app: Any, results: dict[str, Any], repeats: int) -> dict[str, Any]:
+    confidence, factors, prediction = results["confidence"], results["top_factors_text"], results["prediction"]
+    return {
+        "fallback_explanation": latency_stats(lambda: app.fallback_explanation(confidence, factors, prediction), repeats),
+        "generate_explanation_no_client": latency_stats(
+            lambda: app.generate_explanation("prompt", app.fallback_explanation(confidence, factors, prediction)),
+            repeats,
+        ),
+    }
+
+
+def bench_counterfactual(app: Any, model: Any, X: pd.DataFrame, repeats: int) -> dict[str, Any]:
+    from counterfactual import find_counterfactual
+
+    prob = model.predict_proba(X)[:, 1]
+    rows = X[prob >= app.LOW_RISK_THRESHOLD / 100].head(20)
+    feature_names = list(X.columns)
+    timings, found = [], 0
+    for _, row in rows.iterrows():
+        inputs = row.to_dict()
+        for _ in range(max(1, repeats // 100)):
+            start = time.perf_counter()
+            result = find_counterfactual(model, feature_names, inputs, app.MODIFIABLE_BOUNDS)
+            timings.append((time.perf_counter() - start) * 1000)
+        found += result is not None
+    timings.sort()
+    return {
+        "patients": len(rows),
+        "found": found,
+        "p50_ms": timings[len(timings) // 2] if timings else None,
+        "max_ms": timings[-1] if timings else None,
+    }
+
+
+def bench_figures(app: Any, results: dict[str, Any], repeats: int) -> dict[str, Any]:
+    # st.plotly_chart serialises the figure to JSON, so that is timed as well.
+    return {
+        "gauge_build": latency_stats(lambda: app.build_gauge_figure(results), repeats),
+        "gauge_build_json": latency_stats(lambda: app.build_gauge_figure(results).to_json(), repeats),
+        "shap_bar_build": latency_stats(lambda: app.build_shap_figure(results), repeats),
+        "shap_bar_build_json": latency_stats(lambda: app.build_shap_figure(results).to_json(), repeats),
+        "svg_build": latency_stats(lambda: app.build_chart_svgs(results), repeats),
+    }
+
+
+def bench_bootstrap(model: Any, X: pd.DataFrame, y: pd.Series, replicates: int, large_rows: int) -> dict[str, Any]:
+    from sklearn.metrics import roc_auc_score
+
+    from bootstrap import bootstrap_metrics
+
+    prob = model.predict_proba(X)[:, 1]
+    y_true = y.to_numpy()
+    # Per-replicate Python loop over sklearn, the approach being replaced.
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(100):
+        idx = rng.integers(0, len(y_true), len(y_true))
+        roc_auc_score(y_true[idx], prob[idx])
+    loop_ms = (time.perf_counter() - start) * 1000 / 100 * replicates
+    big = np.tile(np.arange(len(y_true)), int(np.ceil(large_rows / len(y_true))))[:large_rows]
+    return {
+        "test_rows": {
+            "rows": len(y_true),
+            "replicates": replicates,
+            **latency_stats(lambda: bootstrap_metrics(y_true, prob, replicates=replicates), 5, warmup=1),
+            "sklearn_loop_auc_only_ms": loop_ms,
+        },
+        "large": {
+            "rows": large_rows,
+            "replicates": 200,
+            **latency_stats(lambda: bootstrap_metrics(y_true[big], prob[big], replicates=200), 1, warmup=0),
+        },
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    regressions = []
+
+    def walk(cur: Any, base: Any, path: str) -> None:
+        if isinstance(cur, dict) and isinstance(base, dict):
+            for key, value in cur.items():
+                if key in base:
+                    walk(value, base[key], f"{path}.{key}" if path else key)
+        elif path.endswith(("p50_ms", "p99_ms", "fit_seconds")) and isinstance(cur, (int, float)) and base:
+            ratio = cur / base
+            if ratio > threshold:
+                regressions.append(f"{path}: {base:.3f} -> {cur:.3f} ({ratio:.2f}x)")
+
+    walk(current["cases"], baseline.get("cases", {}), "")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="VitalAI benchmark suite (offline, diabetes.csv + scale-ups).")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="random_forest")
+    parser.add_argument("--train-scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--shap-sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--quick", action="store_true", help="Small sizes and few repeats for smoke runs.")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous suite JSON to diff against.")
+    parser.add_argument("--regression-threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.train_scales, args.batch_sizes, args.shap_sizes, args.repeats = [1], [1_000], [1, 100], 30
+
+    app = import_app()
+    X, y = prepared_frame(DATA_PATH)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    engine = ENGINES[args.engine]
+    model = engine.build(42).fit(X_train, y_train)
+    explainer = engine.explainer(model)
+    feature_names = list(X.columns)
+    results = sample_results(app, model, explainer, feature_names, X_test)
+
+    cases = {
+        "train": bench_train(args.engine, args.train_scales, repeats=3),
+        "predict_proba": bench_predict(model, X_test, args.repeats, args.batch_sizes),
+        "shap": bench_shap(app, explainer, X_test, args.shap_sizes, args.repeats),
+        "explanation": bench_explanation(app, results, args.repeats),
+        "counterfactual": bench_counterfactual(app, model, X_test, args.repeats),
+        "figures": bench_figures(app, results, max(10, args.repeats // 4)),
+        "bootstrap": bench_bootstrap(model, X_test, y_test, 2000, 20_000 if args.quick else 200_000),
+    }
+    payload = {"engine": args.engine, "config": vars(args) | {"output": None, "baseline": None}, "cases": cases}
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output = write_results("suite", payload, args.output or RESULTS_DIR / f"suite-{stamp}.json")
+    print(f"Wrote {output}")
+
+    if args.baseline:
+        regressions = compare(payload, json.loads(args.baseline.read_text()), args.regression_threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from http import HTTPStatus
+
+
+class StubGeminiServer:
+    # Local stand-in for the generateContent endpoint. Each request waits a
+    # random latency; requests over the server-side quota, plus a random
+    # fraction of the rest, are answered 429 like the real API's rate limit.
+    # script, when given, fixes the status of the first requests in order
+    # (e.g. [429, 503, 200]); Retry-After is sent verbatim on 429 and 503.
+    def __init__(
+        self,
+        latency_s: float = 0.15,
+        jitter_s: float = 0.05,
+        error_rate: float = 0.05,
+        quota_rps: float = 200.0,
+        retry_after: float | str | None = None,
+        seed: int = 0,
+        script: list[int] | None = None,
+    ) -> None:
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.error_rate = error_rate
+        self.quota_rps = quota_rps
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.script = deque(script or ())
+        self.arrivals: list[float] = []
+        self.connections = 0
+        self.requests = 0
+        self.rejected = 0
+        self._window: list[float] = []
+        self._server: asyncio.Server | None = None
+        self.port = 0
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{self.port}"
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _over_quota(self) -> bool:
+        now = time.monotonic()
+        self._window = [t for t in self._window if now - t < 1.0]
+        if len(self._window) >= self.quota_rps:
+            return True
+        self._window.append(now)
+        return False
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                prompt = json.loads(await reader.readexactly(length))["contents"][0]["parts"][0]["text"]
+                self.requests += 1
+                self.arrivals.append(time.monotonic())
+
+                if self.script:
+                    code = self.script.popleft()
+                elif self._over_quota() or self.rng.random() < self.error_rate:
+                    code = 429
+                else:
+                    code = 200
+                if code == 200:
+                    await asyncio.sleep(max(0.0, self.rng.gauss(self.latency_s, self.jitter_s)))
+                    text = f"Stub explanation for: {prompt[:40]}"
+                    extra = {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+                else:
+                    self.rejected += 1
+                    extra = {"error": {"code": code, "status": HTTPStatus(code).name}}
+                body = json.dumps(extra).encode()
+                head = (
+                    f"HTTP/1.1 {code} {HTTPStatus(code).phrase}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                )
+                if code in (429, 503) and self.retry_after is not None:
+                    value = self.retry_after if isinstance(self.retry_after, str) else f"{self.retry_after:g}"
+                    head += f"Retry-After: {value}\r\n"
+                writer.write((head + "\r\n").encode("latin-1") + body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            writer.close()
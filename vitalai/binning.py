@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+import numpy as np
+
+
+def split_thresholds(model: Any, feature_index: int) -> np.ndarray | None:
+    # The model's output can only change where a split on this feature does.
+    if hasattr(model, "estimators_"):
+        chunks = []
+        for est in np.ravel(model.estimators_):
+            tree = est.tree_
+            chunks.append(tree.threshold[tree.feature == feature_index])
+        return np.unique(np.concatenate(chunks)) if chunks else None
+    predictors = getattr(model, "_predictors", None)
+    if predictors:
+        chunks = []
+        for per_class in predictors:
+            for predictor in per_class:
+                nodes = predictor.nodes
+                chunks.append(nodes["num_threshold"][(nodes["feature_idx"] == feature_index) & (nodes["is_leaf"] == 0)])
+        return np.unique(np.concatenate(chunks))
+    return None
+
+
+class ThresholdBinner:
+    # Maps a row to, per feature, the index of the interval between the
+    # model's split thresholds that the value falls in. Rows with equal bin
+    # indices take the same path through every tree, so predict_proba and
+    # TreeSHAP outputs are identical for them.
+    def __init__(self, thresholds: list[np.ndarray], dtype: type) -> None:
+        self.thresholds = thresholds
+        self.dtype = dtype
+
+    @classmethod
+    def from_model(cls, model: Any, n_features: int) -> ThresholdBinner | None:
+        thresholds = [split_thresholds(model, j) for j in range(n_features)]
+        if any(t is None for t in thresholds):
+            return None
+        # sklearn trees (and shap for them) compare float32-cast inputs;
+        # HistGradientBoosting compares float64 inputs.
+        dtype = np.float32 if hasattr(model, "estimators_") else np.float64
+        return cls(thresholds, dtype)
+
+    def bins(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64).astype(self.dtype).astype(np.float64)
+        X = np.atleast_2d(X)
+        out = np.empty(X.shape, dtype=np.int32)
+        for j, edges in enumerate(self.thresholds):
+            # Splits send x <= t left, so a value equal to a threshold shares
+            # the bin of values below it: searchsorted side="left".
+            out[:, j] = np.searchsorted(edges, X[:, j], side="left")
+        return out
+
+    def key(self, row: np.ndarray) -> tuple[int, ...]:
+        return tuple(int(b) for b in self.bins(row)[0])
+
+    def n_cells(self) -> float:
+        return float(np.prod([len(t) + 1 for t in self.thresholds], dtype=np.float64))
+
+
+class ResultCache:
+    # Thread-safe LRU shared by every session.
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import numpy as np
+
+METRICS = ("accuracy", "precision", "recall", "f1", "auc")
+# Index cells materialized per chunk of replicates (~32 MB of int64).
+CHUNK_CELLS = 4_000_000
+# Below this many test rows a single process is faster than a pool.
+PARALLEL_MIN_ROWS = 50_000
+
+
+def _cells(y_true: np.ndarray, y_prob: np.ndarray, threshold: float) -> tuple[np.ndarray, ...]:
+    # Rows sorted by score, with the start of each run of tied scores, so
+    # AUC reduces to cumulative sums over the sorted cells.
+    order = np.argsort(y_prob, kind="stable")
+    prob = np.asarray(y_prob, dtype=float)[order]
+    label = np.asarray(y_true).astype(bool)[order]
+    starts = np.flatnonzero(np.r_[True, np.diff(prob) != 0])
+    return label, prob > threshold, starts
+
+
+def metrics_from_counts(
+    counts: np.ndarray, label: np.ndarray, pred: np.ndarray, starts: np.ndarray
+) -> dict[str, np.ndarray]:
+    # counts is (replicates, cells): how often each score-sorted cell was
+    # drawn. Every metric is a reduction along axis 1, so all replicates are
+    # computed at once.
+    counts = np.asarray(counts, dtype=np.float64)
+    tp = counts[:, label & pred].sum(axis=1)
+    fp = counts[:, ~label & pred].sum(axis=1)
+    fn = counts[:, label & ~pred].sum(axis=1)
+    tn = counts[:, ~label & ~pred].sum(axis=1)
+    pos = np.add.reduceat(counts * label, starts, axis=1)
+    neg = np.add.reduceat(counts * ~label, starts, axis=1)
+    neg_below = np.cumsum(neg, axis=1) - neg
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "accuracy": (tp + tn) / (tp + fp + fn + tn),
+            "precision": tp / (tp + fp),
+            "recall": tp / (tp + fn),
+            "f1": 2 * tp / (2 * tp + fp + fn),
+            "auc": (pos * (neg_below + 0.5 * neg)).sum(axis=1) / (pos.sum(axis=1) * neg.sum(axis=1)),
+        }
+
+
+def _resample_chunk(args: tuple[np.ndarray, np.ndarray, np.ndarray, int, Any]) -> dict[str, np.ndarray]:
+    label, pred, starts, replicates, seed = args
+    n = len(label)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, n, size=(replicates, n))
+    # Offsetting each replicate's row by replicates * n turns one bincount
+    # into a per-replicate histogram of drawn rows.
+    idx += np.arange(replicates)[:, None] * n
+    counts = np.bincount(idx.ravel(), minlength=replicates * n).reshape(replicates, n)
+    return metrics_from_counts(counts, label, pred, starts)
+
+
+def _summarize(
+    point: dict[str, np.ndarray], samples: dict[str, np.ndarray], n: int, replicates: int, confidence: float
+) -> dict[str, Any]:
+    tail = (1 - confidence) / 2 * 100
+    summary: dict[str, Any] = {"n": int(n), "replicates": int(replicates), "confidence": confidence}
+    for name in METRICS:
+        low, high = np.nanpercentile(samples[name], [tail, 100 - tail])
+        summary[name] = {
+            "point": round(float(point[name][0]), 6),
+            "low": round(float(low), 6),
+            "high": round(float(high), 6),
+        }
+    return summary
+
+
+def bootstrap_metrics(
+    y_true: np.ndarray,
+    y_prob: np.ndarray,
+    replicates: int = 2000,
+    confidence: float = 0.95,
+    threshold: float = 0.5,
+    seed: int = 42,
+    jobs: int | None = None,
+) -> dict[str, Any]:
+    label, pred, starts = _cells(y_true, y_prob, threshold)
+    n = len(label)
+    point = metrics_from_counts(np.ones((1, n)), label, pred, starts)
+
+    per_chunk = max(1, CHUNK_CELLS // max(n, 1))
+    sizes = [min(per_chunk, replicates - i) for i in range(0, replicates, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(label, pred, starts, size, s) for size, s in zip(sizes, seeds)]
+    if n >= PARALLEL_MIN_ROWS and len(tasks) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=min(len(tasks), jobs or os.cpu_count() or 1)) as pool:
+            parts = list(pool.map(_resample_chunk, tasks))
+    else:
+        parts = [_resample_chunk(task) for task in tasks]
+    samples = {name: np.concatenate([part[name] for part in parts]) for name in METRICS}
+    return _summarize(point, samples, n, replicates, confidence)
+
+
+def bootstrap_histograms(
+    pos_hist: np.ndarray,
+    neg_hist: np.ndarray,
+    replicates: int = 2000,
+    confidence: float = 0.95,
+    threshold: float = 0.5,
+    seed: int = 42,
+) -> dict[str, Any]:
+    # Streaming evaluation keeps only per-bin counts. Drawing n rows with
+    # replacement from them is a multinomial over the bins, so memory does
+    # not depend on how many rows were scored.
+    bins = len(pos_hist)
+    weights = np.concatenate([neg_hist, pos_hist]).astype(np.float64)
+    n = int(weights.sum())
+    centers = (np.arange(bins) + 0.5) / bins
+    score = np.concatenate([centers, centers])
+    order = np.argsort(score, kind="stable")
+    label = np.r_[np.zeros(bins, dtype=bool), np.ones(bins, dtype=bool)][order]
+    score, weights = score[order], weights[order]
+    pred = score > threshold
+    starts = np.flatnonzero(np.r_[True, np.diff(score) != 0])
+
+    point = metrics_from_counts(weights[None, :], label, pred, starts)
+    counts = np.random.default_rng(seed).multinomial(n, weights / n, size=replicates)
+    return _summarize(point, metrics_from_counts(counts, label, pred, starts), n, replicates, confidence)
+
+
+def format_interval(metric: dict[str, float], percent: bool = True) -> str:
+    if percent:
+        return f"{metric['point'] * 100:.1f}% ({metric['low'] * 100:.1f}-{metric['high'] * 100:.1f})"
+    return f"{metric['point']:.3f} ({metric['low']:.3f}-{metric['high']:.3f})"
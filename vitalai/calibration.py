@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+METHODS = ("isotonic", "sigmoid")
+
+
+def fit_calibration(scores: np.ndarray, y: np.ndarray, method: str = "isotonic", grid_points: int = 101) -> dict[str, Any]:
+    scores = np.asarray(scores, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if method == "isotonic":
+        from sklearn.isotonic import IsotonicRegression
+
+        iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(scores, y)
+        # IsotonicRegression.predict is linear interpolation between these
+        # knots, so np.interp over them reproduces it exactly.
+        x_knots, y_knots = iso.X_thresholds_, iso.y_thresholds_
+    elif method == "sigmoid":
+        from sklearn.linear_model import LogisticRegression
+
+        platt = LogisticRegression(C=1e6).fit(scores.reshape(-1, 1), y)
+        x_knots = np.linspace(0.0, 1.0, grid_points)
+        y_knots = platt.predict_proba(x_knots.reshape(-1, 1))[:, 1]
+    else:
+        raise ValueError(f"Unknown calibration method '{method}'. Choose from: {', '.join(METHODS)}")
+
+    return {
+        "method": method,
+        "x": [round(float(v), 6) for v in x_knots],
+        "y": [round(float(v), 6) for v in y_knots],
+    }
+
+
+def select_calibration(scores: np.ndarray, y: np.ndarray, folds: int = 5, seed: int = 42) -> dict[str, float]:
+    # Brier score of each map when fitted on some folds of the out-of-fold
+    # scores and applied to the rest, next to the scores left as they are.
+    from sklearn.metrics import brier_score_loss
+    from sklearn.model_selection import StratifiedKFold
+
+    scores = np.asarray(scores, dtype=float)
+    y = np.asarray(y, dtype=float)
+    results = {"none": float(brier_score_loss(y, scores))}
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(scores, y))
+    for method in METHODS:
+        calibrated = np.empty_like(scores)
+        for fit_idx, eval_idx in splits:
+            table = fit_calibration(scores[fit_idx], y[fit_idx], method=method)
+            calibrated[eval_idx] = apply_calibration(scores[eval_idx], table)
+        results[method] = float(brier_score_loss(y, calibrated))
+    return results
+
+
+def apply_calibration(prob: float | np.ndarray, table: dict[str, Any] | None) -> float | np.ndarray:
+    if not table:
+        return prob
+    return np.interp(prob, table["x"], table["y"])
+
+
+def calibration_arrays(table: dict[str, Any] | None) -> dict[str, Any] | None:
+    # Pre-converting the knots avoids a list-to-array copy on every request.
+    if not table:
+        return None
+    return {**table, "x": np.asarray(table["x"], dtype=float), "y": np.asarray(table["y"], dtype=float)}
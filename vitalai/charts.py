@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import functools
+import html
+import math
+from string import Template
+
+# Server-rendered SVG versions of the gauge and SHAP bar chart. They carry
+# the same information as the Plotly figures in a few KB of markup and need
+# no charting bundle in the browser. The templates are compiled once at
+# import; a render only substitutes numbers.
+CHART_MODES = ("plotly", "svg")
+
+# Shared presentation attributes sit on <g> wrappers and coordinates are
+# whole viewBox units, which keeps each chart to a couple of KB.
+GAUGE_TEMPLATE = Template(
+    "<svg class='svg-chart' viewBox='0 0 400 215' role='img' aria-label='$title: $number'"
+    " xmlns='http://www.w3.org/2000/svg' style='width:100%;max-height:270px;background:#FFFFFF'>"
+    "<g text-anchor='middle'>"
+    "<text x='200' y='20' fill='#8B90A7' font-family='Plus Jakarta Sans' font-size='15'>$title</text>"
+    "<g fill='none' stroke-width='$band'><path d='$track' stroke='#F4F6FB'/>$steps</g>"
+    "<path d='$bar' fill='none' stroke='$color' stroke-width='$bar_width'/>"
+    "<g fill='#8B90A7' font-family='Inter' font-size='11'>$ticks</g>"
+    "<text x='200' y='182' fill='$color' font-family='JetBrains Mono' font-size='42'>$number</text>"
+    "</g></svg>"
+)
+STEP_TEMPLATE = Template("<path d='$path' stroke='$color'/>")
+TICK_TEMPLATE = Template("<text x='$x' y='$y'>$label</text>")
+
+SHAP_TEMPLATE = Template(
+    "<svg class='svg-chart' viewBox='0 0 640 $height' role='img' aria-label='$title'"
+    " xmlns='http://www.w3.org/2000/svg' style='width:100%;background:#FFFFFF'>"
+    "<text x='10' y='26' fill='#1A1D2E' font-family='Plus Jakarta Sans' font-size='14'>$title</text>"
+    "<line x1='$zero' y1='$top' x2='$zero' y2='$bottom' stroke='#D0D4E8'/>"
+    "<g text-anchor='end' fill='#3D4257' font-family='Inter' font-size='12'>$labels</g>"
+    "$bars"
+    "<g fill='#8B90A7' font-family='JetBrains Mono' font-size='11'>$values</g>"
+    "<text x='$center' y='$axis_y' text-anchor='middle' fill='#3D4257' font-family='Inter' font-size='12'>$axis</text>"
+    "</svg>"
+)
+LABEL_TEMPLATE = Template("<text x='$x' y='$y'>$text</text>")
+BAR_TEMPLATE = Template("<rect x='$x' y='$y' width='$width' height='$height' fill='$color'/>")
+VALUE_TEMPLATE = Template("<text x='$x' y='$y'$anchor>$text</text>")
+
+STEP_COLORS = ("rgba(47,158,68,0.15)", "rgba(245,159,0,0.15)", "rgba(240,62,62,0.15)")
+POSITIVE_COLOR = "#F03E3E"
+NEGATIVE_COLOR = "#7C5CFC"
+
+CX, CY, RADIUS, BAND = 200.0, 190.0, 130.0, 42.0
+# Feature labels end at LABEL_X; VALUE_PAD leaves room for value text
+# beyond the longest bar on either side.
+LABEL_X, PLOT_LEFT, PLOT_RIGHT, VALUE_PAD = 150.0, 160.0, 630.0, 56.0
+ROW_HEIGHT, BAR_HEIGHT, SHAP_TOP = 34.0, 22.0, 44.0
+
+
+def _point(percent: float, radius: float) -> tuple[float, float]:
+    # 0% at the left end of the half circle, 100% at the right.
+    angle = math.pi * (1 - percent / 100)
+    return CX + radius * math.cos(angle), CY - radius * math.sin(angle)
+
+
+def _arc(start: float, end: float, radius: float = RADIUS) -> str:
+    x0, y0 = _point(start, radius)
+    x1, y1 = _point(end, radius)
+    return f"M{x0:.0f} {y0:.0f}A{radius:g} {radius:g} 0 0 1 {x1:.0f} {y1:.0f}"
+
+
+@functools.lru_cache(maxsize=64)
+def _gauge_frame(high: float, low: float) -> tuple[str, str]:
+    # Risk bands and tick labels only change with the model's thresholds.
+    steps = "".join(
+        STEP_TEMPLATE.substitute(path=_arc(start, end), color=color)
+        for (start, end), color in zip(((0, low), (low, high), (high, 100)), STEP_COLORS)
+        if end > start
+    )
+    ticks = []
+    for value in range(0, 101, 20):
+        x, y = _point(value, RADIUS + BAND / 2 + 12)
+        ticks.append(TICK_TEMPLATE.substitute(x=f"{x:.0f}", y=f"{y + 4:.0f}", label=value))
+    return steps, "".join(ticks)
+
+
+@functools.lru_cache(maxsize=1024)
+def gauge_svg(confidence: float, color: str, high: float, low: float, title: str = "Diabetes Risk Probability") -> str:
+    steps, ticks = _gauge_frame(high, low)
+    value = min(max(confidence, 0.0), 100.0)
+    return GAUGE_TEMPLATE.substitute(
+        title=html.escape(title),
+        number=f"{confidence:.1f}%",
+        track=_arc(0, 100),
+        band=f"{BAND:g}",
+        steps=steps,
+        bar=_arc(0, value) if value > 0 else "",
+        bar_width=f"{BAND * 0.28:.0f}",
+        color=color,
+        ticks=ticks,
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def shap_svg(
+    features: tuple[str, ...], values: tuple[float, ...], units: str, title: str = "What Drove This Prediction"
+) -> str:
+    # Largest absolute impact first, as in the Plotly chart.
+    order = sorted(range(len(values)), key=lambda i: abs(values[i]), reverse=True)
+    scale = max((abs(v) for v in values), default=0.0) or 1.0
+    has_negative = any(v < 0 for v in values)
+    left = PLOT_LEFT + (VALUE_PAD if has_negative else 0.0)
+    right = PLOT_RIGHT - VALUE_PAD
+    zero = (left + right) / 2 if has_negative else left
+    half = right - zero
+    labels, bars, texts = [], [], []
+    for row, i in enumerate(order):
+        value = values[i]
+        y = SHAP_TOP + row * ROW_HEIGHT
+        text_y = f"{y + BAR_HEIGHT / 2 + 4:.0f}"
+        width = abs(value) / scale * half
+        positive = value >= 0
+        labels.append(LABEL_TEMPLATE.substitute(x=f"{LABEL_X:.0f}", y=text_y, text=html.escape(features[i])))
+        bars.append(
+            BAR_TEMPLATE.substitute(
+                x=f"{zero if positive else zero - width:.0f}",
+                y=f"{y:.0f}",
+                width=f"{width:.0f}",
+                height=f"{BAR_HEIGHT:.0f}",
+                color=POSITIVE_COLOR if positive else NEGATIVE_COLOR,
+            )
+        )
+        texts.append(
+            VALUE_TEMPLATE.substitute(
+                x=f"{zero + width + 4 if positive else zero - width - 4:.0f}",
+                y=text_y,
+                anchor="" if positive else " text-anchor='end'",
+                text=f"{value:+.3f}",
+            )
+        )
+    bottom = SHAP_TOP + len(values) * ROW_HEIGHT
+    return SHAP_TEMPLATE.substitute(
+        height=f"{bottom + 36:.0f}",
+        title=html.escape(title),
+        zero=f"{zero:.0f}",
+        top=f"{SHAP_TOP - 6:.0f}",
+        bottom=f"{bottom:.0f}",
+        labels="".join(labels),
+        bars="".join(bars),
+        values="".join(texts),
+        center=f"{(PLOT_LEFT + PLOT_RIGHT) / 2:.0f}",
+        axis_y=f"{bottom + 24:.0f}",
+        axis=html.escape(f"SHAP Impact Value ({units})"),
+    )
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import copy
+import itertools
+import pickle
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+DEFAULT_GRID = {
+    "n_estimators": [10, 25, 50, 100, 200],
+    "max_depth": [4, 6, 8, 12, None],
+    "min_samples_leaf": [1, 2, 5, 10],
+}
+
+
+@dataclass
+class Candidate:
+    n_estimators: int
+    max_depth: int | None
+    min_samples_leaf: int
+    auc: float
+    latency_ms: float
+    model_bytes: int
+
+
+@dataclass
+class CompactionReport:
+    latency_budget_ms: float
+    auc_tolerance: float
+    full: Candidate
+    chosen: Candidate
+    met_budget: bool
+    candidates: list[Candidate] = field(default_factory=list)
+    frontier: list[Candidate] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def single_row_latency_ms(model: Any, row: pd.DataFrame, repeats: int) -> float:
+    model.predict_proba(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def truncate_forest(model: RandomForestClassifier, n_estimators: int) -> RandomForestClassifier:
+    # Trees are i.i.d. bootstrap fits, so any prefix is itself a valid forest.
+    truncated = copy.copy(model)
+    truncated.estimators_ = model.estimators_[:n_estimators]
+    truncated.n_estimators = len(truncated.estimators_)
+    return truncated
+
+
+def pareto_frontier(candidates: list[Candidate]) -> list[Candidate]:
+    frontier: list[Candidate] = []
+    for cand in sorted(candidates, key=lambda c: (c.latency_ms, -c.auc)):
+        if not frontier or cand.auc > frontier[-1].auc:
+            frontier.append(cand)
+    return frontier
+
+
+def _evaluate(model: Any, params: dict[str, Any], X_eval: pd.DataFrame, y_eval: pd.Series, repeats: int) -> Candidate:
+    return Candidate(
+        n_estimators=params["n_estimators"],
+        max_depth=params["max_depth"],
+        min_samples_leaf=params["min_samples_leaf"],
+        auc=float(roc_auc_score(y_eval, model.predict_proba(X_eval)[:, 1])),
+        latency_ms=single_row_latency_ms(model, X_eval.iloc[[0]], repeats),
+        model_bytes=len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+    )
+
+
+def compact_forest(
+    model: RandomForestClassifier,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    latency_budget_ms: float,
+    auc_tolerance: float = 0.01,
+    grid: dict[str, list[Any]] | None = None,
+    repeats: int = 30,
+    validation_size: float = 0.2,
+) -> tuple[RandomForestClassifier, CompactionReport]:
+    if not isinstance(model, RandomForestClassifier):
+        raise ValueError("Compaction only applies to the random_forest engine")
+
+    # Candidates are scored on a validation slice of the training data so the
+    # caller's test split stays untouched by the search.
+    X_fit, X_eval, y_fit, y_eval = train_test_split(
+        X_train, y_train, test_size=validation_size, random_state=model.random_state, stratify=y_train
+    )
+    grid = grid or DEFAULT_GRID
+    full_params = {
+        "n_estimators": model.n_estimators,
+        "max_depth": model.max_depth,
+        "min_samples_leaf": model.min_samples_leaf,
+    }
+    full = _evaluate(clone(model).fit(X_fit, y_fit), full_params, X_eval, y_eval, repeats)
+
+    # The full size is always a candidate, so a grid of only larger sizes
+    # still leaves something to search.
+    sizes = sorted({n for n in grid["n_estimators"] if n <= full.n_estimators} | {full.n_estimators})
+    candidates: list[Candidate] = []
+    for max_depth, min_samples_leaf in itertools.product(grid["max_depth"], grid["min_samples_leaf"]):
+        # One fit at the largest size per shape; smaller sizes are tree prefixes.
+        # Cloning keeps every other parameter the model was trained with.
+        shaped = clone(model).set_params(
+            n_estimators=sizes[-1], max_depth=max_depth, min_samples_leaf=min_samples_leaf
+        ).fit(X_fit, y_fit)
+        for n_estimators in sizes:
+            subset = truncate_forest(shaped, n_estimators)
+            params = {"n_estimators": n_estimators, "max_depth": max_depth, "min_samples_leaf": min_samples_leaf}
+            candidates.append(_evaluate(subset, params, X_eval, y_eval, repeats))
+
+    feasible = [
+        cand
+        for cand in candidates
+        if cand.latency_ms <= latency_budget_ms and cand.auc >= full.auc - auc_tolerance
+    ]
+    if feasible:
+        chosen = max(feasible, key=lambda c: (c.auc, -c.latency_ms))
+        chosen_model = clone(model).set_params(
+            n_estimators=chosen.n_estimators,
+            max_depth=chosen.max_depth,
+            min_samples_leaf=chosen.min_samples_leaf,
+        ).fit(X_train, y_train)
+    else:
+        chosen_model, chosen = model, full
+
+    report = CompactionReport(
+        latency_budget_ms=latency_budget_ms,
+        auc_tolerance=auc_tolerance,
+        full=full,
+        chosen=chosen,
+        met_budget=bool(feasible),
+        candidates=candidates,
+        frontier=pareto_frontier(candidates + [full]),
+    )
+    return chosen_model, report
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from binning import split_thresholds
+from calibration import apply_calibration
+
+# Candidate values per feature at each stage: every threshold interval when
+# changing one feature, then coarser grids as more features change at once.
+STAGE_GRID = {1: 256, 2: 24, 3: 12, 4: 8}
+
+
+@dataclass
+class Counterfactual:
+    changes: dict[str, tuple[float, float]]
+    probability: float
+    cost: float
+    evaluated: int
+    elapsed_ms: float
+
+    def describe(self) -> str:
+        parts = [
+            f"{'lowering' if new < old else 'raising'} {feature} from {old:g} to {new:g}"
+            for feature, (old, new) in self.changes.items()
+        ]
+        return ", ".join(parts[:-1]) + (" and " if len(parts) > 1 else "") + parts[-1]
+
+
+def _snap(values: np.ndarray, lo: float, hi: float, step: float) -> np.ndarray:
+    snapped = lo + np.round((values - lo) / step) * step
+    return np.unique(np.round(np.clip(snapped, lo, hi), 6))
+
+
+def candidate_values(thresholds: np.ndarray | None, lo: float, hi: float, step: float) -> np.ndarray:
+    if thresholds is None:
+        return _snap(np.arange(lo, hi + step / 2, step), lo, hi, step)
+    inner = thresholds[(thresholds > lo) & (thresholds < hi)]
+    bounds = np.concatenate([[lo], inner, [hi]])
+    # One representative per interval between consecutive thresholds.
+    return _snap(np.concatenate([bounds, (bounds[:-1] + bounds[1:]) / 2]), lo, hi, step)
+
+
+def _thin(values: np.ndarray, current: float, limit: int) -> np.ndarray:
+    values = values[values != current]
+    if len(values) <= limit:
+        return values
+    # Keep the nearest values densely and the rest evenly spread, so both
+    # small nudges and large moves remain reachable.
+    order = np.argsort(np.abs(values - current))
+    near = values[order[: limit // 2]]
+    far = values[np.linspace(0, len(values) - 1, limit - len(near)).round().astype(int)]
+    return np.unique(np.concatenate([near, far]))
+
+
+def find_counterfactual(
+    model: Any,
+    feature_names: list[str],
+    patient_inputs: dict[str, float],
+    bounds: dict[str, tuple[float, float, float]],
+    calibration: dict[str, Any] | None = None,
+    target: float = 0.40,
+    max_features: int = 4,
+    time_budget_s: float = 0.5,
+    forest: Any = None,
+) -> Counterfactual | None:
+    import pandas as pd
+
+    start = time.perf_counter()
+    modifiable = [f for f in bounds if f in feature_names]
+    base = np.array([float(patient_inputs[f]) for f in feature_names])
+    index = {f: feature_names.index(f) for f in modifiable}
+    spans = {f: bounds[f][1] - bounds[f][0] for f in modifiable}
+    # Candidate values come from the float forest's split thresholds; a
+    # quantized scorer only holds bin indices, which would fall back to the
+    # coarse grid.
+    forest = model if forest is None else forest
+    pools = {f: candidate_values(split_thresholds(forest, index[f]), *bounds[f]) for f in modifiable}
+
+    evaluated = 0
+    for k in range(1, min(max_features, len(modifiable)) + 1):
+        if k > 1 and time.perf_counter() - start > time_budget_s:
+            break
+        grids = {f: _thin(pools[f], base[index[f]], STAGE_GRID.get(k, 8)) for f in modifiable}
+        blocks, costs, combos = [], [], []
+        for combo in itertools.combinations(modifiable, k):
+            axes = [grids[f] for f in combo]
+            if any(len(a) == 0 for a in axes):
+                continue
+            mesh = np.stack([m.ravel() for m in np.meshgrid(*axes, indexing="ij")], axis=1)
+            block = np.repeat(base[None, :], len(mesh), axis=0)
+            cost = np.zeros(len(mesh))
+            for j, f in enumerate(combo):
+                block[:, index[f]] = mesh[:, j]
+                cost += np.abs(mesh[:, j] - base[index[f]]) / spans[f]
+            blocks.append(block)
+            costs.append(cost)
+            combos.extend([combo] * len(mesh))
+        if not blocks:
+            continue
+
+        # One predict_proba call per stage keeps the per-call overhead fixed.
+        batch = np.concatenate(blocks)
+        cost = np.concatenate(costs)
+        prob = model.predict_proba(pd.DataFrame(batch, columns=feature_names))[:, 1]
+        prob = np.asarray(apply_calibration(prob, calibration), dtype=float)
+        evaluated += len(batch)
+
+        feasible = np.flatnonzero(prob < target)
+        if feasible.size:
+            best = feasible[np.lexsort((prob[feasible], cost[feasible]))[0]]
+            return Counterfactual(
+                changes={f: (float(base[index[f]]), float(batch[best, index[f]])) for f in combos[best]},
+                probability=float(prob[best]),
+                cost=float(cost[best]),
+                evaluated=evaluated,
+                elapsed_ms=(time.perf_counter() - start) * 1000,
+            )
+    return None
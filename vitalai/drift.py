@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import math
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+import numpy as np
+
+import telemetry
+
+DEFAULT_BINS = 10
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+MIN_SAMPLES = 50
+_EPS = 1e-4
+
+
+def reference_profile(columns: Mapping[str, np.ndarray], n_rows: int, bins: int = DEFAULT_BINS) -> dict[str, Any]:
+    # Quantile bin edges from the training data; each feature then needs only
+    # len(edges) + 1 counters to track the live distribution.
+    features = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=float)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        # side="left" sends a value equal to an edge into the bin below it.
+        counts = np.bincount(np.searchsorted(edges, values, side="left"), minlength=len(edges) + 1)
+        features[name] = {
+            "edges": [round(float(e), 6) for e in edges],
+            "proportions": [round(float(c), 6) for c in counts / counts.sum()],
+        }
+    return {"n_rows": int(n_rows), "bins": bins, "features": features}
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    e = np.clip(expected, _EPS, None)
+    a = np.clip(actual, _EPS, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+def ks_critical(n_live: float, n_reference: int, alpha_c: float = 1.36) -> float:
+    # Two-sample KS critical value at alpha = 0.05.
+    if n_live <= 0 or n_reference <= 0:
+        return 1.0
+    return alpha_c * math.sqrt((n_live + n_reference) / (n_live * n_reference))
+
+
+@dataclass
+class FeatureDrift:
+    feature: str
+    psi: float
+    ks: float
+    ks_critical: float
+    status: str
+
+
+class DriftMonitor:
+    # Per-feature histograms over the reference bins, exponentially decayed
+    # so the comparison tracks the recent population. Memory is fixed by the
+    # reference and each update touches one bin per feature. observe() only
+    # enqueues; a daemon thread applies the updates until close().
+    def __init__(
+        self, reference: dict[str, Any], half_life: float = 500.0, max_queue: int = 1024, version: str | None = None
+    ) -> None:
+        self._decay = 0.5 ** (1.0 / half_life)
+        self._lock = threading.Lock()
+        self._load(reference, version)
+        self._closed = False
+        self._queue: queue.Queue[dict[str, float] | None] = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="vitalai-drift", daemon=True)
+        self._thread.start()
+
+    def _load(self, reference: dict[str, Any], version: str | None) -> None:
+        self.reference = reference
+        self.version = version
+        self.features = list(reference["features"])
+        self._edges = [np.asarray(reference["features"][f]["edges"], dtype=float) for f in self.features]
+        self._expected = [np.asarray(reference["features"][f]["proportions"], dtype=float) for f in self.features]
+        self._counts = [np.zeros(len(e) + 1) for e in self._edges]
+        # Decay is applied lazily: counts are stored scaled by 1 / scale so an
+        # update is one multiply and one add instead of rescaling every bin.
+        self._scale = 1.0
+        self._weight = 0.0
+        self.observed = 0
+
+    def reset(self, reference: dict[str, Any], version: str | None = None) -> None:
+        # Starts over against another model version's reference, keeping the
+        # worker thread. Inputs still queued for the previous one are dropped.
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        with self._lock:
+            self._load(reference, version)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def observe(self, inputs: dict[str, float]) -> bool:
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(inputs)
+        except queue.Full:
+            telemetry.count(telemetry.DRIFT_DROPPED)
+            return False
+        return True
+
+    def join(self) -> None:
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            inputs = self._queue.get()
+            if inputs is None:
+                self._queue.task_done()
+                return
+            try:
+                self.update(inputs)
+            finally:
+                self._queue.task_done()
+
+    def update(self, inputs: dict[str, float]) -> None:
+        with self._lock:
+            self._scale /= self._decay
+            if self._scale > 1e12:
+                for counts in self._counts:
+                    counts /= self._scale
+                self._weight /= self._scale
+                self._scale = 1.0
+            for feature, edges, counts in zip(self.features, self._edges, self._counts):
+                value = inputs.get(feature)
+                if value is not None:
+                    counts[int(np.searchsorted(edges, float(value), side="left"))] += self._scale
+            self._weight += self._scale
+            self.observed += 1
+
+    def effective_samples(self) -> float:
+        # Kish effective sample size of the decayed weights.
+        n = self.observed
+        if n == 0:
+            return 0.0
+        d = self._decay
+        if d >= 1.0:
+            return float(n)
+        return (1 - d**n) ** 2 / (1 - d) ** 2 / ((1 - d ** (2 * n)) / (1 - d**2))
+
+    def report(self) -> list[FeatureDrift]:
+        with self._lock:
+            live = [counts.copy() for counts in self._counts]
+            n_eff = self.effective_samples()
+        critical = ks_critical(n_eff, self.reference["n_rows"])
+        rows = []
+        for feature, expected, counts in zip(self.features, self._expected, live):
+            total = counts.sum()
+            actual = counts / total if total else np.zeros_like(counts)
+            score, ks = psi(expected, actual), binned_ks(expected, actual)
+            if self.observed < MIN_SAMPLES:
+                status = "insufficient"
+            elif score >= PSI_ALERT or ks > critical:
+                status = "alert"
+            elif score >= PSI_WARN:
+                status = "warn"
+            else:
+                status = "ok"
+            rows.append(FeatureDrift(feature, score, ks, critical, status))
+        return rows
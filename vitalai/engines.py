@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+DEFAULT_ENGINE = "random_forest"
+
+
+def _build_random_forest(random_state: int) -> Any:
+    from sklearn.ensemble import RandomForestClassifier
+
+    return RandomForestClassifier(n_estimators=200, random_state=random_state)
+
+
+def _build_hist_gradient_boosting(random_state: int) -> Any:
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    return HistGradientBoostingClassifier(max_iter=200, learning_rate=0.05, random_state=random_state)
+
+
+@dataclass(frozen=True)
+class Engine:
+    name: str
+    label: str
+    size_label: str
+    shap_units: str
+    build: Callable[[int], Any]
+    model_class: str
+
+    def size(self, model: Any) -> int:
+        if hasattr(model, "estimators_"):
+            return len(model.estimators_)
+        return int(getattr(model, "n_iter_", 0))
+
+    def explainer(self, model: Any) -> Any:
+        import shap
+
+        # Both engines are tree ensembles; TreeSHAP reports forest attributions
+        # in probability space and boosted attributions in log-odds.
+        return shap.TreeExplainer(model)
+
+
+ENGINES: dict[str, Engine] = {
+    "random_forest": Engine(
+        name="random_forest",
+        label="Random Forest",
+        size_label="Trees",
+        shap_units="probability",
+        build=_build_random_forest,
+        model_class="RandomForestClassifier",
+    ),
+    "hist_gradient_boosting": Engine(
+        name="hist_gradient_boosting",
+        label="Histogram Gradient Boosting",
+        size_label="Boosting rounds",
+        shap_units="log-odds",
+        build=_build_hist_gradient_boosting,
+        model_class="HistGradientBoostingClassifier",
+    ),
+}
+
+
+def get_engine(name: str) -> Engine:
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown engine '{name}'. Choose from: {', '.join(ENGINES)}") from None
+
+
+def engine_for_model(model: Any) -> Engine:
+    class_name = type(model).__name__
+    for engine in ENGINES.values():
+        if engine.model_class == class_name:
+            return engine
+    raise ValueError(f"No engine registered for model type {class_name}")
+
+
+def describe_model(model: Any, engine: Engine) -> dict[str, Any]:
+    return {
+        "engine": engine.name,
+        "algorithm": engine.label,
+        "size": engine.size(model),
+        "size_label": engine.size_label,
+        "shap_units": engine.shap_units,
+    }
+
+
+def positive_shap(explainer: Any, X: Any) -> Any:
+    # TreeExplainer returns per-class lists, (rows, features, classes) or
+    # (classes, rows, features) depending on the model and shap version;
+    # this is the positive class as (rows, features).
+    import numpy as np
+
+    shap_vals = explainer.shap_values(X)
+    if isinstance(shap_vals, list):
+        return np.asarray(shap_vals[1], dtype=float)
+    arr = np.asarray(shap_vals)
+    if arr.ndim == 3 and arr.shape[-1] == 2:
+        return np.asarray(arr[:, :, 1], dtype=float)
+    if arr.ndim == 3 and arr.shape[0] == 2:
+        return np.asarray(arr[1], dtype=float)
+    if arr.ndim == 2:
+        return np.asarray(arr, dtype=float)
+    return np.asarray(arr, dtype=float).reshape(1, -1)
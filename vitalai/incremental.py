@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from registry import Condition
+from streaming import QuantileSketch
+
+UPDATE_STATE_FILENAME = "update_state.npz"
+UPDATE_MODES = ("grow", "rolling")
+# Raw rows kept per reservoir; below this every row ever seen is kept.
+RESERVOIR_ROWS = 20_000
+
+
+class RowReservoir:
+    # Uniform sample of every row ever added (Algorithm R), stored raw so the
+    # rows can be re-imputed whenever the medians move.
+    def __init__(self, width: int, capacity: int = RESERVOIR_ROWS, seed: int = 0) -> None:
+        self.capacity = capacity
+        self.seed = seed
+        self.count = 0
+        self._rows = np.empty((capacity, width), dtype=np.float64)
+
+    def update(self, rows: np.ndarray) -> None:
+        rows = np.asarray(rows, dtype=np.float64)
+        filled = min(self.count, self.capacity)
+        head = rows[: self.capacity - filled]
+        self._rows[filled : filled + len(head)] = head
+        tail = rows[len(head) :]
+        if len(tail):
+            rng = np.random.default_rng([self.seed, self.count])
+            seen = self.count + len(head) + np.arange(len(tail))
+            slots = np.floor(rng.random(len(tail)) * (seen + 1)).astype(np.int64)
+            keep = slots < self.capacity
+            self._rows[slots[keep]] = tail[keep]
+        self.count += len(rows)
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._rows[: min(self.count, self.capacity)]
+
+    @classmethod
+    def restore(cls, rows: np.ndarray, count: int, capacity: int = RESERVOIR_ROWS, seed: int = 0) -> RowReservoir:
+        reservoir = cls(rows.shape[1], capacity, seed)
+        reservoir._rows[: len(rows)] = rows
+        reservoir.count = int(count)
+        return reservoir
+
+
+@dataclass
+class UpdateState:
+    # Everything an incremental update needs besides the model itself:
+    # training rows to replay alongside each new batch, held-out rows to
+    # evaluate on, one median sketch per zero-as-missing column, and the
+    # batch each tree was grown from (0 = the original training run).
+    columns: list[str]
+    zero_as_missing: list[str]
+    replay: RowReservoir
+    holdout: RowReservoir
+    sketches: dict[str, QuantileSketch]
+    tree_batches: np.ndarray
+    seed: int = 42
+
+    @classmethod
+    def initial(
+        cls,
+        raw: pd.DataFrame,
+        condition: Condition,
+        train_index: pd.Index,
+        test_index: pd.Index,
+        n_trees: int,
+        seed: int = 42,
+    ) -> UpdateState:
+        columns = [*condition.features, condition.target]
+        state = cls(
+            columns=columns,
+            zero_as_missing=list(condition.zero_as_missing),
+            replay=RowReservoir(len(columns), seed=seed),
+            holdout=RowReservoir(len(columns), seed=seed + 1),
+            sketches={col: QuantileSketch(seed=seed + i) for i, col in enumerate(condition.zero_as_missing)},
+            tree_batches=np.zeros(n_trees, dtype=np.int32),
+            seed=seed,
+        )
+        state._observe(raw[columns])
+        state.replay.update(raw.loc[train_index, columns].to_numpy())
+        state.holdout.update(raw.loc[test_index, columns].to_numpy())
+        return state
+
+    @property
+    def target(self) -> str:
+        return self.columns[-1]
+
+    @property
+    def rows_seen(self) -> int:
+        return self.replay.count + self.holdout.count
+
+    def medians(self) -> dict[str, float]:
+        return {col: sketch.median() for col, sketch in self.sketches.items()}
+
+    def _observe(self, raw: pd.DataFrame) -> None:
+        # Medians cover every labelled row, train and held-out alike, as
+        # compute_medians does over the whole CSV.
+        for col, sketch in self.sketches.items():
+            values = raw[col].to_numpy()
+            sketch.update(values[values != 0])
+
+    def frame(self, rows: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame(rows, columns=self.columns)
+        for col, median in self.medians().items():
+            df[col] = df[col].replace(0, median)
+        df[self.target] = df[self.target].astype(int)
+        return df
+
+    def save(self, path: Path) -> None:
+        arrays = {
+            "columns": np.array(self.columns),
+            "zero_as_missing": np.array(self.zero_as_missing, dtype=str),
+            "replay": self.replay.rows,
+            "replay_count": np.int64(self.replay.count),
+            "holdout": self.holdout.rows,
+            "holdout_count": np.int64(self.holdout.count),
+            "tree_batches": self.tree_batches,
+            "seed": np.int64(self.seed),
+        }
+        for col, sketch in self.sketches.items():
+            arrays[f"sketch:{col}"] = sketch.sample
+            arrays[f"sketch_count:{col}"] = np.int64(sketch.count)
+        with open(path, "wb") as fh:
+            np.savez_compressed(fh, **arrays)
+
+    @classmethod
+    def load(cls, path: Path) -> UpdateState:
+        with np.load(path) as data:
+            seed = int(data["seed"])
+            zero_as_missing = [str(c) for c in data["zero_as_missing"]]
+            return cls(
+                columns=[str(c) for c in data["columns"]],
+                zero_as_missing=zero_as_missing,
+                replay=RowReservoir.restore(data["replay"], int(data["replay_count"]), seed=seed),
+                holdout=RowReservoir.restore(data["holdout"], int(data["holdout_count"]), seed=seed + 1),
+                sketches={
+                    col: QuantileSketch.restore(data[f"sketch:{col}"], int(data[f"sketch_count:{col}"]), seed=seed + i)
+                    for i, col in enumerate(zero_as_missing)
+                },
+                tree_batches=data["tree_batches"].astype(np.int32),
+                seed=seed,
+            )
+
+
+@dataclass
+class UpdateResult:
+    model: Any
+    holdout: pd.DataFrame
+    summary: dict[str, Any]
+
+
+def apply_update(model: Any, state: UpdateState, batch: pd.DataFrame, mode: str = "grow", n_trees: int = 20) -> UpdateResult:
+    # Fits n_trees new trees on the new batch plus the replayed training
+    # rows. "grow" adds them to the forest; "rolling" first drops the
+    # n_trees oldest, so the forest keeps its size and its age is bounded.
+    if mode not in UPDATE_MODES:
+        raise ValueError(f"Unknown update mode '{mode}'. Choose from: {', '.join(UPDATE_MODES)}")
+    if not hasattr(model, "estimators_"):
+        raise ValueError("Incremental updates only apply to random_forest models")
+    if len(state.tree_batches) != len(model.estimators_):
+        raise ValueError("Update state does not match this model's trees")
+    missing = [c for c in state.columns if c not in batch.columns]
+    if missing:
+        raise ValueError(f"Missing expected column in update batch: {missing[0]}")
+
+    batch = batch[state.columns]
+    batch_id = int(state.tree_batches.max(initial=0)) + 1
+    labels = batch[state.target]
+    # A stratified split needs both classes twice over and at least one row
+    # of each class on both sides; smaller batches all go to training.
+    n_test = math.ceil(0.2 * len(batch))
+    if labels.nunique() == 2 and labels.value_counts().min() >= 2 and n_test >= 2 and len(batch) - n_test >= 2:
+        batch_train, batch_test = train_test_split(
+            batch, test_size=0.2, random_state=state.seed + batch_id, stratify=labels
+        )
+    else:
+        batch_train, batch_test = batch, batch.iloc[:0]
+
+    state._observe(batch)
+    fit = state.frame(np.concatenate([state.replay.rows, batch_train.to_numpy(dtype=np.float64)]))
+    if fit[state.target].nunique() < 2:
+        raise ValueError("Update rows never contained both outcome classes")
+
+    removed = 0
+    if mode == "rolling":
+        removed = min(n_trees, len(model.estimators_) - 1)
+        keep = np.sort(np.argsort(state.tree_batches, kind="stable")[removed:])
+        model.estimators_ = [model.estimators_[i] for i in keep]
+        state.tree_batches = state.tree_batches[keep]
+    # A fresh random_state per batch, so trees regrown into freed slots do
+    # not reuse the seeds of the ones they replace.
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees, random_state=state.seed + batch_id)
+    model.fit(fit[list(state.columns[:-1])], fit[state.target])
+    model.set_params(warm_start=False)
+    state.tree_batches = np.concatenate([state.tree_batches, np.full(n_trees, batch_id, dtype=np.int32)])
+
+    state.replay.update(batch_train.to_numpy(dtype=np.float64))
+    state.holdout.update(batch_test.to_numpy(dtype=np.float64))
+    return UpdateResult(
+        model=model,
+        holdout=state.frame(state.holdout.rows),
+        summary={
+            "mode": mode,
+            "batch": batch_id,
+            "batch_rows": len(batch),
+            "fit_rows": len(fit),
+            "trees_added": n_trees,
+            "trees_removed": removed,
+            "n_estimators": len(model.estimators_),
+            "rows_seen": state.rows_seen,
+            "medians": {col: round(v, 6) for col, v in state.medians().items()},
+        },
+    )
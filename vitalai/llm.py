@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any
+
+GEMINI_MODEL_NAME = "gemini-2.5-flash"
+
+_lock = threading.Lock()
+_client: Any = None
+_resolved = False
+
+
+def _build_client() -> Any:
+    api_key = os.environ.get("GEMINI_API_KEY", "")
+    if not api_key:
+        return None
+    try:
+        import google.generativeai as genai
+    except Exception:
+        return None
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(GEMINI_MODEL_NAME)
+
+
+def get_gemini_model() -> Any:
+    global _client, _resolved
+    if _resolved:
+        return _client
+    with _lock:
+        if not _resolved:
+            _client = _build_client()
+            _resolved = True
+    return _client
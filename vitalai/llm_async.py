@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Sequence
+
+import aiohttp
+
+import telemetry
+from llm import GEMINI_MODEL_NAME
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class LLMError(Exception):
+    def __init__(self, status: int, retry_after: float | None = None) -> None:
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status in RETRY_STATUSES
+
+
+class TokenBucket:
+    # Caps the request rate across all workers; waiters are served in order
+    # because the lock is held while sleeping for the next token.
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    # Retry-After is either delay-seconds or an HTTP-date; anything else is
+    # ignored and the jittered backoff applies on its own.
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        return max(0.0, seconds) if math.isfinite(seconds) else None
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class GeminiClient:
+    # generateContent over one aiohttp connection pool, so a bulk run pays
+    # the TCP and TLS handshakes once per pooled connection rather than per
+    # row. The session is opened on first use, inside the running loop.
+    def __init__(
+        self,
+        api_key: str,
+        model: str = GEMINI_MODEL_NAME,
+        base_url: str = DEFAULT_BASE_URL,
+        pool_size: int = 8,
+        timeout: float = 30.0,
+    ) -> None:
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._url = f"{base_url.rstrip('/')}/v1beta/models/{model}:generateContent"
+        self._session: aiohttp.ClientSession | None = None
+
+    async def _on_connection(self, session: aiohttp.ClientSession, context: object, params: object) -> None:
+        self.connections_opened += 1
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(self._on_connection)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60.0),
+                headers={"x-goog-api-key": self.api_key},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace],
+                # Honour HTTP(S)_PROXY and NO_PROXY like the SDK does.
+                trust_env=True,
+            )
+        return self._session
+
+    async def generate(self, prompt: str) -> str:
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        async with self._get_session().post(self._url, json=body) as response:
+            payload = await response.read()
+            if response.status != 200:
+                raise LLMError(response.status, parse_retry_after(response.headers.get("Retry-After")))
+        candidates = json.loads(payload).get("candidates") or [{}]
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts).strip()
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+async def _explain_one(
+    client: GeminiClient,
+    bucket: TokenBucket,
+    prompt: str,
+    fallback_text: str,
+    max_attempts: int,
+    base_delay: float,
+    max_delay: float,
+) -> str:
+    for attempt in range(max_attempts):
+        await bucket.acquire()
+        try:
+            text = await client.generate(prompt)
+        except LLMError as exc:
+            if not exc.retryable:
+                telemetry.count(telemetry.LLM_FALLBACKS, reason="error")
+                return fallback_text
+            reason, retry_after = str(exc.status), exc.retry_after
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            reason, retry_after = "connection", None
+        except ValueError:
+            reason, retry_after = "invalid_response", None
+        else:
+            if text:
+                return text
+            telemetry.count(telemetry.LLM_FALLBACKS, reason="empty")
+            return fallback_text
+
+        if attempt + 1 < max_attempts:
+            telemetry.count(telemetry.LLM_RETRIES, reason=reason)
+            # Full jitter keeps workers that failed together from retrying together.
+            delay = random.uniform(0.0, min(max_delay, base_delay * 2**attempt))
+            await asyncio.sleep(max(delay, retry_after or 0.0))
+    telemetry.count(telemetry.LLM_FALLBACKS, reason="retries_exhausted")
+    return fallback_text
+
+
+async def explain_many_async(
+    jobs: Sequence[tuple[str, str]],
+    client: GeminiClient,
+    concurrency: int = 8,
+    rate: float = 10.0,
+    burst: float | None = None,
+    max_attempts: int = 4,
+    base_delay: float = 0.5,
+    max_delay: float = 8.0,
+) -> list[str]:
+    # jobs are (prompt, fallback_text) pairs; results keep their order. A fixed
+    # set of workers pulls from a shared iterator, so memory stays flat no
+    # matter how many rows are queued.
+    results = [fallback for _, fallback in jobs]
+    bucket = TokenBucket(rate, burst if burst is not None else concurrency)
+    pending = iter(enumerate(jobs))
+
+    async def worker() -> None:
+        for i, (prompt, fallback) in pending:
+            results[i] = await _explain_one(client, bucket, prompt, fallback, max_attempts, base_delay, max_delay)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(jobs))))))
+    return results
+
+
+def explain_many(jobs: Sequence[tuple[str, str]], **kwargs: float) -> list[str]:
+    api_key = os.environ.get("GEMINI_API_KEY", "")
+    if not api_key:
+        telemetry.count(telemetry.LLM_FALLBACKS, len(jobs), reason="no_client")
+        return [fallback for _, fallback in jobs]
+    concurrency = int(kwargs.pop("concurrency", os.environ.get("VITALAI_LLM_CONCURRENCY", "8")))
+    rate = float(kwargs.pop("rate", os.environ.get("VITALAI_LLM_RPS", "10")))
+
+    async def run() -> list[str]:
+        client = GeminiClient(
+            api_key,
+            base_url=os.environ.get("VITALAI_GEMINI_BASE_URL", DEFAULT_BASE_URL),
+            pool_size=concurrency,
+        )
+        try:
+            return await explain_many_async(jobs, client, concurrency=concurrency, rate=rate, **kwargs)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any
+
+import telemetry
+
+# Read once at import: with profiling off, the click path pays one boolean
+# check and enters a shared nullcontext.
+ALWAYS = os.environ.get("VITALAI_PROFILE", "0") != "0"
+TOKEN = os.environ.get("VITALAI_PROFILE_TOKEN", "")
+INTERVAL = float(os.environ.get("VITALAI_PROFILE_INTERVAL_MS", "1")) / 1000
+# tracemalloc dominates the cost of a profiled run (roughly +100 ms at one
+# frame, +500 ms at eight, on a 25 ms analysis) and skews the flame graph
+# towards allocation-heavy code; 0 skips it for a timing-faithful profile.
+TRACE_FRAMES = int(os.environ.get("VITALAI_PROFILE_FRAMES", "4"))
+TOP_ALLOCATIONS = 30
+# Besides the request thread, the scoring pool's threads are sampled so the
+# other conditions show up in the same flame graph.
+THREAD_PREFIXES = ("vitalai-score",)
+
+# tracemalloc is process-wide, so only one run is captured at a time; a
+# click that arrives while another is being profiled runs unprofiled.
+_busy = threading.Lock()
+_NULL = nullcontext()
+
+
+def _frame_name(code: CodeType) -> str:
+    path = Path(code.co_filename)
+    # ';' separates frames in the collapsed format.
+    return f"{code.co_name} ({'/'.join(path.parts[-2:])}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    # Polls the stacks of the watched threads every interval and counts each
+    # distinct stack, keyed by code objects so a sample costs a frame walk
+    # and a dict update. Names are only formatted once, when written out.
+    def __init__(self, thread_id: int, interval: float = INTERVAL) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter[tuple[str, tuple[CodeType, ...]]] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vitalai-profiler", daemon=True)
+
+    def _watched(self) -> dict[int, str]:
+        watched = {self.thread_id: "request"}
+        for thread in threading.enumerate():
+            if thread.ident is not None and thread.name.startswith(THREAD_PREFIXES):
+                watched[thread.ident] = thread.name
+        return watched
+
+    def _run(self) -> None:
+        watched = self._watched()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, label in watched.items():
+                frame: FrameType | None = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                self._stacks[(label, tuple(reversed(stack)))] += 1
+            self.samples += 1
+            # Pool threads start lazily; pick up any that appeared.
+            if self.samples % 50 == 0:
+                watched = self._watched()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        # One "thread;outer;...;inner count" line per stack, the input format
+        # of flamegraph.pl, speedscope and inferno.
+        names: dict[CodeType, str] = {}
+        lines = []
+        for (label, stack), count in sorted(self._stacks.items(), key=lambda item: -item[1]):
+            frames = [names.setdefault(code, _frame_name(code)) for code in stack]
+            lines.append(f"{';'.join([label, *frames])} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _allocation_report(snapshot: tracemalloc.Snapshot | None, peak: int, seconds: float, samples: int) -> str:
+    header = [f"wall_seconds {seconds:.4f}", f"stack_samples {samples}"]
+    if snapshot is None:
+        return "\n".join([*header, "allocation tracing off (VITALAI_PROFILE_FRAMES=0)"]) + "\n"
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        )
+    )
+    stats = snapshot.statistics("traceback")
+    lines = [
+        *header,
+        f"traced_peak_bytes {peak}",
+        f"traced_live_bytes {sum(s.size for s in stats)}",
+        "",
+        f"Top {TOP_ALLOCATIONS} allocation sites still live at the end of the run:",
+    ]
+    for rank, stat in enumerate(stats[:TOP_ALLOCATIONS], 1):
+        lines.append(f"#{rank}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        lines.extend(f"    {line}" for line in stat.traceback.format(most_recent_first=True))
+    return "\n".join(lines) + "\n"
+
+
+class Capture:
+    def __init__(self, directory: Path, label: str) -> None:
+        self.directory = Path(directory)
+        self.label = label
+        self.paths: list[Path] = []
+        self._sampler: StackSampler | None = None
+        self._started_tracing = False
+
+    def __enter__(self) -> Capture:
+        if not _busy.acquire(blocking=False):
+            telemetry.count(telemetry.PROFILES, outcome="busy")
+            return self
+        self._started_tracing = TRACE_FRAMES > 0 and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._sampler = StackSampler(threading.get_ident())
+        self._start = time.perf_counter()
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        sampler = self._sampler
+        if sampler is None:
+            return
+        try:
+            sampler.stop()
+            seconds = time.perf_counter() - self._start
+            snapshot, peak = None, 0
+            if tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+            if self._started_tracing:
+                tracemalloc.stop()
+            stem = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{self.label}-{uuid.uuid4().hex[:8]}"
+            self.directory.mkdir(parents=True, exist_ok=True)
+            folded = self.directory / f"{stem}.folded"
+            folded.write_text(sampler.collapsed())
+            allocations = self.directory / f"{stem}.alloc.txt"
+            allocations.write_text(_allocation_report(snapshot, peak, seconds, sampler.samples))
+            self.paths = [folded, allocations]
+            telemetry.count(telemetry.PROFILES, outcome="written")
+        except OSError:
+            telemetry.count(telemetry.PROFILES, outcome="error")
+        finally:
+            if self._started_tracing and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            _busy.release()
+
+
+def capture(directory: Path, label: str, enabled: bool) -> Any:
+    if not enabled:
+        return _NULL
+    return Capture(directory, label)
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import functools
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from binning import ThresholdBinner
+
+QUANTIZED_FILENAME = "model_quantized.npz"
+
+
+@functools.lru_cache(maxsize=1)
+def _kernel() -> Callable[..., np.ndarray] | None:
+    # numba already comes in with shap. Without it the vectorized walk in
+    # QuantizedForest.leaves is used instead.
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+
+    @njit(cache=True, nogil=True)
+    def positive_sum(bins, feature, threshold, left, right, value, roots):
+        # Tree-major, so one tree's nodes stay in L1 across all rows; per
+        # row the sum still runs over trees in order, as the forest's does.
+        out = np.zeros(bins.shape[0])
+        for root in roots:
+            for i in range(bins.shape[0]):
+                node = root
+                while left[node] >= 0:
+                    node = left[node] if bins[i, feature[node]] <= threshold[node] else right[node]
+                out[i] += value[node]
+        return out
+
+    return positive_sum
+
+
+def warm_kernel() -> None:
+    # Compiles (or loads from numba's on-disk cache) both bin widths off the
+    # request path; run from the app's warm-up thread.
+    kernel = _kernel()
+    if kernel is None:
+        return
+    for dtype in (np.uint8, np.uint16):
+        index = np.zeros(1, dtype=np.int32)
+        kernel(
+            np.zeros((1, 1), dtype=dtype),
+            np.zeros(1, dtype=np.uint8),
+            np.zeros(1, dtype=dtype),
+            index - 1,
+            index,
+            np.zeros(1, dtype=np.float32),
+            index,
+        )
+
+
+def _smallest_uint(limit: int) -> type:
+    for dtype in (np.uint8, np.uint16):
+        if limit <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"{limit} does not fit in 16 bits")
+
+
+class QuantizedForest:
+    # A binary random forest flattened into packed arrays shared by all
+    # trees: feature (uint8/uint16), threshold as a bin index (uint8/uint16),
+    # left/right children (int32, left = -1 at leaves) and the positive-class
+    # leaf probability (float32). Inputs are mapped to the interval between
+    # the forest's own split thresholds per feature (see ThresholdBinner), so
+    # "x <= t" becomes an integer "bin <= k" and rows land on exactly the
+    # leaves the float forest would pick.
+    def __init__(
+        self,
+        edges: list[np.ndarray],
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+    ) -> None:
+        self.binner = ThresholdBinner(edges, np.float32)
+        self.bin_dtype = _smallest_uint(max(len(e) for e in edges))
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features_in_ = len(edges)
+        self.classes_ = np.array([0, 1])
+
+    @classmethod
+    def from_model(cls, model: Any) -> QuantizedForest:
+        estimators = getattr(model, "estimators_", None)
+        if estimators is None or getattr(model, "n_outputs_", 1) != 1 or len(model.classes_) != 2:
+            raise ValueError("Quantization only applies to binary random_forest models")
+        n_features = model.n_features_in_
+        edges = ThresholdBinner.from_model(model, n_features).thresholds
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = max_depth = 0
+        for est in estimators:
+            tree = est.tree_
+            leaf = tree.children_left < 0
+            feature = np.where(leaf, 0, tree.feature)
+            k = np.zeros(tree.node_count, dtype=np.int64)
+            for j in np.unique(feature[~leaf]):
+                at = ~leaf & (feature == j)
+                k[at] = np.searchsorted(edges[j], tree.threshold[at])
+            # Same normalisation as DecisionTreeClassifier.predict_proba.
+            counts = tree.value[:, 0, :]
+            total = counts.sum(axis=1)
+            total[total == 0] = 1
+            features.append(feature)
+            thresholds.append(k)
+            lefts.append(np.where(leaf, -1, tree.children_left + offset))
+            # Leaves point right at themselves so the vectorized walk can run
+            # a fixed number of steps.
+            rights.append(np.where(leaf, np.arange(tree.node_count), tree.children_right) + offset)
+            values.append(counts[:, 1] / total)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            edges,
+            np.concatenate(features).astype(_smallest_uint(n_features - 1)),
+            np.concatenate(thresholds).astype(_smallest_uint(max(len(e) for e in edges))),
+            np.concatenate(lefts).astype(np.int32),
+            np.concatenate(rights).astype(np.int32),
+            np.concatenate(values).astype(np.float32),
+            np.asarray(roots, dtype=np.int32),
+            int(max_depth),
+        )
+
+    def bins(self, X: Any) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if np.isnan(X).any():
+            raise ValueError("QuantizedForest requires inputs without missing values")
+        return self.binner.bins(X).astype(self.bin_dtype)
+
+    def leaves(self, X: Any) -> np.ndarray:
+        bins = self.bins(X)
+        n = len(bins)
+        flat = bins.ravel()
+        row_offset = (np.arange(n, dtype=np.int64) * self.n_features_in_)[:, None]
+        left = np.where(self.left < 0, self.right, self.left)
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = flat[row_offset + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        # Leaves are float32; the sum over trees is carried in float64 like
+        # the forest's own average.
+        kernel = _kernel()
+        if kernel is not None:
+            arrays = (self.feature, self.threshold, self.left, self.right, self.value, self.roots)
+            total = kernel(self.bins(X), *arrays)
+        else:
+            total = self.value[self.leaves(X)].sum(axis=1, dtype=np.float64)
+        positive = total / len(self.roots)
+        return np.stack([1.0 - positive, positive], axis=1)
+
+    def predict(self, X: Any) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.feature, self.threshold, self.left, self.right, self.value, self.roots, *self.binner.thresholds)
+        return sum(a.nbytes for a in arrays)
+
+    def save(self, path: Path) -> None:
+        with open(path, "wb") as fh:
+            np.savez_compressed(
+                fh,
+                feature=self.feature,
+                threshold=self.threshold,
+                left=self.left,
+                right=self.right,
+                value=self.value,
+                roots=self.roots,
+                max_depth=np.int32(self.max_depth),
+                edge_counts=np.array([len(e) for e in self.binner.thresholds], dtype=np.int32),
+                edges=np.concatenate(self.binner.thresholds),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> QuantizedForest:
+        with np.load(path) as data:
+            return cls(
+                np.split(data["edges"], np.cumsum(data["edge_counts"])[:-1]),
+                data["feature"],
+                data["threshold"],
+                data["left"],
+                data["right"],
+                data["value"],
+                data["roots"],
+                int(data["max_depth"]),
+            )
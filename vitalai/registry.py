@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from artifacts import MODELS_DIRNAME
+
+REGISTRY_FILENAME = "registry.json"
+PRIMARY_CONDITION = "diabetes"
+
+
+@dataclass(frozen=True)
+class Condition:
+    name: str
+    label: str
+    data: str
+    target: str
+    features: tuple[str, ...]
+    zero_as_missing: tuple[str, ...] = ()
+    high_risk: float = 65.0
+    low_risk: float = 40.0
+    models_dir: str = ""
+
+    @property
+    def models_dirname(self) -> str:
+        # Versions live under models/<condition>/ unless the entry says
+        # otherwise; diabetes keeps the original models/ layout.
+        return self.models_dir or f"{MODELS_DIRNAME}/{self.name}"
+
+    def thresholds(self) -> dict[str, float]:
+        return {"high": self.high_risk, "low": self.low_risk}
+
+
+DIABETES = Condition(
+    name=PRIMARY_CONDITION,
+    label="Diabetes",
+    data="diabetes.csv",
+    target="Outcome",
+    features=(
+        "Pregnancies",
+        "Glucose",
+        "BloodPressure",
+        "SkinThickness",
+        "Insulin",
+        "BMI",
+        "DiabetesPedigreeFunction",
+        "Age",
+    ),
+    zero_as_missing=("Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI"),
+    models_dir=MODELS_DIRNAME,
+)
+
+
+def _condition(name: str, spec: dict[str, Any]) -> Condition:
+    return Condition(
+        name=name,
+        label=spec.get("label", name.replace("_", " ").title()),
+        data=spec["data"],
+        target=spec["target"],
+        features=tuple(spec["features"]),
+        zero_as_missing=tuple(spec.get("zero_as_missing", ())),
+        high_risk=float(spec.get("high_risk", 65.0)),
+        low_risk=float(spec.get("low_risk", 40.0)),
+        models_dir=spec.get("models_dir", ""),
+    )
+
+
+def load_registry(base_dir: Path) -> dict[str, Condition]:
+    path = base_dir / REGISTRY_FILENAME
+    if not path.exists():
+        return {DIABETES.name: DIABETES}
+    conditions = {name: _condition(name, spec) for name, spec in json.loads(path.read_text())["conditions"].items()}
+    if PRIMARY_CONDITION not in conditions:
+        raise ValueError(f"{path.name} must register the '{PRIMARY_CONDITION}' condition")
+    return conditions
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from engines import Engine
+
+PARAM_GRIDS: dict[str, dict[str, list[Any]]] = {
+    "random_forest": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [None, 6, 10],
+        "min_samples_leaf": [1, 3, 5],
+        "max_features": ["sqrt", 0.5],
+    },
+    "hist_gradient_boosting": {
+        "max_iter": [100, 200, 400],
+        "learning_rate": [0.03, 0.05, 0.1],
+        "max_leaf_nodes": [15, 31],
+        "min_samples_leaf": [10, 20, 40],
+    },
+}
+
+
+@dataclass
+class LeaderboardRow:
+    params: dict[str, Any]
+    mean_auc: float
+    std_auc: float
+    fit_seconds: float
+    predict_ms_per_row: float
+    cached_folds: int
+
+
+def candidate_params(engine: Engine, strategy: str, n_iter: int, seed: int) -> list[dict[str, Any]]:
+    grid = PARAM_GRIDS[engine.name]
+    keys = sorted(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    if strategy == "random":
+        # Sampling is seeded, so rerunning with a larger n_iter extends the
+        # same sequence and reuses every fold that has already been cached.
+        random.Random(seed).shuffle(combos)
+        combos = combos[:n_iter]
+    return combos
+
+
+def data_fingerprint(X: pd.DataFrame, y: pd.Series) -> str:
+    digest = hashlib.sha256()
+    digest.update(",".join(X.columns).encode())
+    digest.update(np.ascontiguousarray(X.to_numpy(dtype=np.float64)).tobytes())
+    digest.update(np.ascontiguousarray(y.to_numpy(dtype=np.int64)).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def fold_key(engine: Engine, params: dict[str, Any], fold: int, n_splits: int, seed: int, fingerprint: str) -> str:
+    payload = json.dumps(
+        {"engine": engine.name, "params": params, "fold": fold, "n_splits": n_splits, "seed": seed, "data": fingerprint},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def _run_fold(
+    engine_name: str,
+    params: dict[str, Any],
+    X: pd.DataFrame,
+    y: pd.Series,
+    train_idx: np.ndarray,
+    test_idx: np.ndarray,
+    seed: int,
+) -> dict[str, float]:
+    from engines import get_engine
+
+    model = get_engine(engine_name).build(seed)
+    model.set_params(**params)
+    start = time.perf_counter()
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prob = model.predict_proba(X.iloc[test_idx])[:, 1]
+    predict_seconds = time.perf_counter() - start
+    return {
+        "auc": float(roc_auc_score(y.iloc[test_idx], prob)),
+        "fit_seconds": fit_seconds,
+        "predict_ms_per_row": predict_seconds * 1000 / len(test_idx),
+    }
+
+
+def _write_atomic(path: Path, payload: dict[str, Any]) -> None:
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload))
+    os.replace(tmp, path)
+
+
+def run_search(
+    engine: Engine,
+    X: pd.DataFrame,
+    y: pd.Series,
+    cache_dir: Path,
+    strategy: str = "grid",
+    n_iter: int = 20,
+    n_splits: int = 5,
+    n_jobs: int | None = None,
+    seed: int = 42,
+) -> list[LeaderboardRow]:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fingerprint = data_fingerprint(X, y)
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X, y))
+    candidates = candidate_params(engine, strategy, n_iter, seed)
+
+    results: dict[tuple[int, int], dict[str, float]] = {}
+    cached: dict[int, int] = {}
+    pending = []
+    for ci, params in enumerate(candidates):
+        for fi in range(n_splits):
+            path = cache_dir / f"{fold_key(engine, params, fi, n_splits, seed, fingerprint)}.json"
+            if path.exists():
+                results[(ci, fi)] = json.loads(path.read_text())["result"]
+                cached[ci] = cached.get(ci, 0) + 1
+            else:
+                pending.append((ci, fi, path))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count()) as pool:
+            futures = {
+                pool.submit(_run_fold, engine.name, candidates[ci], X, y, folds[fi][0], folds[fi][1], seed): (ci, fi, path)
+                for ci, fi, path in pending
+            }
+            for future in as_completed(futures):
+                ci, fi, path = futures[future]
+                result = future.result()
+                # Each fold is persisted as soon as it finishes, so an
+                # interrupted search resumes from the last completed fold.
+                _write_atomic(path, {"engine": engine.name, "params": candidates[ci], "fold": fi, "result": result})
+                results[(ci, fi)] = result
+
+    leaderboard = []
+    for ci, params in enumerate(candidates):
+        fold_results = [results[(ci, fi)] for fi in range(n_splits)]
+        aucs = np.array([r["auc"] for r in fold_results])
+        leaderboard.append(
+            LeaderboardRow(
+                params=params,
+                mean_auc=float(aucs.mean()),
+                std_auc=float(aucs.std()),
+                fit_seconds=float(np.mean([r["fit_seconds"] for r in fold_results])),
+                predict_ms_per_row=float(np.mean([r["predict_ms_per_row"] for r in fold_results])),
+                cached_folds=cached.get(ci, 0),
+            )
+        )
+    leaderboard.sort(key=lambda row: (-row.mean_auc, row.fit_seconds))
+    return leaderboard
+
+
+def write_leaderboard(leaderboard: list[LeaderboardRow], path: Path) -> None:
+    path.write_text(json.dumps([asdict(row) for row in leaderboard], indent=2))
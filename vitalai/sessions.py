@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+import telemetry
+
+_names_lock = threading.Lock()
+_names: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+
+def intern_names(names: list[str] | tuple[str, ...]) -> tuple[str, ...]:
+    # Every result from one model shares a single tuple of feature names.
+    key = tuple(names)
+    with _names_lock:
+        return _names.setdefault(key, tuple(sys.intern(name) for name in key))
+
+
+class CompactResult:
+    # One analysis as held between reruns: SHAP values as a float32 array
+    # against shared feature names, the explanation zlib-compressed, and the
+    # remaining small fields as they are. expand() rebuilds the dict the
+    # renderers take.
+    __slots__ = ("summary", "features", "shap", "explanation", "nbytes")
+
+    def __init__(self, results: dict[str, Any]) -> None:
+        records = results["shap_records"]
+        self.summary = {k: v for k, v in results.items() if k not in ("shap_records", "explanation")}
+        self.features = intern_names([r["feature"] for r in records])
+        self.shap = np.fromiter((r["value"] for r in records), dtype=np.float32, count=len(records))
+        self.explanation = zlib.compress(results["explanation"].encode(), 6)
+        # Approximate: the containers this object owns, not the shared
+        # feature names or the interned strings in the summary.
+        self.nbytes = (
+            sys.getsizeof(self.summary)
+            + sum(sys.getsizeof(v) for v in self.summary.values())
+            + self.shap.nbytes
+            + len(self.explanation)
+        )
+
+    def expand(self) -> dict[str, Any]:
+        return {
+            **self.summary,
+            "shap_records": [{"feature": f, "value": float(v)} for f, v in zip(self.features, self.shap)],
+            "explanation": zlib.decompress(self.explanation).decode(),
+        }
+
+
+class SessionResults:
+    # Latest result per browser session, kept outside st.session_state so
+    # the total is bounded: at most max_sessions entries, and entries idle
+    # for idle_seconds are dropped. Entries are ordered by last access, so
+    # both evictions only ever pop from the front.
+    def __init__(self, max_sessions: int = 500, idle_seconds: float = 1800.0) -> None:
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._data: OrderedDict[str, tuple[float, CompactResult]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session_key: str, results: dict[str, Any]) -> None:
+        compact = CompactResult(results)
+        with self._lock:
+            self._data[session_key] = (time.monotonic(), compact)
+            self._data.move_to_end(session_key)
+            self._evict()
+        self._publish()
+
+    def get(self, session_key: str) -> dict[str, Any] | None:
+        with self._lock:
+            evicted = self._evict()
+            entry = self._data.get(session_key)
+            if entry is not None:
+                self._data[session_key] = (time.monotonic(), entry[1])
+                self._data.move_to_end(session_key)
+        if evicted:
+            self._publish()
+        return None if entry is None else entry[1].expand()
+
+    def _evict(self) -> bool:
+        cutoff = time.monotonic() - self.idle_seconds
+        evicted = False
+        while self._data:
+            key, (touched, _) = next(iter(self._data.items()))
+            if touched < cutoff:
+                reason = "idle"
+            elif len(self._data) > self.max_sessions:
+                reason = "capacity"
+            else:
+                break
+            del self._data[key]
+            telemetry.count(telemetry.SESSION_EVICTIONS, reason=reason)
+            evicted = True
+        return evicted
+
+    def nbytes(self, session_key: str) -> int:
+        entry = self._data.get(session_key)
+        return 0 if entry is None else entry[1].nbytes
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            sizes = [compact.nbytes for _, compact in self._data.values()]
+        return {
+            "sessions": len(sizes),
+            "total_bytes": sum(sizes),
+            "max_bytes": max(sizes, default=0),
+            "mean_bytes": sum(sizes) / len(sizes) if sizes else 0.0,
+        }
+
+    def _publish(self) -> None:
+        stats = self.stats()
+        telemetry.gauge(telemetry.SESSION_RESULTS, stats["sessions"])
+        for stat in ("total", "max", "mean"):
+            telemetry.gauge(telemetry.SESSION_RESULT_BYTES, stats[f"{stat}_bytes"], stat=stat)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import telemetry
+from artifacts import ModelStore
+from calibration import apply_calibration
+
+
+@dataclass(frozen=True)
+class ShadowJob:
+    primary_version: str
+    patient_inputs: dict[str, float]
+    primary_confidence: float
+    primary_prediction: int
+    primary_ms: float
+    primary_cached: bool = False
+
+
+@dataclass
+class ShadowRecord:
+    timestamp: str
+    primary_version: str
+    candidate_version: str
+    primary_confidence: float
+    candidate_confidence: float
+    primary_prediction: int
+    candidate_prediction: int
+    disagree: bool
+    primary_ms: float
+    primary_cached: bool
+    candidate_ms: float
+    latency_delta_ms: float | None
+    queue_wait_ms: float
+
+
+class ShadowScorer:
+    # Scores a copy of each analysis with the CANDIDATE model on one daemon
+    # thread. submit() never blocks: when the queue is full the job is dropped.
+    # The worker also holds back while busy() reports primary work in flight,
+    # so shadow inference does not compete with it for the interpreter.
+    def __init__(
+        self,
+        store: ModelStore,
+        log_path: Path,
+        max_queue: int = 64,
+        busy: Callable[[], bool] | None = None,
+        max_defer_seconds: float = 2.0,
+    ) -> None:
+        self.store = store
+        self.log_path = log_path
+        self.busy = busy
+        self.max_defer_seconds = max_defer_seconds
+        self._queue: queue.Queue[tuple[float, ShadowJob]] = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="vitalai-shadow", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: ShadowJob) -> bool:
+        try:
+            self._queue.put_nowait((time.perf_counter(), job))
+        except queue.Full:
+            telemetry.count(telemetry.SHADOW_DROPPED, reason="queue_full")
+            return False
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def join(self) -> None:
+        self._queue.join()
+
+    def _wait_until_idle(self) -> None:
+        if self.busy is None:
+            return
+        deadline = time.perf_counter() + self.max_defer_seconds
+        while self.busy() and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+    def _run(self) -> None:
+        while True:
+            enqueued_at, job = self._queue.get()
+            try:
+                self._wait_until_idle()
+                record = self._score(job, enqueued_at)
+                if record is not None:
+                    self._log(record)
+            except Exception:
+                telemetry.count(telemetry.SHADOW_DROPPED, reason="error")
+            finally:
+                self._queue.task_done()
+
+    def _score(self, job: ShadowJob, enqueued_at: float) -> ShadowRecord | None:
+        import pandas as pd
+
+        queue_wait_ms = (time.perf_counter() - enqueued_at) * 1000
+        try:
+            candidate = self.store.active()
+        except FileNotFoundError:
+            telemetry.count(telemetry.SHADOW_DROPPED, reason="no_candidate")
+            return None
+
+        input_df = pd.DataFrame([job.patient_inputs]).reindex(columns=candidate.feature_names)
+        start = time.perf_counter()
+        with telemetry.timed("shadow_predict"):
+            raw = float(candidate.scorer.predict_proba(input_df)[0][1])
+            probability = float(apply_calibration(raw, candidate.meta["calibration"]))
+        candidate_ms = (time.perf_counter() - start) * 1000
+
+        prediction = int(probability > 0.5)
+        disagree = prediction != job.primary_prediction
+        telemetry.count(telemetry.SHADOW_COMPARISONS, outcome="disagree" if disagree else "agree")
+        # A primary served from the threshold-bin cache ran no inference, so
+        # its time says nothing about the model; no delta is recorded then.
+        latency_delta_ms = None if job.primary_cached else round(candidate_ms - job.primary_ms, 4)
+        return ShadowRecord(
+            timestamp=datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            primary_version=job.primary_version,
+            candidate_version=candidate.version,
+            primary_confidence=round(job.primary_confidence, 4),
+            candidate_confidence=round(probability * 100.0, 4),
+            primary_prediction=job.primary_prediction,
+            candidate_prediction=prediction,
+            disagree=disagree,
+            primary_ms=round(job.primary_ms, 4),
+            primary_cached=job.primary_cached,
+            candidate_ms=round(candidate_ms, 4),
+            latency_delta_ms=latency_delta_ms,
+            queue_wait_ms=round(queue_wait_ms, 4),
+        )
+
+    def _log(self, record: ShadowRecord) -> None:
+        # Only the worker thread writes, so appends need no locking.
+        with self.log_path.open("a") as fh:
+            fh.write(json.dumps(asdict(record)) + "\n")
+
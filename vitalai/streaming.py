@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from drift import reference_profile
+
+# sklearn's Node struct (64 bytes) plus one float64 value per class.
+NODE_BYTES = 80
+# Copies held while a chunk is parsed, imputed, cast to float32 and bootstrapped.
+CHUNK_OVERHEAD = 6
+
+
+class QuantileSketch:
+    def __init__(self, capacity: int = 20_000, seed: int = 0) -> None:
+        self.capacity = capacity
+        self.count = 0
+        self._sample = np.empty(capacity, dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+        filled = min(self.count, self.capacity)
+        room = self.capacity - filled
+        head = values[:room]
+        self._sample[filled : filled + head.size] = head
+        tail = values[room:]
+        if tail.size:
+            seen = self.count + head.size + np.arange(tail.size)
+            slots = np.floor(self._rng.random(tail.size) * (seen + 1)).astype(np.int64)
+            keep = slots < self.capacity
+            self._sample[slots[keep]] = tail[keep]
+        self.count += values.size
+
+    @property
+    def sample(self) -> np.ndarray:
+        return self._sample[: min(self.count, self.capacity)]
+
+    @classmethod
+    def restore(cls, sample: np.ndarray, count: int, capacity: int = 20_000, seed: int = 0) -> QuantileSketch:
+        # Rebuilds a saved sketch. The RNG is reseeded from (seed, count), so
+        # a restored sketch keeps sampling deterministically.
+        sketch = cls(capacity, seed)
+        sketch._sample[: len(sample)] = sample
+        sketch.count = int(count)
+        sketch._rng = np.random.default_rng([seed, int(count)])
+        return sketch
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float("nan")
+        return float(np.quantile(self.sample, q))
+
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+
+def hash_unit(keys: np.ndarray, seed: int) -> np.ndarray:
+    # splitmix64 finaliser mapped to [0, 1); stable across runs and chunkings.
+    offset = np.uint64((seed * 0x9E3779B97F4A7C15) % (1 << 64))
+    x = np.asarray(keys, dtype=np.uint64) + offset
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+class StratifiedHashSplitter:
+    def __init__(self, classes: list[int], test_size: float, seed: int) -> None:
+        self.classes = list(classes)
+        self.test_size = test_size
+        self.seed = seed
+        self._offsets = {cls: 0 for cls in self.classes}
+
+    def test_mask(self, y: np.ndarray) -> np.ndarray:
+        # Each row is keyed by (class, ordinal within class), so every stratum
+        # is split independently and the same row always lands on the same side.
+        mask = np.zeros(y.shape[0], dtype=bool)
+        for i, cls in enumerate(self.classes):
+            rows = np.flatnonzero(y == cls)
+            ordinals = self._offsets[cls] + np.arange(rows.size, dtype=np.uint64)
+            self._offsets[cls] += rows.size
+            mask[rows] = hash_unit(ordinals, self.seed + i) < self.test_size
+        return mask
+
+
+@dataclass
+class StreamingMetrics:
+    bins: int = 2000
+    tp: int = 0
+    fp: int = 0
+    tn: int = 0
+    fn: int = 0
+    pos_hist: np.ndarray = field(init=False)
+    neg_hist: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.pos_hist = np.zeros(self.bins, dtype=np.int64)
+        self.neg_hist = np.zeros(self.bins, dtype=np.int64)
+
+    def update(self, y_true: np.ndarray, y_prob: np.ndarray) -> None:
+        y_true = np.asarray(y_true).astype(bool)
+        y_pred = np.asarray(y_prob) > 0.5
+        self.tp += int(np.sum(y_true & y_pred))
+        self.fp += int(np.sum(~y_true & y_pred))
+        self.tn += int(np.sum(~y_true & ~y_pred))
+        self.fn += int(np.sum(y_true & ~y_pred))
+        idx = np.clip((np.asarray(y_prob) * self.bins).astype(np.int64), 0, self.bins - 1)
+        self.pos_hist += np.bincount(idx[y_true], minlength=self.bins)
+        self.neg_hist += np.bincount(idx[~y_true], minlength=self.bins)
+
+    def accuracy(self) -> float:
+        total = self.tp + self.fp + self.tn + self.fn
+        return (self.tp + self.tn) / total if total else 0.0
+
+    def precision(self) -> float:
+        return self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0
+
+    def recall(self) -> float:
+        return self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0
+
+    def f1(self) -> float:
+        p, r = self.precision(), self.recall()
+        return 2 * p * r / (p + r) if p + r else 0.0
+
+    def auc(self) -> float:
+        n_pos, n_neg = self.pos_hist.sum(), self.neg_hist.sum()
+        if n_pos == 0 or n_neg == 0:
+            return float("nan")
+        neg_below = np.cumsum(self.neg_hist) - self.neg_hist
+        return float(np.sum(self.pos_hist * (neg_below + 0.5 * self.neg_hist)) / (n_pos * n_neg))
+
+    def confusion_matrix(self) -> np.ndarray:
+        return np.array([[self.tn, self.fp], [self.fn, self.tp]])
+
+
+@dataclass
+class StreamingResult:
+    model: RandomForestClassifier
+    feature_names: list[str]
+    medians: dict[str, float]
+    metrics: StreamingMetrics
+    n_rows: int
+    n_chunks: int
+    chunksize: int
+    drift_reference: dict[str, Any]
+
+
+class StreamingTrainer:
+    def __init__(
+        self,
+        target: str,
+        zero_as_missing: list[str],
+        n_estimators: int = 200,
+        test_size: float = 0.2,
+        random_state: int = 42,
+        chunksize: int | None = None,
+        memory_cap_mb: float = 256.0,
+        features: list[str] | None = None,
+    ) -> None:
+        self.target = target
+        self.zero_as_missing = list(zero_as_missing)
+        self.features = list(features) if features else None
+        self.n_estimators = n_estimators
+        self.test_size = test_size
+        self.random_state = random_state
+        self.chunksize = chunksize
+        self.memory_cap_bytes = int(memory_cap_mb * 1024 * 1024)
+
+    def _chunks(self, data_path: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+        yield from pd.read_csv(data_path, chunksize=chunksize)
+
+    def _resolve_chunksize(self, data_path: Path) -> int:
+        if self.chunksize:
+            return self.chunksize
+        n_cols = len(pd.read_csv(data_path, nrows=1).columns)
+        # Half of the cap goes to the chunk working set, half to the forest.
+        return max(1_000, self.memory_cap_bytes // 2 // (n_cols * 8 * CHUNK_OVERHEAD))
+
+    def _max_leaf_nodes(self, n_trees: int) -> int:
+        forest_budget = self.memory_cap_bytes // 2
+        return max(64, forest_budget // (n_trees * 2 * NODE_BYTES))
+
+    def fit(self, data_path: Path) -> StreamingResult:
+        chunksize = self._resolve_chunksize(data_path)
+
+        # Pass 1: approximate non-zero medians, row count and class counts.
+        sketches = {col: QuantileSketch(seed=self.random_state + i) for i, col in enumerate(self.zero_as_missing)}
+        class_counts: dict[int, int] = {}
+        n_rows = n_chunks = 0
+        feature_names: list[str] = []
+        for chunk in self._chunks(data_path, chunksize):
+            if self.target not in chunk.columns:
+                raise ValueError(f"Expected an '{self.target}' column in {data_path.name}")
+            for col in self.zero_as_missing:
+                if col not in chunk.columns:
+                    raise ValueError(f"Missing expected feature column: {col}")
+                values = chunk[col].to_numpy()
+                sketches[col].update(values[values != 0])
+            for cls, count in chunk[self.target].value_counts().items():
+                class_counts[int(cls)] = class_counts.get(int(cls), 0) + int(count)
+            feature_names = self.features or [c for c in chunk.columns if c != self.target]
+            missing = [c for c in feature_names if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"Missing expected feature column: {missing[0]}")
+            n_rows += len(chunk)
+            n_chunks += 1
+
+        if len(class_counts) < 2:
+            raise ValueError("Streaming training needs at least two outcome classes")
+        medians = {col: sketch.median() for col, sketch in sketches.items()}
+        classes = sorted(class_counts)
+
+        # Pass 2: grow the forest chunk by chunk with warm_start. The
+        # n_estimators trees are spread evenly over the chunks; a chunk owed no
+        # tree (more chunks than trees) or holding a single class carries its
+        # rows forward to the next fit.
+        model = RandomForestClassifier(
+            n_estimators=0,
+            warm_start=True,
+            max_leaf_nodes=self._max_leaf_nodes(self.n_estimators),
+            random_state=self.random_state,
+        )
+        splitter = StratifiedHashSplitter(classes, self.test_size, self.random_state)
+        rng = np.random.default_rng(self.random_state)
+        pending: tuple[pd.DataFrame, np.ndarray] | None = None
+        last_train: pd.DataFrame | None = None
+        owed = 0
+        for index, chunk in enumerate(self._chunks(data_path, chunksize)):
+            chunk = self._impute(chunk, medians)
+            test_mask = splitter.test_mask(chunk[self.target].to_numpy())
+            train = chunk.loc[~test_mask]
+            keys = rng.random(len(train))
+            owed += (index + 1) * self.n_estimators // n_chunks - index * self.n_estimators // n_chunks
+            if pending is not None:
+                train, keys = self._carry(pending, (train, keys), chunksize)
+                pending = None
+            if owed == 0 or train[self.target].nunique() < 2:
+                pending = (train, keys)
+                continue
+            model.n_estimators += owed
+            owed = 0
+            model.fit(train[feature_names], train[self.target])
+            last_train = train
+
+        if pending is not None:
+            if last_train is None:
+                raise ValueError("Training rows never contained both outcome classes")
+            # The trailing chunks held a single class: fit the trees they are
+            # owed on their rows together with the last fitted chunk's.
+            train = pd.concat([last_train, pending[0]], ignore_index=True)
+            model.n_estimators += owed
+            model.fit(train[feature_names], train[self.target])
+
+        # Pass 3: score the hashed test split without materialising it, and
+        # sample the training rows for the drift reference distribution.
+        metrics = StreamingMetrics()
+        splitter = StratifiedHashSplitter(classes, self.test_size, self.random_state)
+        reference = {col: QuantileSketch(seed=self.random_state + i) for i, col in enumerate(feature_names)}
+        for chunk in self._chunks(data_path, chunksize):
+            chunk = self._impute(chunk, medians)
+            test_mask = splitter.test_mask(chunk[self.target].to_numpy())
+            for col, sketch in reference.items():
+                sketch.update(chunk.loc[~test_mask, col].to_numpy())
+            test = chunk.loc[test_mask]
+            if len(test):
+                metrics.update(test[self.target].to_numpy(), model.predict_proba(test[feature_names])[:, 1])
+
+        return StreamingResult(
+            model=model,
+            feature_names=feature_names,
+            medians=medians,
+            metrics=metrics,
+            n_rows=n_rows,
+            n_chunks=n_chunks,
+            chunksize=chunksize,
+            drift_reference=reference_profile(
+                {col: sketch.sample for col, sketch in reference.items()}, next(iter(reference.values())).count
+            ),
+        )
+
+    def _carry(
+        self, pending: tuple[pd.DataFrame, np.ndarray], current: tuple[pd.DataFrame, np.ndarray], limit: int
+    ) -> tuple[pd.DataFrame, np.ndarray]:
+        # Carried rows are capped at one chunk. Every row drew a random key and
+        # the smallest keys are kept, a uniform sample of all the rows carried
+        # so far, so a long run of chunks owed no tree stays within the cap.
+        rows = pd.concat([pending[0], current[0]], ignore_index=True)
+        keys = np.concatenate([pending[1], current[1]])
+        if len(rows) <= limit:
+            return rows, keys
+        keep = np.sort(np.argpartition(keys, limit)[:limit])
+        return rows.iloc[keep].reset_index(drop=True), keys[keep]
+
+    def _impute(self, chunk: pd.DataFrame, medians: dict[str, float]) -> pd.DataFrame:
+        for col, median in medians.items():
+            chunk[col] = chunk[col].replace(0, median)
+        return chunk
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+ENABLED = os.environ.get("VITALAI_METRICS", "1") != "0"
+METRICS_HOST = os.environ.get("VITALAI_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("VITALAI_METRICS_PORT", "9464"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self._values: dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in sorted(self.samples().items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum.
+        self._counts: dict[LabelKey, list[int]] = {}
+        self._sums: dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def snapshot(self) -> dict[LabelKey, tuple[list[int], float]]:
+        with self._lock:
+            return {key: (list(counts), self._sums[key]) for key, counts in self._counts.items()}
+
+    def quantile(self, q: float, counts: list[int]) -> float:
+        # Same linear interpolation inside the bucket as PromQL's histogram_quantile.
+        total = sum(counts)
+        if total == 0:
+            return float("nan")
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Counter | Gauge | Histogram) -> Any:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram(
+    "vitalai_stage_duration_seconds", "Wall time of each inference pipeline stage."
+)
+CACHE_HITS = REGISTRY.counter("vitalai_cache_hits_total", "Cache lookups served without recomputation.")
+CACHE_MISSES = REGISTRY.counter("vitalai_cache_misses_total", "Cache lookups that had to compute the value.")
+LLM_FALLBACKS = REGISTRY.counter(
+    "vitalai_llm_fallbacks_total", "Explanations served from the template instead of Gemini."
+)
+LLM_RETRIES = REGISTRY.counter("vitalai_llm_retries_total", "Gemini requests retried after a transient failure.")
+ANALYSES = REGISTRY.counter("vitalai_analyses_total", "Completed Run AI Agent analyses.")
+MODEL_RELOADS = REGISTRY.counter("vitalai_model_reloads_total", "Background model swaps after a pointer change.")
+SHADOW_COMPARISONS = REGISTRY.counter(
+    "vitalai_shadow_comparisons_total", "Requests re-scored by the candidate model, by agreement with primary."
+)
+SHADOW_DROPPED = REGISTRY.counter("vitalai_shadow_dropped_total", "Shadow jobs skipped, by reason.")
+AUDIT_RECORDS = REGISTRY.counter("vitalai_audit_records_total", "Audit log records, by written/dropped/error.")
+DRIFT_DROPPED = REGISTRY.counter("vitalai_drift_dropped_total", "Requests not fed to the drift monitor (queue full).")
+DEDUPLICATED = REGISTRY.counter(
+    "vitalai_deduplicated_analyses_total", "Analyses served by joining an identical in-flight analysis."
+)
+SESSION_EVICTIONS = REGISTRY.counter("vitalai_session_evictions_total", "Session results dropped, by idle/capacity.")
+SESSION_RESULTS = REGISTRY.gauge("vitalai_session_results", "Sessions currently holding an analysis result.")
+SESSION_RESULT_BYTES = REGISTRY.gauge(
+    "vitalai_session_result_bytes", "Approximate memory held by session results, by total/max/mean per session."
+)
+PROFILES = REGISTRY.counter("vitalai_profiles_total", "Profiled analysis runs, by written/busy/error.")
+
+
+class _StageTimer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, stage=self.stage)
+
+
+_NULL = nullcontext()
+
+
+def timed(stage: str) -> Any:
+    if not ENABLED:
+        return _NULL
+    return _StageTimer(stage)
+
+
+def count(counter: Counter, amount: float = 1.0, **labels: Any) -> None:
+    if ENABLED:
+        counter.inc(amount, **labels)
+
+
+def gauge(metric: Gauge, value: float, **labels: Any) -> None:
+    if ENABLED:
+        metric.set(value, **labels)
+
+
+_local = threading.local()
+
+
+def mark_cache_miss() -> None:
+    _local.missed = True
+
+
+class _CacheLookup:
+    __slots__ = ("cache",)
+
+    def __init__(self, cache: str) -> None:
+        self.cache = cache
+
+    def __enter__(self) -> None:
+        _local.missed = False
+
+    def __exit__(self, *exc: object) -> None:
+        counter = CACHE_MISSES if getattr(_local, "missed", False) else CACHE_HITS
+        counter.inc(cache=self.cache)
+
+
+def cache_lookup(cache: str) -> Any:
+    # Cached bodies call mark_cache_miss(); anything else counts as a hit.
+    if not ENABLED:
+        return _NULL
+    return _CacheLookup(cache)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+_server: ThreadingHTTPServer | None = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> ThreadingHTTPServer | None:
+    global _server
+    if not ENABLED:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                return None
+            threading.Thread(target=_server.serve_forever, name="vitalai-metrics", daemon=True).start()
+    return _server
+
+
+def stage_summary() -> list[dict[str, Any]]:
+    rows = []
+    for key, (counts, total) in sorted(STAGE_SECONDS.snapshot().items()):
+        n = sum(counts)
+        rows.append(
+            {
+                "stage": dict(key).get("stage", ""),
+                "count": n,
+                "mean_ms": total / n * 1000 if n else 0.0,
+                "p50_ms": STAGE_SECONDS.quantile(0.5, counts) * 1000,
+                "p95_ms": STAGE_SECONDS.quantile(0.95, counts) * 1000,
+            }
+        )
+    return rows
+
+
+def counter_summary() -> list[dict[str, Any]]:
+    rows = []
+    for counter in (
+        ANALYSES,
+        DEDUPLICATED,
+        CACHE_HITS,
+        CACHE_MISSES,
+        LLM_FALLBACKS,
+        LLM_RETRIES,
+        MODEL_RELOADS,
+        SHADOW_COMPARISONS,
+        SHADOW_DROPPED,
+        AUDIT_RECORDS,
+        DRIFT_DROPPED,
+        SESSION_EVICTIONS,
+        SESSION_RESULTS,
+        SESSION_RESULT_BYTES,
+        PROFILES,
+    ):
+        for key, value in sorted(counter.samples().items()):
+            labels = ", ".join(f"{k}={v}" for k, v in key)
+            rows.append({"metric": counter.name, "labels": labels, "value": int(value)})
+    return rows
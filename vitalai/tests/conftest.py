@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+DATA_PATH = APP_DIR / "diabetes.csv"
+
+# The app modules, and the benchmarks' stub servers.
+for path in (APP_DIR, APP_DIR / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+# Importing app must not start the Gemini warm-up, the metrics server or
+# write audit records into the working tree.
+os.environ.setdefault("VITALAI_WARMUP", "0")
+os.environ.setdefault("VITALAI_METRICS_PORT", "0")
+os.environ.setdefault("VITALAI_AUDIT", "0")
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import train
+from binning import ResultCache, ThresholdBinner
+from conftest import DATA_PATH
+from engines import ENGINES, positive_shap
+
+
+@pytest.fixture(scope="module", params=sorted(ENGINES))
+def fitted(request):
+    df = train.load_dataset(DATA_PATH)
+    df = train.impute_zero_as_missing(df, train.compute_medians(df))
+    X = df.drop(columns=[train.TARGET])
+    engine = ENGINES[request.param]
+    model = engine.build(42).fit(X, df[train.TARGET])
+    binner = ThresholdBinner.from_model(model, X.shape[1])
+    assert binner is not None
+    return model, engine.explainer(model), binner, X
+
+
+def edge_probes(binner: ThresholdBinner, X: pd.DataFrame) -> pd.DataFrame:
+    # Every split threshold, exactly and one ulp either side in float64 and
+    # in float32 (what sklearn trees compare), all five set on the same
+    # dataset row so the variants of one threshold are adjacent.
+    base = X.to_numpy(dtype=np.float64)
+    rows = []
+    for j, edges in enumerate(binner.thresholds):
+        f32 = edges.astype(np.float32)
+        values = np.stack(
+            [
+                edges,
+                np.nextafter(edges, -np.inf),
+                np.nextafter(edges, np.inf),
+                np.nextafter(f32, np.float32(-np.inf)).astype(np.float64),
+                np.nextafter(f32, np.float32(np.inf)).astype(np.float64),
+            ],
+            axis=1,
+        ).ravel()
+        block = base[np.repeat(np.arange(len(edges)) % len(base), 5)].copy()
+        block[:, j] = values
+        rows.append(block)
+    return pd.DataFrame(np.concatenate(rows), columns=X.columns)
+
+
+def test_bin_keys_are_exact_cache_keys(fitted):
+    model, explainer, binner, X = fitted
+    probes = pd.concat([X.astype(np.float64), edge_probes(binner, X)], ignore_index=True)
+    keys = binner.bins(probes.to_numpy())
+    # A probe whose key no other probe has can never be a cache hit.
+    _, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    shared = counts[inverse.ravel()] > 1
+    probes, keys = probes[shared].reset_index(drop=True), keys[shared]
+    prob = model.predict_proba(probes)[:, 1]
+    shap_values = positive_shap(explainer, probes)
+
+    cache = ResultCache(maxsize=len(probes))
+    hits = 0
+    for i, key in enumerate(map(tuple, keys)):
+        cached = cache.get(key)
+        if cached is None:
+            cache.put(key, (prob[i], shap_values[i]))
+            continue
+        hits += 1
+        assert cached[0] == prob[i], f"probability differs for probe {i}"
+        assert np.array_equal(cached[1], shap_values[i]), f"SHAP differs for probe {i}"
+    # The edge probes at t and t - ulp share a bin, so the cache is exercised.
+    assert hits > len(probes) // 3
+
+
+def test_score_patient_matches_the_raw_model(fitted):
+    import app
+
+    model, explainer, binner, X = fitted
+    probes = pd.concat(
+        [X.astype(np.float64), edge_probes(binner, X).sample(300, random_state=0)], ignore_index=True
+    )
+    meta = {"condition": "test", "version": f"binning-{type(model).__name__}", "calibration": None}
+    feature_names = list(X.columns)
+    cache = ResultCache()
+    hits = 0
+    for i, row in enumerate(probes.to_dict("records")):
+        raw = app.score_patient(model, explainer, feature_names, meta, row)
+        binned = app.score_patient(model, explainer, feature_names, meta, row, binner, cache)
+        hits += binned["predict_cached"]
+        assert binned["confidence"] == raw["confidence"], f"probability differs for probe {i}"
+        assert binned["shap_records"] == raw["shap_records"], f"SHAP differs for probe {i}"
+    assert hits > 0
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import numpy as np
+
+from calibration import select_calibration
+
+
+def test_well_calibrated_scores_keep_no_map():
+    rng = np.random.default_rng(0)
+    scores = rng.uniform(0.0, 1.0, 4000)
+    y = (rng.uniform(0.0, 1.0, scores.size) < scores).astype(int)
+    results = select_calibration(scores, y)
+    assert min(results, key=results.get) == "none"
+
+
+def test_squashed_scores_pick_a_map():
+    # Scores squashed towards 0.5 are underconfident; either map stretches
+    # them back out.
+    rng = np.random.default_rng(0)
+    truth = rng.uniform(0.0, 1.0, 4000)
+    y = (rng.uniform(0.0, 1.0, truth.size) < truth).astype(int)
+    results = select_calibration(0.4 + 0.2 * truth, y)
+    assert min(results, key=results.get) in ("isotonic", "sigmoid")
+    assert min(results["isotonic"], results["sigmoid"]) < results["none"] - 0.01
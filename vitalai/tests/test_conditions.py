@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from artifacts import POINTER, ModelStore, read_pointer
+from conftest import APP_DIR, DATA_PATH
+from registry import DIABETES, PRIMARY_CONDITION, load_registry
+
+# A fixture condition derived from diabetes.csv: the label comes from a
+# column the model is not given, so it needs a model of its own.
+SECOND = "hypertension"
+
+
+def train_condition(base_dir, name: str) -> None:
+    subprocess.run(
+        [sys.executable, str(APP_DIR / "train.py"), "--condition", name, "--output-dir", str(base_dir),
+         "--calibration", "none", "--bootstrap", "0"],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+@pytest.fixture(scope="module")
+def registry_dir(tmp_path_factory):
+    base_dir = tmp_path_factory.mktemp("conditions")
+    df = pd.read_csv(DATA_PATH)
+    features = [c for c in DIABETES.features if c != "BloodPressure"]
+    frame = df[features].copy()
+    frame["Label"] = (df["BloodPressure"] >= 85).astype(int)
+    frame.to_csv(base_dir / f"{SECOND}.csv", index=False)
+    conditions = {
+        PRIMARY_CONDITION: {
+            "label": DIABETES.label,
+            "data": str(DATA_PATH),
+            "target": DIABETES.target,
+            "features": list(DIABETES.features),
+            "zero_as_missing": list(DIABETES.zero_as_missing),
+            "models_dir": DIABETES.models_dir,
+        },
+        SECOND: {
+            "data": f"{SECOND}.csv",
+            "target": "Label",
+            "features": features,
+            "zero_as_missing": [c for c in DIABETES.zero_as_missing if c in features],
+            "high_risk": 60.0,
+            "low_risk": 30.0,
+        },
+    }
+    (base_dir / "registry.json").write_text(json.dumps({"conditions": conditions}, indent=2))
+    for name in conditions:
+        train_condition(base_dir, name)
+    return base_dir
+
+
+@pytest.fixture
+def patient():
+    row = pd.read_csv(DATA_PATH).iloc[0]
+    return {col: float(v) for col, v in row.items() if col != DIABETES.target}
+
+
+def stores(base_dir) -> dict[str, ModelStore]:
+    return {
+        name: ModelStore(base_dir, models_dirname=condition.models_dirname)
+        for name, condition in load_registry(base_dir).items()
+    }
+
+
+def test_each_condition_has_its_own_pointer(registry_dir):
+    registry = load_registry(registry_dir)
+    assert set(registry) == {PRIMARY_CONDITION, SECOND}
+    dirs = {name: registry_dir / condition.models_dirname for name, condition in registry.items()}
+    assert dirs[PRIMARY_CONDITION] != dirs[SECOND]
+    assert all((d / POINTER).exists() for d in dirs.values())
+
+    loaded = {name: store.active() for name, store in stores(registry_dir).items()}
+    assert loaded[PRIMARY_CONDITION].version == read_pointer(dirs[PRIMARY_CONDITION])
+    assert loaded[SECOND].version == read_pointer(dirs[SECOND])
+    assert "BloodPressure" in loaded[PRIMARY_CONDITION].feature_names
+    assert "BloodPressure" not in loaded[SECOND].feature_names
+    assert loaded[SECOND].meta["risk_thresholds"] == {"high": 60.0, "low": 30.0}
+
+
+def test_app_scores_each_condition_independently(registry_dir, patient, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "BASE_DIR", registry_dir)
+    app.get_registry.clear()
+    app.get_model_stores.clear()
+    try:
+        primary = app.load_active_model()
+        others = app.load_condition_models(patient)
+        assert set(others) == {SECOND}
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            results = app.run_analysis(
+                primary.scorer, primary.explainer, primary.feature_names, primary.meta, patient,
+                others=others, pool=pool, forest=primary.model,
+            )
+        cards = {card["condition"]: card for card in results["conditions"]}
+        assert set(cards) == {PRIMARY_CONDITION, SECOND}
+        # Scoring alongside the others gives what each model gives on its own.
+        for name, loaded in {PRIMARY_CONDITION: primary, **others}.items():
+            alone = app.score_condition(loaded, patient, None)
+            assert cards[name]["confidence"] == alone["confidence"]
+            assert cards[name]["version"] == loaded.version
+    finally:
+        for store in app.get_model_stores().values():
+            store.stop()
+        app.get_registry.clear()
+        app.get_model_stores.clear()
+
+
+def test_retraining_one_condition_leaves_the_other(registry_dir, patient):
+    before = {name: store.active() for name, store in stores(registry_dir).items()}
+    train_condition(registry_dir, SECOND)
+    after = {name: store.active() for name, store in stores(registry_dir).items()}
+
+    assert after[SECOND].version != before[SECOND].version
+    assert after[PRIMARY_CONDITION].version == before[PRIMARY_CONDITION].version
+    frame = pd.DataFrame([patient])[before[PRIMARY_CONDITION].feature_names]
+    assert (
+        after[PRIMARY_CONDITION].scorer.predict_proba(frame) == before[PRIMARY_CONDITION].scorer.predict_proba(frame)
+    ).all()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from conftest import DATA_PATH
+from drift import DriftMonitor, reference_profile
+
+
+def drift_threads() -> int:
+    return sum(thread.name == "vitalai-drift" for thread in threading.enumerate())
+
+
+def reference(shift: float = 0.0) -> dict:
+    X = pd.read_csv(DATA_PATH).drop(columns=["Outcome"]).astype(float) + shift
+    return reference_profile(X, len(X))
+
+
+def test_close_stops_the_worker():
+    before = drift_threads()
+    monitor = DriftMonitor(reference())
+    assert drift_threads() == before + 1
+    assert monitor.observe({"Glucose": 120.0})
+    monitor.join()
+    monitor.close()
+    assert drift_threads() == before
+    assert not monitor.observe({"Glucose": 120.0})
+    monitor.close()
+
+
+def test_reset_switches_reference_and_keeps_one_worker():
+    monitor = DriftMonitor(reference(), version="v1")
+    threads = drift_threads()
+    for value in np.linspace(80.0, 180.0, 50):
+        monitor.observe({"Glucose": float(value)})
+    monitor.join()
+    assert monitor.observed == 50
+
+    shifted = reference(shift=10.0)
+    monitor.reset(shifted, "v2")
+    assert (monitor.version, monitor.observed, monitor.reference) == ("v2", 0, shifted)
+    monitor.observe({"Glucose": 120.0})
+    monitor.join()
+    assert monitor.observed == 1
+    assert drift_threads() == threads
+    monitor.close()
+
+
+def test_app_hot_swap_reuses_the_monitor():
+    import app
+
+    first = app.get_drift_monitor("v1", reference())
+    threads = drift_threads()
+    for i in range(2, 6):
+        monitor = app.get_drift_monitor(f"v{i}", reference(shift=float(i)))
+        assert monitor is first and monitor.version == f"v{i}"
+    assert app.get_drift_monitor("v5", reference()) is first
+    assert drift_threads() == threads
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import llm_async
+import telemetry
+from llm_async import GeminiClient, explain_many, explain_many_async, parse_retry_after
+from stub_gemini_server import StubGeminiServer
+
+
+def run_stub(jobs, base_url=None, script=None, retry_after=None, **kwargs):
+    # One explain_many_async run against a fresh stub that answers instantly
+    # and only fails where the script says so.
+    async def run():
+        server = StubGeminiServer(latency_s=0.0, jitter_s=0.0, error_rate=0.0, retry_after=retry_after, script=script)
+        url = base_url or await server.start()
+        client = GeminiClient("stub-key", base_url=url, pool_size=kwargs.get("concurrency", 8), timeout=5.0)
+        try:
+            return server, await explain_many_async(jobs, client, **kwargs)
+        finally:
+            await client.aclose()
+            await server.stop()
+
+    return asyncio.run(run())
+
+
+def gaps(server: StubGeminiServer) -> list[float]:
+    return [b - a for a, b in zip(server.arrivals, server.arrivals[1:])]
+
+
+def patient_jobs(n: int) -> list[tuple[str, str]]:
+    return [(f"Explain the screening result for patient {i}.", f"fallback {i}") for i in range(n)]
+
+
+@pytest.mark.parametrize("value, expected", [("3", 3.0), ("1.5", 1.5), ("0", 0.0), ("-2", 0.0)])
+def test_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_retry_after_http_date():
+    future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 28.0 <= parse_retry_after(future) <= 30.0
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+    assert parse_retry_after(past) == 0.0
+
+
+@pytest.mark.parametrize("value", [None, "", "soon", "inf", "nan", "Wed, 99 Foo 2026 25:00:00 GMT"])
+def test_retry_after_garbage_is_ignored(value):
+    assert parse_retry_after(value) is None
+
+
+def test_token_bucket_caps_the_request_rate():
+    rate, burst = 20.0, 5
+    start = time.monotonic()
+    server, results = run_stub(patient_jobs(30), concurrency=8, rate=rate, burst=burst)
+    elapsed = time.monotonic() - start
+
+    assert all(text.startswith("Stub explanation") for text in results)
+    # The burst goes out at once; the other 25 requests wait for tokens.
+    assert elapsed >= (30 - burst) / rate * 0.95
+    window = 0.5
+    for t in server.arrivals:
+        in_window = sum(t <= other < t + window for other in server.arrivals)
+        assert in_window <= burst + rate * window + 1
+
+
+def test_429_waits_for_retry_after():
+    retries = telemetry.LLM_RETRIES.value(reason="429")
+    server, results = run_stub(patient_jobs(1), script=[429, 429], retry_after="0.4", base_delay=0.001)
+
+    assert results[0].startswith("Stub explanation")
+    assert server.requests == 3
+    assert telemetry.LLM_RETRIES.value(reason="429") - retries == 2
+    # The jittered backoff is at most 1-2 ms here, so the wait is Retry-After's.
+    assert all(gap >= 0.39 for gap in gaps(server))
+
+
+def test_5xx_backoff_is_jittered_and_exponential(monkeypatch):
+    draws = []
+
+    def uniform(lo, hi):
+        draws.append((lo, hi))
+        return hi
+
+    monkeypatch.setattr(llm_async.random, "uniform", uniform)
+    server, results = run_stub(patient_jobs(1), script=[503, 500, 502], base_delay=0.05, max_delay=0.15)
+
+    assert results[0].startswith("Stub explanation")
+    assert server.requests == 4
+    # Full jitter over a doubling ceiling, capped at max_delay.
+    assert draws == [(0.0, 0.05), (0.0, 0.1), (0.0, 0.15)]
+    assert all(gap >= hi * 0.95 for gap, (_, hi) in zip(gaps(server), draws))
+
+
+def test_exhausted_retries_fall_back_per_item():
+    from app import fallback_explanation
+
+    fallback = fallback_explanation(72.0, "- Glucose: SHAP +0.1200", 1)
+    jobs = [("first patient", fallback), ("second patient", "unused fallback")]
+    retries = telemetry.LLM_RETRIES.value(reason="503")
+    exhausted = telemetry.LLM_FALLBACKS.value(reason="retries_exhausted")
+    server, results = run_stub(jobs, script=[503, 503, 503], concurrency=1, max_attempts=3, base_delay=0.001)
+
+    assert results[0] == fallback
+    # Only the failing row falls back; the next one is served.
+    assert results[1].startswith("Stub explanation")
+    assert server.requests == 4
+    assert telemetry.LLM_RETRIES.value(reason="503") - retries == 2
+    assert telemetry.LLM_FALLBACKS.value(reason="retries_exhausted") - exhausted == 1
+
+
+def test_client_errors_fall_back_without_retrying():
+    errors = telemetry.LLM_FALLBACKS.value(reason="error")
+    server, results = run_stub(patient_jobs(1), script=[400], base_delay=0.001)
+
+    assert results == ["fallback 0"]
+    assert server.requests == 1
+    assert telemetry.LLM_FALLBACKS.value(reason="error") - errors == 1
+
+
+def test_unreachable_server_falls_back():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    retries = telemetry.LLM_RETRIES.value(reason="connection")
+    _, results = run_stub(patient_jobs(2), base_url=f"http://127.0.0.1:{port}", max_attempts=2, base_delay=0.001)
+
+    assert results == ["fallback 0", "fallback 1"]
+    assert telemetry.LLM_RETRIES.value(reason="connection") - retries == 2
+
+
+def test_no_api_key_returns_the_fallbacks(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    no_client = telemetry.LLM_FALLBACKS.value(reason="no_client")
+
+    assert explain_many(patient_jobs(3)) == ["fallback 0", "fallback 1", "fallback 2"]
+    assert telemetry.LLM_FALLBACKS.value(reason="no_client") - no_client == 3
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import train
+from conftest import DATA_PATH
+from quantize import QuantizedForest
+
+
+@pytest.fixture(scope="module")
+def split():
+    raw = pd.read_csv(DATA_PATH)
+    X, y = raw.drop(columns=["Outcome"]), raw["Outcome"]
+    # Two fully grown trees vote 0, 0.5 or 1, so many rows are exact ties.
+    model = RandomForestClassifier(n_estimators=2, random_state=0).fit(X.iloc[:600], y.iloc[:600])
+    return model, X.iloc[600:]
+
+
+def nudged(monkeypatch, shift):
+    original = QuantizedForest.predict_proba
+
+    def predict_proba(self, X):
+        proba = original(self, X).copy()
+        proba[:, 1] += shift(proba[:, 1])
+        proba[:, 0] = 1.0 - proba[:, 1]
+        return proba
+
+    monkeypatch.setattr(QuantizedForest, "predict_proba", predict_proba)
+
+
+def test_rounding_at_an_exact_tie_still_exports(split, monkeypatch):
+    model, X_check = split
+    assert np.any(model.predict_proba(X_check)[:, 1] == 0.5)
+    # float32 rounding that lands a 0.5 tie just above it.
+    nudged(monkeypatch, lambda p: np.where(p == 0.5, 1e-8, 0.0))
+
+    quantized, summary = train.quantize(model, X_check)
+
+    assert quantized is not None and summary["exported"]
+    assert summary["ties"] > 0 and summary["decision_mismatches"] == 0
+
+
+def test_a_real_disagreement_skips_the_export(split, monkeypatch):
+    model, X_check = split
+    nudged(monkeypatch, lambda p: np.where(p > 0.9, -0.6, 0.0))
+
+    quantized, summary = train.quantize(model, X_check)
+
+    assert quantized is None and not summary["exported"]
+    assert summary["decision_mismatches"] == int(np.sum(model.predict_proba(X_check)[:, 1] > 0.9))
+
+
+def test_decisions_use_the_calibrated_probability(split, monkeypatch):
+    model, X_check = split
+    # Rows at 1.0 exported as 0.55 keep their call on raw probabilities, but
+    # this map sends 0.55 below 0.5, which is what the app would show.
+    calibration = {"method": "isotonic", "x": [0.0, 0.625, 1.0], "y": [0.0, 0.5, 1.0]}
+    nudged(monkeypatch, lambda p: np.where(p == 1.0, -0.45, 0.0))
+
+    assert train.quantize(model, X_check)[1]["decision_mismatches"] == 0
+    assert train.quantize(model, X_check, calibration)[1]["decision_mismatches"] > 0
@@ -1,12 +1,16 @@
+import argparse
+import json
+import time
 from pathlib import Path
 
-import joblib
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import seaborn as sns
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.base import clone
 from sklearn.metrics import (
     accuracy_score,
+    brier_score_loss,
     classification_report,
     confusion_matrix,
     f1_score,
@@ -14,54 +18,76 @@ from sklearn.metrics import (
     recall_score,
     roc_auc_score,
 )
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedKFold, cross_val_predict, train_test_split
 
+from artifacts import (
+    CANDIDATE_POINTER,
+    POINTER,
+    prune_versions,
+    read_meta,
+    read_pointer,
+    resolve,
+    write_pointer,
+    write_version,
+)
+from bootstrap import bootstrap_histograms, bootstrap_metrics, format_interval
+from calibration import METHODS, apply_calibration, calibration_arrays, fit_calibration, select_calibration
+from drift import reference_profile
+from engines import DEFAULT_ENGINE, ENGINES, Engine, describe_model, engine_for_model, get_engine
+from incremental import UPDATE_MODES, UPDATE_STATE_FILENAME, UpdateState, apply_update
+from quantize import QuantizedForest
+from registry import DIABETES, PRIMARY_CONDITION, REGISTRY_FILENAME, Condition, load_registry
 
-def main() -> None:
-    base_dir = Path(__file__).resolve().parent
-    data_path = base_dir / "diabetes.csv"
+BASE_DIR = Path(__file__).resolve().parent
+TARGET = DIABETES.target
+ZERO_AS_MISSING = list(DIABETES.zero_as_missing)
+# float32 leaf values summed over a few hundred trees move a probability by
+# well under this; closer to 0.5 than this, the risk call is a coin toss.
+QUANTIZE_TIE_BAND = 1e-6
+
+
+def load_dataset(data_path: Path, condition: Condition = DIABETES) -> pd.DataFrame:
     if not data_path.exists():
         raise FileNotFoundError(f"Dataset not found: {data_path}")
 
     df = pd.read_csv(data_path)
-    if "Outcome" not in df.columns:
-        raise ValueError("Expected an 'Outcome' column in diabetes.csv")
-
-    zero_as_missing = ["Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI"]
-    for col in zero_as_missing:
+    if condition.target not in df.columns:
+        raise ValueError(f"Expected an '{condition.target}' column in {data_path.name}")
+    for col in condition.features:
         if col not in df.columns:
             raise ValueError(f"Missing expected feature column: {col}")
-        non_zero_median = df.loc[df[col] != 0, col].median()
-        df[col] = df[col].replace(0, non_zero_median)
+    return df
 
-    X = df.drop(columns=["Outcome"])
-    y = df["Outcome"]
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+def impute_zero_as_missing(df: pd.DataFrame, medians: dict[str, float]) -> pd.DataFrame:
+    df = df.copy()
+    for col, median in medians.items():
+        df[col] = df[col].replace(0, median)
+    return df
 
-    model = RandomForestClassifier(n_estimators=200, random_state=42)
-    model.fit(X_train, y_train)
 
-    y_pred = model.predict(X_test)
-    y_prob = model.predict_proba(X_test)[:, 1]
+def compute_medians(df: pd.DataFrame, columns: tuple[str, ...] = DIABETES.zero_as_missing) -> dict[str, float]:
+    return {col: float(df.loc[df[col] != 0, col].median()) for col in columns}
 
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred, zero_division=0)
-    recall = recall_score(y_test, y_pred, zero_division=0)
-    f1 = f1_score(y_test, y_pred, zero_division=0)
-    auc = roc_auc_score(y_test, y_prob)
 
+def print_metrics(y_true: np.ndarray, y_pred: np.ndarray, y_prob: np.ndarray) -> None:
     print("Classification Report:")
-    print(classification_report(y_test, y_pred, digits=4))
-    print(f"Accuracy : {accuracy:.4f}")
-    print(f"Precision: {precision:.4f}")
-    print(f"Recall   : {recall:.4f}")
-    print(f"F1-Score : {f1:.4f}")
-    print(f"AUC-ROC  : {auc:.4f}")
-
-    cm = confusion_matrix(y_test, y_pred)
+    print(classification_report(y_true, y_pred, digits=4))
+    print(f"Accuracy : {accuracy_score(y_true, y_pred):.4f}")
+    print(f"Precision: {precision_score(y_true, y_pred, zero_division=0):.4f}")
+    print(f"Recall   : {recall_score(y_true, y_pred, zero_division=0):.4f}")
+    print(f"F1-Score : {f1_score(y_true, y_pred, zero_division=0):.4f}")
+    print(f"AUC-ROC  : {roc_auc_score(y_true, y_prob):.4f}")
+
+
+def print_intervals(metrics: dict) -> None:
+    print(f"Bootstrap {metrics['confidence']:.0%} intervals ({metrics['replicates']} replicates of {metrics['n']} rows):")
+    for name, label in (("accuracy", "Accuracy"), ("precision", "Precision"), ("recall", "Recall"), ("f1", "F1-Score")):
+        print(f"  {label:<9}: {format_interval(metrics[name])}")
+    print(f"  {'AUC-ROC':<9}: {format_interval(metrics['auc'], percent=False)}")
+
+
+def save_confusion_matrix(cm: np.ndarray, output_dir: Path, engine: Engine, condition: Condition = DIABETES) -> None:
     plt.figure(figsize=(7, 5))
     sns.heatmap(
         cm,
@@ -69,19 +95,536 @@ def main() -> None:
         fmt="d",
         cmap="Blues",
         cbar=False,
-        xticklabels=["No Diabetes", "Diabetes"],
-        yticklabels=["No Diabetes", "Diabetes"],
+        xticklabels=[f"No {condition.label}", condition.label],
+        yticklabels=[f"No {condition.label}", condition.label],
     )
-    plt.title("Confusion Matrix - Random Forest")
+    plt.title(f"Confusion Matrix - {engine.label}")
     plt.xlabel("Predicted")
     plt.ylabel("Actual")
     plt.tight_layout()
-    plt.savefig(base_dir / "confusion_matrix.png", dpi=300)
+    suffix = "" if condition.name == PRIMARY_CONDITION else f"_{condition.name}"
+    plt.savefig(output_dir / f"confusion_matrix{suffix}.png", dpi=300)
     plt.close()
 
-    joblib.dump(model, base_dir / "model.pkl")
-    joblib.dump(list(X.columns), base_dir / "features.pkl")
 
+def save_artifacts(
+    model,
+    feature_names: list[str],
+    output_dir: Path,
+    engine: Engine,
+    extra_meta: dict | None = None,
+    pointer: str = POINTER,
+    condition: Condition = DIABETES,
+    quantized: QuantizedForest | None = None,
+    update_state: UpdateState | None = None,
+) -> str:
+    # A running app polls models/CURRENT and hot-swaps to the new version;
+    # pointing CANDIDATE at it instead only feeds shadow scoring.
+    meta = {
+        **describe_model(model, engine),
+        "condition": condition.name,
+        "condition_label": condition.label,
+        "risk_thresholds": condition.thresholds(),
+        **(extra_meta or {}),
+    }
+    models_dir = output_dir / condition.models_dirname
+    extra_files = {UPDATE_STATE_FILENAME: update_state.save} if update_state is not None else None
+    version = write_version(
+        models_dir, model, feature_names, meta, pointer=pointer, quantized=quantized, extra_files=extra_files
+    )
+    print(f"Saved {condition.name} model version {version} to {models_dir / version} ({pointer})")
+    return version
+
+
+def compact(model, X_train, y_train, output_dir: Path, latency_ms: float, auc_tolerance: float):
+    from compaction import compact_forest
+
+    compacted, report = compact_forest(
+        model, X_train, y_train, latency_budget_ms=latency_ms, auc_tolerance=auc_tolerance
+    )
+    (output_dir / "compaction_report.json").write_text(json.dumps(report.to_dict(), indent=2))
+
+    full, chosen = report.full, report.chosen
+    print(f"Compaction frontier ({len(report.frontier)} of {len(report.candidates)} candidates):")
+    for cand in report.frontier:
+        print(
+            f"  trees={cand.n_estimators:<4} depth={str(cand.max_depth):<5} leaf={cand.min_samples_leaf:<3}"
+            f" auc={cand.auc:.4f} latency={cand.latency_ms:.2f}ms"
+        )
+    if not report.met_budget:
+        print(f"⚠️ No candidate met {latency_ms}ms within {auc_tolerance} AUC; keeping the full model")
+    else:
+        print(
+            f"Compacted: {full.latency_ms:.2f}ms -> {chosen.latency_ms:.2f}ms, "
+            f"validation AUC {full.auc:.4f} -> {chosen.auc:.4f}, {full.model_bytes} -> {chosen.model_bytes} bytes"
+        )
+    summary = {
+        "latency_budget_ms": latency_ms,
+        "auc_tolerance": auc_tolerance,
+        "met_budget": report.met_budget,
+        "n_estimators": chosen.n_estimators,
+        "max_depth": chosen.max_depth,
+        "min_samples_leaf": chosen.min_samples_leaf,
+    }
+    return compacted, summary
+
+
+def quantize(model, X_check: pd.DataFrame | None = None, calibration: dict | None = None):
+    import pickle
+
+    quantized = QuantizedForest.from_model(model)
+    summary = {"bytes": quantized.nbytes, "model_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))}
+    if X_check is not None:
+        # The export must make the same call the app makes from the float
+        # forest: calibrated probability > 0.5. Rows within QUANTIZE_TIE_BAND
+        # of 0.5 on either side are ties that float rounding alone can flip.
+        expected = model.predict_proba(X_check)[:, 1]
+        actual = quantized.predict_proba(X_check)[:, 1]
+        table = calibration_arrays(calibration)
+        p_float = np.asarray(apply_calibration(expected, table), dtype=float)
+        p_quant = np.asarray(apply_calibration(actual, table), dtype=float)
+        ties = (np.abs(p_float - 0.5) <= QUANTIZE_TIE_BAND) | (np.abs(p_quant - 0.5) <= QUANTIZE_TIE_BAND)
+        summary["max_abs_diff"] = float(np.abs(expected - actual).max())
+        summary["checked_rows"] = len(X_check)
+        summary["ties"] = int(ties.sum())
+        summary["decision_mismatches"] = int(np.sum(((p_float > 0.5) != (p_quant > 0.5)) & ~ties))
+        if summary["decision_mismatches"]:
+            # The float model is already trained and is saved either way.
+            summary["exported"] = False
+            print(
+                f"Quantized: {summary['decision_mismatches']}/{len(X_check)} rows change risk call "
+                f"(max |dp| {summary['max_abs_diff']:.2e}); not exporting the quantized forest"
+            )
+            return None, summary
+    summary["exported"] = True
+    print(
+        f"Quantized: {summary['model_bytes']} -> {summary['bytes']} bytes "
+        f"({summary['model_bytes'] / summary['bytes']:.1f}x smaller, {len(quantized.feature)} nodes)"
+    )
+    return quantized, summary
+
+
+def search_params(engine: Engine, X_train, y_train, output_dir: Path, strategy: str, n_iter: int, cv: int, jobs):
+    from search import run_search, write_leaderboard
+
+    leaderboard = run_search(
+        engine,
+        X_train,
+        y_train,
+        cache_dir=output_dir / "search_cache",
+        strategy=strategy,
+        n_iter=n_iter,
+        n_splits=cv,
+        n_jobs=jobs,
+    )
+    write_leaderboard(leaderboard, output_dir / "search_leaderboard.json")
+
+    print(f"Hyperparameter search ({strategy}, {cv}-fold CV, {len(leaderboard)} candidates):")
+    print(f"  {'rank':<5}{'AUC':>8}{'±':>8}{'fit s':>9}{'ms/row':>9}{'cached':>8}  params")
+    for rank, row in enumerate(leaderboard[:10], start=1):
+        print(
+            f"  {rank:<5}{row.mean_auc:>8.4f}{row.std_auc:>8.4f}{row.fit_seconds:>9.3f}"
+            f"{row.predict_ms_per_row:>9.4f}{row.cached_folds:>5}/{cv}  {row.params}"
+        )
+    best = leaderboard[0]
+    return best.params, {"strategy": strategy, "cv": cv, "params": best.params, "cv_auc": best.mean_auc}
+
+
+def calibrate(model, X_train, y_train, method: str) -> dict | None:
+    # Out-of-fold probabilities from the final configuration stand in for a
+    # held-out set without taking rows away from the served model. "auto"
+    # picks the map (or none) on them too, so the test split stays unseen.
+    folds = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    oof = cross_val_predict(clone(model), X_train, y_train, cv=folds, method="predict_proba")[:, 1]
+    if method == "auto":
+        scores = select_calibration(oof, y_train.to_numpy())
+        print("Calibration: out-of-fold Brier " + ", ".join(f"{name} {score:.4f}" for name, score in scores.items()))
+        method = min(scores, key=scores.get)
+        if method == "none":
+            print("Calibration: none (no map beats the model's own out-of-fold probabilities)")
+            return None
+    table = fit_calibration(oof, y_train, method=method)
+    print(f"Calibration: {method} map with {len(table['x'])} knots fitted on out-of-fold predictions")
+    return table
+
+
+def train_in_memory(
+    data_path: Path,
+    output_dir: Path,
+    engine: Engine,
+    compact_latency_ms: float | None = None,
+    compact_auc_tolerance: float = 0.01,
+    search_strategy: str | None = None,
+    search_n_iter: int = 20,
+    search_cv: int = 5,
+    search_jobs: int | None = None,
+    calibration_method: str | None = "auto",
+    pointer: str = POINTER,
+    condition: Condition = DIABETES,
+    bootstrap_replicates: int = 2000,
+    quantize_forest: bool = False,
+) -> None:
+    raw = load_dataset(data_path, condition)
+    df = impute_zero_as_missing(raw, compute_medians(raw, condition.zero_as_missing))
+
+    X = df[list(condition.features)]
+    y = df[condition.target]
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    extra_meta = {"drift_reference": reference_profile(X_train, len(X_train))}
+    model = engine.build(42)
+    if search_strategy is not None:
+        best_params, extra_meta["search"] = search_params(
+            engine, X_train, y_train, output_dir, search_strategy, search_n_iter, search_cv, search_jobs
+        )
+        model.set_params(**best_params)
+    model.fit(X_train, y_train)
+
+    if compact_latency_ms is not None:
+        model, extra_meta["compaction"] = compact(
+            model, X_train, y_train, output_dir, compact_latency_ms, compact_auc_tolerance
+        )
+
+    raw_prob = model.predict_proba(X_test)[:, 1]
+    y_prob = raw_prob
+    table = None
+    if calibration_method is not None:
+        table = calibrate(model, X_train, y_train, calibration_method)
+    else:
+        print("Calibration: none (serving the model's own probabilities)")
+    if table is not None:
+        extra_meta["calibration"] = table
+        y_prob = apply_calibration(raw_prob, table)
+    y_pred = (y_prob > 0.5).astype(int)
+    print_metrics(y_test, y_pred, y_prob)
+    if table is not None:
+        print(f"Brier    : {brier_score_loss(y_test, raw_prob):.4f} raw -> {brier_score_loss(y_test, y_prob):.4f} calibrated")
+    else:
+        print(f"Brier    : {brier_score_loss(y_test, raw_prob):.4f}")
+    if bootstrap_replicates > 0:
+        extra_meta["metrics"] = bootstrap_metrics(
+            y_test.to_numpy(), np.asarray(y_prob), replicates=bootstrap_replicates, jobs=search_jobs
+        )
+        print_intervals(extra_meta["metrics"])
+
+    quantized = None
+    if quantize_forest:
+        quantized, extra_meta["quantized"] = quantize(model, X_test, extra_meta.get("calibration"))
+
+    # Forests keep what --update needs to grow them from new outcomes later.
+    update_state = None
+    if hasattr(model, "estimators_"):
+        update_state = UpdateState.initial(raw, condition, X_train.index, X_test.index, len(model.estimators_))
+
+    save_confusion_matrix(confusion_matrix(y_test, y_pred), output_dir, engine, condition)
+    save_artifacts(
+        model, list(X.columns), output_dir, engine, extra_meta, pointer, condition, quantized, update_state
+    )
+
+
+def train_streaming(
+    data_path: Path,
+    output_dir: Path,
+    chunksize: int | None,
+    memory_cap_mb: float,
+    pointer: str = POINTER,
+    condition: Condition = DIABETES,
+    bootstrap_replicates: int = 2000,
+    quantize_forest: bool = False,
+) -> None:
+    from streaming import StreamingTrainer
+
+    if not data_path.exists():
+        raise FileNotFoundError(f"Dataset not found: {data_path}")
+
+    trainer = StreamingTrainer(
+        target=condition.target,
+        zero_as_missing=list(condition.zero_as_missing),
+        features=list(condition.features),
+        n_estimators=200,
+        test_size=0.2,
+        random_state=42,
+        chunksize=chunksize,
+        memory_cap_mb=memory_cap_mb,
+    )
+    result = trainer.fit(data_path)
+    metrics = result.metrics
+
+    print(f"Rows     : {result.n_rows} ({result.n_chunks} chunks of <= {result.chunksize})")
+    print(f"Trees    : {len(result.model.estimators_)}")
+    print(f"Accuracy : {metrics.accuracy():.4f}")
+    print(f"Precision: {metrics.precision():.4f}")
+    print(f"Recall   : {metrics.recall():.4f}")
+    print(f"F1-Score : {metrics.f1():.4f}")
+    print(f"AUC-ROC  : {metrics.auc():.4f}")
+
+    engine = get_engine("random_forest")
+    save_confusion_matrix(metrics.confusion_matrix(), output_dir, engine, condition)
+    extra_meta = {"drift_reference": result.drift_reference}
+    if bootstrap_replicates > 0:
+        # The streamed test rows survive only as score histograms.
+        extra_meta["metrics"] = bootstrap_histograms(
+            metrics.pos_hist, metrics.neg_hist, replicates=bootstrap_replicates
+        )
+        print_intervals(extra_meta["metrics"])
+    quantized = None
+    if quantize_forest:
+        # The streamed test rows are gone by now, so only the export itself
+        # is checked here (bin mapping is exact by construction).
+        quantized, extra_meta["quantized"] = quantize(result.model)
+    save_artifacts(
+        result.model, result.feature_names, output_dir, engine, extra_meta, pointer, condition, quantized
+    )
+
+
+def update_model(
+    batch_path: Path,
+    data_path: Path,
+    output_dir: Path,
+    mode: str,
+    n_trees: int,
+    pointer: str = POINTER,
+    condition: Condition = DIABETES,
+    bootstrap_replicates: int = 2000,
+    quantize_forest: bool = False,
+) -> None:
+    import joblib
+
+    found = resolve(output_dir, POINTER, condition.models_dirname)
+    if found is None:
+        raise SystemExit(f"No {POINTER} model for {condition.name} under {output_dir / condition.models_dirname}")
+    parent, path = found
+    model = joblib.load(path / "model.pkl")
+    engine = engine_for_model(model)
+    if engine.name != "random_forest":
+        raise SystemExit("--update grows a warm-started forest; the current model is not a random_forest")
+    meta = read_meta(parent, path) or {}
+
+    state_path = path / UPDATE_STATE_FILENAME
+    if state_path.exists():
+        state = UpdateState.load(state_path)
+    else:
+        # Versions trained before update state existed: rebuild it from the
+        # training CSV with the split train_in_memory uses.
+        print(f"No {UPDATE_STATE_FILENAME} in {parent}; rebuilding it from {data_path}")
+        raw = load_dataset(data_path, condition)
+        train_index, test_index = train_test_split(
+            raw.index, test_size=0.2, random_state=42, stratify=raw[condition.target]
+        )
+        state = UpdateState.initial(raw, condition, train_index, test_index, len(model.estimators_))
+
+    batch = load_dataset(batch_path, condition)
+    start = time.perf_counter()
+    result = apply_update(model, state, batch, mode=mode, n_trees=n_trees)
+    summary = {**result.summary, "parent": parent, "seconds": round(time.perf_counter() - start, 3)}
+    print(
+        f"Update   : {summary['batch_rows']} new rows, +{summary['trees_added']}/-{summary['trees_removed']} trees "
+        f"-> {summary['n_estimators']} ({summary['fit_rows']} rows fitted, {summary['seconds']:.2f}s)"
+    )
+
+    # Calibration is carried over from the parent; a full retrain refits it.
+    replay = state.frame(state.replay.rows)
+    extra_meta = {
+        "update": summary,
+        "drift_reference": reference_profile(replay[list(condition.features)], state.rows_seen),
+    }
+    if meta.get("calibration"):
+        extra_meta["calibration"] = meta["calibration"]
+    holdout = result.holdout
+    if len(holdout) and holdout[condition.target].nunique() == 2:
+        raw_prob = model.predict_proba(holdout[list(condition.features)])[:, 1]
+        y_prob = apply_calibration(raw_prob, calibration_arrays(meta.get("calibration")))
+        print(f"AUC-ROC  : {roc_auc_score(holdout[condition.target], y_prob):.4f} on {len(holdout)} held-out rows")
+        if bootstrap_replicates > 0:
+            extra_meta["metrics"] = bootstrap_metrics(
+                holdout[condition.target].to_numpy(), np.asarray(y_prob), replicates=bootstrap_replicates
+            )
+            print_intervals(extra_meta["metrics"])
+
+    quantized = None
+    if quantize_forest:
+        check = holdout[list(condition.features)] if len(holdout) else None
+        quantized, extra_meta["quantized"] = quantize(model, check, meta.get("calibration"))
+    save_artifacts(
+        model, list(condition.features), output_dir, engine, extra_meta, pointer, condition, quantized, state
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train a VitalAI risk model for a registered condition.")
+    parser.add_argument(
+        "--condition",
+        default=PRIMARY_CONDITION,
+        help="Condition from registry.json (in --output-dir if present); selects the CSV, target, features and models.",
+    )
+    parser.add_argument("--data", type=Path, default=None, help="CSV to train on (default: the condition's data).")
+    parser.add_argument("--output-dir", type=Path, default=BASE_DIR)
+    parser.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE)
+    parser.add_argument(
+        "--compact-latency-ms",
+        type=float,
+        default=None,
+        help="Compact the forest to meet this single-row predict_proba latency budget.",
+    )
+    parser.add_argument("--compact-auc-tolerance", type=float, default=0.01)
+    parser.add_argument(
+        "--calibration",
+        choices=["auto", *METHODS, "none"],
+        default="auto",
+        help=(
+            "Probability calibration map fitted on out-of-fold predictions. auto keeps whichever of "
+            "none/isotonic/sigmoid has the lowest cross-fitted Brier score on those predictions."
+        ),
+    )
+    parser.add_argument(
+        "--search",
+        choices=["grid", "random"],
+        default=None,
+        help="Pick hyperparameters by cross-validated search before the final fit.",
+    )
+    parser.add_argument("--n-iter", type=int, default=20, help="Candidates sampled by --search random.")
+    parser.add_argument("--cv", type=int, default=5, help="Stratified folds per candidate in --search mode.")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for --search and for bootstrapping large test sets (default: all cores).",
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=2000,
+        help="Bootstrap replicates for metric confidence intervals written to the model meta (0 disables).",
+    )
+    parser.add_argument(
+        "--quantize",
+        action="store_true",
+        help="Also export the forest as uint8/uint16 bins and float32 leaves; the app scores with it when present.",
+    )
+    parser.add_argument(
+        "--update",
+        type=Path,
+        default=None,
+        metavar="CSV",
+        help="Grow the current forest from a CSV of newly labelled rows and publish it as a new version.",
+    )
+    parser.add_argument(
+        "--update-mode",
+        choices=UPDATE_MODES,
+        default="grow",
+        help="grow adds --update-trees trees; rolling also drops that many of the oldest ones.",
+    )
+    parser.add_argument("--update-trees", type=int, default=20, help="Trees fitted per --update batch.")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Train out-of-core over CSV chunks instead of loading the whole dataset.",
+    )
+    parser.add_argument("--chunksize", type=int, default=None, help="Rows per chunk in --stream mode.")
+    parser.add_argument(
+        "--memory-cap-mb",
+        type=float,
+        default=256.0,
+        help="Working-set budget used to size chunks in --stream mode.",
+    )
+    parser.add_argument(
+        "--candidate",
+        action="store_true",
+        help="Point models/CANDIDATE at the new version for shadow scoring instead of serving it.",
+    )
+    parser.add_argument(
+        "--promote-candidate",
+        action="store_true",
+        help="Point models/CURRENT at the version named by models/CANDIDATE, then exit without training.",
+    )
+    parser.add_argument(
+        "--keep-versions",
+        type=int,
+        default=5,
+        help="Model versions to keep under models/; versions named by a pointer are never removed.",
+    )
+    return parser.parse_args()
+
+
+def promote_candidate(output_dir: Path, condition: Condition = DIABETES) -> None:
+    models_dir = output_dir / condition.models_dirname
+    version = read_pointer(models_dir, CANDIDATE_POINTER)
+    if version is None:
+        raise SystemExit(f"No {CANDIDATE_POINTER} pointer under {models_dir}")
+    write_pointer(models_dir, version, POINTER)
+    (models_dir / CANDIDATE_POINTER).unlink()
+    print(f"✅ Promoted {version} to {POINTER}")
+
+
+def main() -> None:
+    args = parse_args()
+    # Relative data paths resolve against the directory holding the registry.
+    registry_dir = args.output_dir if (args.output_dir / REGISTRY_FILENAME).exists() else BASE_DIR
+    registry = load_registry(registry_dir)
+    if args.condition not in registry:
+        raise SystemExit(f"Unknown condition '{args.condition}'; registered: {', '.join(sorted(registry))}")
+    condition = registry[args.condition]
+    data_path = args.data or registry_dir / condition.data
+    if args.promote_candidate:
+        promote_candidate(args.output_dir, condition)
+        return
+    pointer = CANDIDATE_POINTER if args.candidate else POINTER
+    if args.compact_latency_ms is not None and args.engine != "random_forest":
+        raise SystemExit("--compact-latency-ms only applies to --engine random_forest")
+    if args.quantize and args.engine != "random_forest":
+        raise SystemExit("--quantize only applies to --engine random_forest")
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.update is not None:
+        update_model(
+            args.update,
+            data_path,
+            args.output_dir,
+            args.update_mode,
+            args.update_trees,
+            pointer,
+            condition,
+            args.bootstrap,
+            args.quantize,
+        )
+    elif args.stream:
+        if args.engine != "random_forest":
+            raise SystemExit("--stream grows a warm-started forest; use --engine random_forest")
+        if args.compact_latency_ms is not None or args.search is not None:
+            raise SystemExit("--compact-latency-ms and --search are only supported for in-memory training")
+        train_streaming(
+            data_path,
+            args.output_dir,
+            args.chunksize,
+            args.memory_cap_mb,
+            pointer,
+            condition,
+            args.bootstrap,
+            args.quantize,
+        )
+    else:
+        train_in_memory(
+            data_path,
+            args.output_dir,
+            get_engine(args.engine),
+            compact_latency_ms=args.compact_latency_ms,
+            compact_auc_tolerance=args.compact_auc_tolerance,
+            search_strategy=args.search,
+            search_n_iter=args.n_iter,
+            search_cv=args.cv,
+            search_jobs=args.jobs,
+            calibration_method=None if args.calibration == "none" else args.calibration,
+            pointer=pointer,
+            condition=condition,
+            bootstrap_replicates=args.bootstrap,
+            quantize_forest=args.quantize,
+        )
+
+    for version in prune_versions(args.output_dir / condition.models_dirname, args.keep_versions):
+        print(f"Pruned model version {version}")
     print("✅ Model trained and saved successfully")
 
 
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Callable, Iterable
+
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+
+
+def _run(modules: tuple[str, ...], tasks: tuple[Callable[[], object], ...]) -> None:
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+    for task in tasks:
+        try:
+            task()
+        except Exception:
+            pass
+
+
+def start_warmup(modules: Iterable[str], tasks: Iterable[Callable[[], object]] = ()) -> None:
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(
+            target=_run, args=(tuple(modules), tuple(tasks)), name="vitalai-warmup", daemon=True
+        )
+        _thread.start()
+
+
+def wait_for_warmup(timeout: float | None = None) -> None:
+    # Heavy imports must not race the warm-up thread: concurrent first
+    # imports of the same package can observe partially initialised modules.
+    thread = _thread
+    if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+        thread.join(timeout)